@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Hook latency report from .orchestra/logs/hook-metrics.jsonl.
+
+hook-timer.sh wraps every hooks.json entry and appends one record per run:
+  {"timestamp": "2026-01-01T12:00:00Z", "event": "PreToolUse", "matcher": "Edit|Write",
+   "hook": "maestro-guard.sh", "ms": 12.345, "exit": 0}
+
+This script groups the records per hook and per event/matcher and prints
+count, p50/p95/p99/max latency and a millisecond histogram. Rotated
+segments in .orchestra/logs/archive/ are read together with the live file.
+
+Usage:
+  python3 hook-metrics.py [--file PATH] [--since-hours H] [--by hook|matcher|all] [--json]
+                          [--budget MS] [--budget-for HOOK=MS ...]
+
+With a budget the exit code is 1 when a group's p95 exceeds it, so the report
+can gate CI or flag a regression after a hook change.
+"""
+
+import argparse
+import importlib.util
+import json
+import math
+import os
+import sys
+from datetime import datetime, timezone
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_METRICS_FILE = ".orchestra/logs/hook-metrics.jsonl"
+PERCENTILES = (50, 95, 99)
+# 히스토그램 버킷 상한 (ms), 마지막 버킷은 그 이상
+HISTOGRAM_BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+def _load_log_archive():
+    """Import learning/log-archive.py (hyphenated file name) to read rotated segments."""
+    spec = importlib.util.spec_from_file_location("log_archive", os.path.join(SCRIPT_DIR, "learning", "log-archive.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+log_archive = _load_log_archive()
+
+
+def parse_timestamp(ts):
+    try:
+        return datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def parse_record(line):
+    """One metrics line as a record dict, or None if malformed."""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict) or not isinstance(record.get("ms"), (int, float)) or not record.get("hook"):
+        return None
+    return record
+
+
+def read_records(path, since=None):
+    """Records of the archived segments (oldest first) and the live file, from epoch `since` on."""
+    chunks = []
+    for segment in log_archive.log_segments(path):
+        last_ts = segment.get("lastTs")
+        if since is not None and last_ts is not None and last_ts < since:
+            continue
+        try:
+            chunks.append(log_archive.read_segment(path, segment).decode("utf-8", errors="replace"))
+        except OSError as e:
+            sys.stderr.write(f"Skipping unreadable segment {segment.get('file')}: {e}\n")
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            chunks.append(f.read())
+    except FileNotFoundError:
+        pass
+    records = []
+    for chunk in chunks:
+        for line in chunk.splitlines():
+            record = parse_record(line)
+            if record is None:
+                continue
+            if since is not None:
+                epoch = parse_timestamp(record.get("timestamp"))
+                if epoch is not None and epoch < since:
+                    continue
+            records.append(record)
+    return records
+
+
+# --- Aggregation ---
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def histogram(values):
+    """Counts per HISTOGRAM_BOUNDS_MS bucket: {"<=5": n, ..., ">2500": n} (empty buckets omitted)."""
+    counts = {}
+    for value in values:
+        for bound in HISTOGRAM_BOUNDS_MS:
+            if value <= bound:
+                key = f"<={bound}"
+                break
+        else:
+            key = f">{HISTOGRAM_BOUNDS_MS[-1]}"
+        counts[key] = counts.get(key, 0) + 1
+    order = [f"<={bound}" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}"]
+    return {key: counts[key] for key in order if key in counts}
+
+
+def summarize(values, failures):
+    values = sorted(values)
+    summary = {"count": len(values)}
+    for p in PERCENTILES:
+        summary[f"p{p}"] = round(percentile(values, p), 3)
+    summary["max"] = round(values[-1], 3)
+    summary["mean"] = round(sum(values) / len(values), 3)
+    summary["nonZeroExits"] = failures
+    summary["histogram"] = histogram(values)
+    return summary
+
+
+def group_key(record, by):
+    if by == "hook":
+        return record["hook"]
+    return f"{record.get('event', '')} {record.get('matcher') or '*'}"
+
+
+def aggregate(records, by):
+    """{group: summary} sorted by p95 descending."""
+    groups = {}
+    for record in records:
+        values, failures = groups.setdefault(group_key(record, by), ([], [0]))
+        values.append(float(record["ms"]))
+        if record.get("exit", 0) != 0:
+            failures[0] += 1
+    summaries = {key: summarize(values, failures[0]) for key, (values, failures) in groups.items()}
+    return dict(sorted(summaries.items(), key=lambda item: -item[1]["p95"]))
+
+
+def over_budget(report, budget, budgets_for):
+    """[(group, p95, budget)] for hook groups whose p95 exceeds their budget."""
+    violations = []
+    for hook, summary in report.get("hook", {}).items():
+        limit = budgets_for.get(hook, budgets_for.get(hook.split(" ")[0], budget))
+        if limit is not None and summary["p95"] > limit:
+            violations.append((hook, summary["p95"], limit))
+    return violations
+
+
+# --- Output ---
+
+def print_table(title, summaries):
+    print(f"{title}")
+    print(f"  {'group':<40} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  histogram (ms)")
+    for key, s in summaries.items():
+        buckets = " ".join(f"{bucket}:{count}" for bucket, count in s["histogram"].items())
+        print(f"  {key[:40]:<40} {s['count']:>6} {s['p50']:>9.1f} {s['p95']:>9.1f} {s['p99']:>9.1f} "
+              f"{s['max']:>9.1f}  {buckets}")
+    print()
+
+
+def parse_budget_for(values, parser):
+    budgets = {}
+    for value in values:
+        hook, _, ms = value.rpartition("=")
+        try:
+            budgets[hook] = float(ms)
+        except ValueError:
+            hook = ""
+        if not hook:
+            parser.error(f"--budget-for expects HOOK=MS, got {value!r}")
+    return budgets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-hook latency percentiles from hook-metrics.jsonl")
+    parser.add_argument("--file", default=DEFAULT_METRICS_FILE, help="Metrics file written by hook-timer.sh")
+    parser.add_argument("--since-hours", type=float, default=0, help="Only records from the last N hours (0 = all)")
+    parser.add_argument("--by", choices=("hook", "matcher", "all"), default="all",
+                        help="Group per hook script, per event/matcher, or both")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--budget", type=float, default=None, help="p95 latency budget in ms for every hook")
+    parser.add_argument("--budget-for", action="append", default=[], metavar="HOOK=MS",
+                        help="p95 budget for one hook (e.g. tdd-guard.sh=150); overrides --budget")
+    args = parser.parse_args()
+    budgets_for = parse_budget_for(args.budget_for, parser)
+
+    since = datetime.now(timezone.utc).timestamp() - args.since_hours * 3600 if args.since_hours > 0 else None
+    records = read_records(args.file, since)
+    groupings = ("hook", "matcher") if args.by == "all" else (args.by,)
+    # 예산은 훅 단위로 판정하므로 --by matcher여도 훅별 집계를 계산
+    report = {by: aggregate(records, by) for by in ("hook", "matcher")}
+    violations = over_budget(report, args.budget, budgets_for)
+
+    if args.json:
+        output = {"records": len(records), **{by: report[by] for by in groupings}}
+        if args.budget is not None or budgets_for:
+            output["overBudget"] = [{"hook": hook, "p95": p95, "budget": limit} for hook, p95, limit in violations]
+        print(json.dumps(output, ensure_ascii=False, indent=2))
+    elif not records:
+        print(f"No hook metrics in {args.file}")
+    else:
+        print(f"{len(records)} hook runs ({args.file})\n")
+        for by in groupings:
+            print_table("Per hook" if by == "hook" else "Per event/matcher", report[by])
+        for hook, p95, limit in violations:
+            print(f"⚠️ {hook}: p95 {p95:.1f}ms > budget {limit:g}ms")
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
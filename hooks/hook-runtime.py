@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+In-process runtime for Python hook handlers.
+
+Claude Code passes every hook its event as JSON on stdin. Shell hooks parse it
+through stdin-reader.sh and then start another python3 for each hook_get_field
+and state.json update. Hooks moved onto this runtime read stdin once, resolve
+the .orchestra paths like find-root.sh and run a registered handler, so a tool
+event costs a single interpreter start.
+
+Usage: python3 hook-runtime.py <handler> [args...] < hook.json
+
+Handlers:
+  change-log                                        PostToolUse Edit|Write → changes.jsonl
+  agent-log <pre|post|subagent-start|subagent-stop> agent activity, stack, planning flags
+  test-log                                          PostToolUse Bash → test-runs.jsonl (+ readable .log), TDD metrics
+
+Handlers never fail the tool call: errors go to /tmp/orchestra-errors-$USER.log
+and the runtime exits 0.
+"""
+
+import fnmatch
+import importlib.util
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import traceback
+from datetime import datetime, timezone
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ERROR_LOG = f"/tmp/orchestra-errors-{os.environ.get('USER', 'unknown')}.log"
+# ORCHESTRA_DEBUG=1 일 때만 기록 (find-root.sh와 동일); 훅 지연 시간은 hook-timer.sh가 기록
+AGENT_DEBUG_LOG = "/tmp/orchestra-hook-debug.log"
+
+
+def now_local():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def now_utc_iso():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def load_sibling(module_name, file_name):
+    """Import a hyphen-named script from the hooks directory."""
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(SCRIPT_DIR, file_name))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def append_line(path, line):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+# --- Hook Context ---
+
+def find_project_root(cwd=None):
+    """Same lookup order as find-root.sh (ORCHESTRA_ROOT env wins)."""
+    if os.environ.get("ORCHESTRA_ROOT"):
+        return os.environ["ORCHESTRA_ROOT"]
+    cwd = cwd or os.getcwd()
+    try:
+        git_root = subprocess.run(
+            ["git", "rev-parse", "--show-toplevel"],
+            capture_output=True, text=True, cwd=cwd,
+        ).stdout.strip()
+    except OSError:
+        git_root = ""
+    # 1. Git 루트에 .orchestra가 있으면 사용
+    if git_root and os.path.isdir(os.path.join(git_root, ".orchestra")):
+        return git_root
+    # 2. 상향 탐색: 가장 상위의 .orchestra
+    found_root = ""
+    path = cwd
+    while path != "/":
+        if os.path.isdir(os.path.join(path, ".orchestra")):
+            found_root = path
+        path = os.path.dirname(path)
+    if found_root:
+        return found_root
+    # 3. Git 루트, 4. 현재 디렉토리
+    return git_root or cwd
+
+
+class HookContext:
+    """Parsed hook event plus the .orchestra paths (HOOK_* / ORCHESTRA_* equivalents)."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        try:
+            data = json.loads(raw) if raw.strip() else {}
+        except json.JSONDecodeError:
+            data = {}
+        self.data = data if isinstance(data, dict) else {}
+        self.event = self.data.get("hook_event_name", "")
+        self.tool_name = self.data.get("tool_name", "")
+        self.session_id = self.data.get("session_id", "")
+        self.tool_input = self.data.get("tool_input", "")
+        self.tool_response = self.data.get("tool_response", "")
+
+        self.root = find_project_root()
+        self.orchestra_dir = os.path.join(self.root, ".orchestra")
+        self.log_dir = os.path.join(self.orchestra_dir, "logs")
+        self.state_file = os.path.join(self.orchestra_dir, "state.json")
+
+    def get_field(self, path):
+        """hook_get_field equivalent: dotted path → str (dicts as JSON, falsy as "")."""
+        val = self.data
+        for key in path.split("."):
+            if isinstance(val, dict):
+                val = val.get(key, "")
+            else:
+                val = ""
+                break
+        if isinstance(val, dict):
+            return json.dumps(val, ensure_ascii=False)
+        # 셸 $(...) 치환과 동일하게 trailing newline 제거
+        return str(val).rstrip("\n") if val else ""
+
+    def field_as_text(self, value):
+        """HOOK_TOOL_INPUT / HOOK_TOOL_RESPONSE equivalent."""
+        return json.dumps(value, ensure_ascii=False) if isinstance(value, dict) else str(value)
+
+    def ensure_dirs(self):
+        os.makedirs(self.log_dir, exist_ok=True)
+
+
+# --- State File ---
+
+def update_state_file(path, update):
+    """Load state.json, apply update(dict) and write it back atomically. No-op if missing."""
+    if not os.path.isfile(path):
+        return
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        update(state)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=2, ensure_ascii=False)
+            os.rename(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+    except (OSError, ValueError, AttributeError, TypeError):
+        pass
+
+
+# --- Handlers ---
+
+HANDLERS = {}
+
+
+def handler(name):
+    def register(fn):
+        HANDLERS[name] = fn
+        return fn
+    return register
+
+
+# 민감 파일 (change-logger.sh의 case 패턴과 동일)
+SENSITIVE_FILE_PATTERNS = [
+    "*.env", "*.env.*", ".env*",
+    "*credentials*", "*secret*", "*secrets*",
+    "*.key", "*.pem", "*.p12", "*.pfx",
+    "*/secrets/*", "*/.env/*",
+    "*password*", "*passwd*",
+]
+
+LANGUAGE_BY_EXTENSION = {
+    ".ts": "typescript", ".tsx": "typescript",
+    ".js": "javascript", ".jsx": "javascript",
+    ".py": "python",
+    ".sh": "bash", ".bash": "bash",
+    ".md": "markdown",
+    ".json": "json",
+    ".yaml": "yaml", ".yml": "yaml",
+    ".html": "html", ".htm": "html",
+    ".css": "css", ".scss": "css", ".sass": "css",
+    ".go": "go",
+    ".rs": "rust",
+    ".java": "java",
+    ".rb": "ruby",
+    ".php": "php",
+    ".sql": "sql",
+    ".xml": "xml",
+    ".toml": "toml",
+}
+
+
+def is_sensitive_file(path):
+    return any(fnmatch.fnmatchcase(path, pattern) for pattern in SENSITIVE_FILE_PATTERNS)
+
+
+def infer_language(path):
+    return LANGUAGE_BY_EXTENSION.get(os.path.splitext(path)[1], "text")
+
+
+@handler("change-log")
+def change_log(ctx, args):
+    """Append a sanitized Edit/Write sample to changes.jsonl."""
+    file_path = ctx.get_field("tool_input.file_path")
+    if not file_path or is_sensitive_file(file_path):
+        return
+    if not isinstance(ctx.tool_input, dict):
+        return
+    if ctx.tool_name == "Edit":
+        # 최소 변경 크기 필터 (둘 다 10자 미만 무시), 크기 제한 (각각 500자)
+        fields = {"old_string": "old_string", "new_string": "new_string"}
+        limits = {"maxChars": 500, "minChars": 10}
+    elif ctx.tool_name == "Write":
+        # 크기 제한 (500자 샘플)
+        fields = {"content_sample": "content"}
+        limits = {"maxChars": 500}
+    else:
+        return
+
+    ctx.ensure_dirs()
+    sanitizer = load_sibling("sanitize_content", "sanitize-content.py")
+    sanitizer.append_record(dict({
+        "path": os.path.join(ctx.log_dir, "changes.jsonl"),
+        "record": {
+            "timestamp": now_utc_iso(),
+            "tool": ctx.tool_name,
+            "file": file_path,
+            "language": infer_language(file_path),
+        },
+        "input": ctx.tool_input,
+        "fields": fields,
+    }, **limits))
+
+
+# (prefixes, substrings, agent) — agent-logger.sh의 extract_agent_name case 순서
+AGENT_NAME_RULES = [
+    (("planner:",), ("planner 에이전트",), "planner"),
+    (("high-player:",), ("high player",), "high-player"),
+    (("low-player:",), ("low player",), "low-player"),
+    (("interviewer:",), (), "interviewer"),
+    (("conflict-checker:",), ("conflict.checker",), "conflict-checker"),
+    ((), ("security guardian",), "security-guardian"),
+    ((), ("quality inspector",), "quality-inspector"),
+    ((), ("performance analyst",), "performance-analyst"),
+    ((), ("standards keeper",), "standards-keeper"),
+    ((), ("tdd enforcer",), "tdd-enforcer"),
+]
+CODE_REVIEW_MEMBERS = ["security-guardian", "quality-inspector", "performance-analyst",
+                       "standards-keeper", "tdd-enforcer"]
+CODE_REVIEW_QUORUM = 3
+
+
+def matches_rule(text, prefixes, substrings):
+    return text.startswith(prefixes) or any(s in text for s in substrings)
+
+
+def extract_agent_name(description, fallback):
+    desc_lower = description.lower()
+    for prefixes, substrings, agent in AGENT_NAME_RULES:
+        if matches_rule(desc_lower, prefixes, substrings):
+            return agent
+    return fallback or "unknown"
+
+
+class AgentLog:
+    """activity.log, .agent-stack, .agent-cache and .cr-tracker of one project."""
+
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self.activity_log = os.path.join(ctx.log_dir, "activity.log")
+        self.stack_file = os.path.join(ctx.log_dir, ".agent-stack")
+        self.cache_dir = os.path.join(ctx.log_dir, ".agent-cache")
+        self.cr_tracker = os.path.join(ctx.log_dir, ".cr-tracker")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def log_activity(self, event, agent, detail=""):
+        append_line(self.activity_log, f"[{now_local()}] {event} | {agent} | {detail}")
+
+    def cache_agent_info(self, agent_id, agent_type, description):
+        if agent_id and agent_type:
+            with open(os.path.join(self.cache_dir, agent_id), "w", encoding="utf-8") as f:
+                f.write(f"{agent_type}\n{description}")
+
+    def lookup_agent_info(self, agent_id):
+        """Return (agent_type, description) cached at start and drop the cache entry."""
+        cache_file = os.path.join(self.cache_dir, agent_id)
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+            os.unlink(cache_file)
+        except OSError:
+            return "", ""
+        # head -1 / tail -1과 동일
+        return (lines[0], lines[-1]) if lines else ("", "")
+
+    def push_stack(self, agent_id, agent_type, description):
+        append_line(self.stack_file, f"{agent_id}|{agent_type}|{description}")
+
+    def pop_stack(self, agent_id):
+        if not os.path.isfile(self.stack_file):
+            return
+        with open(self.stack_file, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        kept = [line for line in lines if not line.startswith(f"{agent_id}|")]
+        fd, tmp_path = tempfile.mkstemp(dir=self.ctx.log_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.writelines(kept)
+        os.rename(tmp_path, self.stack_file)
+
+    def set_planning_flag(self, flag):
+        update_state_file(self.ctx.state_file, lambda d: d.setdefault("planningPhase", {}).__setitem__(flag, True))
+
+    def reset_planning_phase(self):
+        def reset(d):
+            d["planningPhase"] = {
+                "interviewerCompleted": False,
+                "plannerCompleted": False,
+                "resetAt": now_utc_iso(),
+            }
+            d["codeReviewCompleted"] = False
+        update_state_file(self.ctx.state_file, reset)
+        try:
+            os.unlink(self.cr_tracker)
+        except OSError:
+            pass
+
+    def track_code_review(self, member):
+        """Record a Code-Review member; 3+ distinct members mark codeReviewCompleted."""
+        append_line(self.cr_tracker, member)
+        with open(self.cr_tracker, "r", encoding="utf-8") as f:
+            completed = {line.strip() for line in f if line.strip()}
+        if len(completed) >= CODE_REVIEW_QUORUM:
+            update_state_file(self.ctx.state_file, lambda d: d.__setitem__("codeReviewCompleted", True))
+
+    def detect_planning_agent(self, description):
+        desc_lower = description.lower()
+        if desc_lower.startswith("interviewer:"):
+            self.set_planning_flag("interviewerCompleted")
+        elif matches_rule(desc_lower, ("planner:",), ("planner 에이전트", "planner: todo")):
+            self.set_planning_flag("plannerCompleted")
+        else:
+            # Code-Review Group 완료 추적 (5명 중 3명 이상이면 codeReviewCompleted)
+            for prefixes, substrings, agent in AGENT_NAME_RULES:
+                if agent in CODE_REVIEW_MEMBERS and matches_rule(desc_lower, prefixes, substrings):
+                    self.track_code_review(agent)
+                    break
+
+
+@handler("agent-log")
+def agent_log(ctx, args):
+    """Task / Subagent events → activity.log, agent stack and planning-phase flags."""
+    mode = args[0] if args else ""
+    if os.environ.get("ORCHESTRA_DEBUG") == "1":
+        append_line(AGENT_DEBUG_LOG, f"[{now_local()}] hook-runtime agent-log: MODE={mode} PWD={os.getcwd()} "
+                                     f"ORCHESTRA_ROOT={ctx.root}")
+    ctx.ensure_dirs()
+    agents = AgentLog(ctx)
+
+    if mode in ("pre", "post"):
+        agent_name = ctx.get_field("tool_input.subagent_type") or "unknown"
+        description = ctx.get_field("tool_input.description")
+        agents.log_activity("TASK_START" if mode == "pre" else "TASK_END", agent_name, description[:80])
+
+    elif mode == "subagent-start":
+        agent_type = ctx.get_field("agent_type")
+        agent_id = ctx.get_field("agent_id")
+        description = ctx.get_field("description")[:80]
+        actual_agent = extract_agent_name(description, agent_type)
+        agents.cache_agent_info(agent_id, actual_agent, description)
+        agents.push_stack(agent_id, actual_agent, description)
+        agents.log_activity("AGENT_START", actual_agent, f"id={agent_id} {description}")
+        # 새 인터뷰 시작 시 planning phase와 CR tracker 초기화
+        if actual_agent == "interviewer":
+            agents.reset_planning_phase()
+
+    elif mode == "subagent-stop":
+        agent_type = ctx.get_field("agent_type")
+        agent_id = ctx.get_field("agent_id")
+        description = ctx.get_field("description")
+        if agent_id:
+            cached_type, cached_description = agents.lookup_agent_info(agent_id)
+            agent_type = agent_type or cached_type or "unknown"
+            description = description or cached_description
+        agents.pop_stack(agent_id)
+        agents.detect_planning_agent(description)
+        agents.log_activity("AGENT_STOP", agent_type, f"id={agent_id}")
+
+
+TEST_COMMAND_RE = re.compile(r"(npm|yarn|pnpm|bun)[^\S\n]+(run[^\S\n]+)?test|jest|vitest|mocha|pytest")
+
+
+@handler("test-log")
+def test_log(ctx, args):
+    """Record test runs, RED → GREEN cycles and coverage from Bash tool output."""
+    command = ctx.get_field("tool_input.command")
+    if not TEST_COMMAND_RE.search(command):
+        return
+    output = ctx.get_field("tool_response.stdout") or ctx.field_as_text(ctx.tool_response)
+
+    ctx.ensure_dirs()
+    log_file = os.path.join(ctx.log_dir, "test-runs.log")
+
+    def log(message):
+        append_line(log_file, f"[{now_local()}] {message}")
+
+    # 출력 전체를 한 번만 훑어 카운트/실패 테스트/에러 코드/커버리지 추출
+    parser = load_sibling("test_output_parser", "test-output-parser.py")
+    record = parser.parse_output(output, command)
+    parser.append_record(os.path.join(ctx.log_dir, "test-runs.jsonl"), record)
+    passed, failed, skipped = record["passed"], record["failed"], record["skipped"]
+    coverage = record["coverage"]
+    log(f"Test command detected: {command}")
+    log(f"Results: passed={passed}, failed={failed}, skipped={skipped}, coverage={coverage or 0}%")
+
+    # TDD 사이클 감지 (RED -> GREEN)
+    state_path = os.path.join(ctx.log_dir, "last-test-state")
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            previous_state = f.read().strip()
+    except OSError:
+        previous_state = ""
+    current_state = record["status"]
+    with open(state_path, "w", encoding="utf-8") as f:
+        f.write(current_state + "\n")
+    cycle_detected = previous_state == "RED" and current_state == "GREEN"
+
+    def update(d):
+        metrics = d.setdefault("tddMetrics", {})
+        metrics["testCount"] = passed + failed
+        if cycle_detected:
+            metrics["redGreenCycles"] = (metrics.get("redGreenCycles") or 0) + 1
+            log(f"RED -> GREEN cycle detected! Total cycles: {metrics['redGreenCycles']}")
+        if coverage:
+            (d.setdefault("verificationMetrics", {}).setdefault("results", {})
+             .setdefault("tests", {}).setdefault("coverage", {}))["lines"] = coverage
+    update_state_file(ctx.state_file, update)
+
+    if cycle_detected:
+        print("")
+        print("TDD Cycle Complete: RED -> GREEN")
+        print(f"   Tests: {passed} passed, {failed} failed")
+        if coverage:
+            print(f"   Coverage: {coverage}%")
+    if coverage and coverage < 80:
+        print("")
+        print(f"Coverage Warning: {coverage}% (minimum: 80%)")
+
+
+# --- Entry Point ---
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in HANDLERS:
+        sys.stderr.write(f"Usage: hook-runtime.py {{{'|'.join(sorted(HANDLERS))}}} [args...]\n")
+        return 0
+    try:
+        ctx = HookContext(sys.stdin.read())
+        HANDLERS[argv[0]](ctx, argv[1:])
+    except Exception:
+        try:
+            append_line(ERROR_LOG, f"[{now_local()}] ERROR: hook-runtime {argv[0]}: "
+                                   + traceback.format_exc().strip().replace("\n", " | "))
+        except OSError:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
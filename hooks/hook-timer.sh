@@ -0,0 +1,65 @@
+#!/usr/bin/env bash
+# Hook latency telemetry wrapper
+# hooks.json의 각 훅을 감싸 실행 시간을 .orchestra/logs/hook-metrics.jsonl에 한 줄씩 추가합니다.
+# Usage: hook-timer.sh <event> <matcher> <hook-script> [args...]
+#
+# 기록: {"timestamp": "...Z", "event": "PreToolUse", "matcher": "Edit|Write",
+#        "hook": "maestro-guard.sh", "ms": 12.345, "exit": 0}
+#
+# - stdin/stdout/stderr와 종료 코드는 그대로 전달 (exit 2 차단 포함)
+# - ORCHESTRA_HOOK_TIMING=off 이면 hooks.json 명령이 이 래퍼 없이 훅을 바로 exec
+#   (.orchestra가 없는 프로젝트에서는 래퍼가 훅을 바로 exec, 기록 없음)
+# - bash 5+는 $EPOCHREALTIME (fork 없음), 그 외(macOS 기본 bash 3.2)는 perl로 시작/종료에 한 번씩 측정
+# - 집계: python3 hooks/hook-metrics.py (훅/matcher별 p50/p95/p99)
+
+HOOKS_DIR="${0%/*}"
+EVENT="$1"
+MATCHER="$2"
+HOOK="$3"
+shift 3
+
+PROJECT_DIR="${CLAUDE_PROJECT_DIR:-$PWD}"
+if [ "${ORCHESTRA_HOOK_TIMING:-on}" = "off" ] || [ ! -d "$PROJECT_DIR/.orchestra" ]; then
+  exec "$HOOKS_DIR/$HOOK" "$@"
+fi
+METRICS_FILE="$PROJECT_DIR/.orchestra/logs/hook-metrics.jsonl"
+
+# 시작 시각 → START_US(마이크로초)/START_TS(ISO), 종료 시각 → END_US
+if [ -n "${EPOCHREALTIME:-}" ]; then
+  mark_start() {
+    local t="$EPOCHREALTIME"
+    START_US=$((10#${t/[.,]/}))
+    TZ=UTC0 printf -v START_TS '%(%Y-%m-%dT%H:%M:%SZ)T' "$((START_US / 1000000))"
+  }
+  mark_end() {
+    local t="$EPOCHREALTIME"
+    END_US=$((10#${t/[.,]/}))
+  }
+else
+  # perl fork는 시작/종료에 한 번씩만
+  mark_start() {
+    local start
+    start=$(perl -MTime::HiRes=time -MPOSIX=strftime \
+      -e '$t = time; printf "%d %s", $t * 1e6, strftime("%Y-%m-%dT%H:%M:%SZ", gmtime($t))')
+    START_US=${start% *}
+    START_TS=${start#* }
+  }
+  mark_end() {
+    END_US=$(perl -MTime::HiRes=time -e 'printf "%d", time * 1e6')
+  }
+fi
+
+mark_start
+"$HOOKS_DIR/$HOOK" "$@"
+STATUS=$?
+mark_end
+ELAPSED_US=$((END_US - START_US))
+
+LABEL="$HOOK${1:+ $*}"
+[ -d "${METRICS_FILE%/*}" ] || mkdir -p "${METRICS_FILE%/*}" 2>/dev/null
+# 한 줄(PIPE_BUF 미만) O_APPEND 쓰기라 동시에 실행되는 훅끼리 섞이지 않음
+printf '{"timestamp":"%s","event":"%s","matcher":"%s","hook":"%s","ms":%d.%03d,"exit":%d}\n' \
+  "$START_TS" "${EVENT//[\"\\]/}" "${MATCHER//[\"\\]/}" "${LABEL//[\"\\]/}" \
+  "$((ELAPSED_US / 1000))" "$((ELAPSED_US % 1000))" "$STATUS" >> "$METRICS_FILE" 2>/dev/null
+
+exit $STATUS
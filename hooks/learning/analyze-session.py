@@ -5,20 +5,84 @@ Parses activity logs, detects patterns, and creates/updates pattern files.
 Uses only Python3 standard library.
 """
 
+import abc
 import argparse
+import asyncio
+import bisect
+import cProfile
+import functools
+import glob
+import hashlib
+import importlib.util
 import json
+import math
+import multiprocessing
 import os
+import random
 import re
 import signal
+import struct
 import sys
 import tempfile
+import time
+import tracemalloc
 from collections import Counter
 from datetime import datetime, timezone
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 
 # === 설정 상수 ===
-MAX_LOG_SIZE_MB = 10
 TIMEOUT_SECONDS = 30
+READ_BLOCK_SIZE = 64 * 1024
+DEFAULT_WINDOW_ENTRIES = 10000
+DEFAULT_MAX_CHANGES = 1000
+TIMELINE_CAP = 32
+DEFAULT_STATE_FILE = ".orchestra/logs/.analyzer-state.json"
+DEFAULT_TIMINGS_FILE = ".orchestra/logs/analyzer-timings.jsonl"
+DEFAULT_PROFILE_FILE = ".orchestra/logs/analyzer-profile.prof"
+DEFAULT_WATCH_PID_FILE = ".orchestra/logs/.analyzer-watch.pid"
+WATCH_POLL_SECONDS = 1.0
+WATCH_DEBOUNCE_SECONDS = 5.0
+WATCH_QUEUE_SIZE = 64
+WATCH_IDLE_EXIT_SECONDS = 30 * 60
+BATCH_STATE_FILE = ".batch-state.json"
+BATCH_STATE_VERSION = 1
+PROJECT_LOG_DIR = os.path.join(".orchestra", "logs")
+ANALYZER_STATE_VERSION = 1
+PATTERN_INDEX_FILE = ".pattern-index.json"
+PATTERN_INDEX_VERSION = 2
+PATTERN_META_FILE = ".pattern-meta.json"
+PATTERN_META_LOCK = ".pattern-meta.lock"
+PATTERN_META_VERSION = 1
+DEFAULT_DEDUP_THRESHOLD = 0.5
+DEFAULT_LSH_BANDS = 16
+MINHASH_PERMUTATIONS = 64
+MINHASH_SEED = 0x5EED
+SHINGLE_SIZE = 3
+
+
+def _load_sibling(module_name, file_name):
+    """Import a sibling script of this directory (hyphenated file names)."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), file_name)
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# 바이너리 이벤트 저장소, 압축 아카이브 세그먼트, 패턴 검색 인덱스
+event_store = _load_sibling("event_store", "event-store.py")
+log_archive = _load_sibling("log_archive", "log-archive.py")
+pattern_search = _load_sibling("pattern_search", "pattern-search.py")
 
 
 # === 타임아웃 보호 ===
@@ -30,21 +94,6 @@ def timeout_handler(signum, frame):
     raise TimeoutError("Analysis exceeded timeout")
 
 
-# === 로그 크기 체크 ===
-def check_log_size(path, max_mb=MAX_LOG_SIZE_MB):
-    """Check if log file is within size limit."""
-    if not path or not os.path.exists(path):
-        return True
-    try:
-        size_mb = os.path.getsize(path) / (1024 * 1024)
-        if size_mb > max_mb:
-            sys.stderr.write(f"Log too large ({size_mb:.1f}MB > {max_mb}MB): {path}\n")
-            return False
-    except OSError:
-        pass
-    return True
-
-
 # --- Parsing ---
 
 # 레거시 텍스트 형식용 정규식 (하위 호환성)
@@ -57,93 +106,426 @@ TEST_RE = re.compile(
 )
 
 
-def parse_activity_log(path, max_lines=10000):
+def parse_timestamp(ts):
+    """Convert an ISO-8601 or legacy "YYYY-mm-dd HH:MM:SS" timestamp to epoch seconds.
+
+    Legacy timestamps carry no zone and are read as local time (as written by `date`).
+    Returns None when the value cannot be parsed.
+    """
+    if not ts:
+        return None
+    try:
+        return datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()
+    except (ValueError, TypeError):
+        return None
+
+
+@functools.lru_cache(maxsize=4096)
+def epoch_seconds(ts):
+    """parse_timestamp() as whole epoch seconds (None if unparseable); cached, log timestamps repeat."""
+    if type(ts) is not str:
+        return None
+    epoch = parse_timestamp(ts)
+    return None if epoch is None else int(epoch)
+
+
+def iter_lines_reverse(path, block_size=READ_BLOCK_SIZE, end=None, sources=False):
+    """Yield the lines of a file from last to first.
+
+    Reads fixed-size blocks backwards from EOF (or from byte offset `end`), so
+    only one block plus the current partial line is held in memory at a time.
+    With `sources`, yields (line, (path, byte offset, byte length)) pairs.
+    """
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END) if end is None else end
+        remainder = b""
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + remainder
+            lines = data.split(b"\n")
+            remainder = lines.pop(0)
+            line_end = pos + len(data)
+            for raw in reversed(lines):
+                line = raw.decode("utf-8", errors="replace")
+                line_start = line_end - len(raw)
+                yield (line, (path, line_start, len(raw))) if sources else line
+                line_end = line_start - 1
+        line = remainder.decode("utf-8", errors="replace")
+        yield (line, (path, 0, len(remainder))) if sources else line
+
+
+def fill_window(window, lines, parse_line, max_entries, since, ts_field, sources=False):
+    """Append entries from newest-first `lines` to `window`. True once the window is complete.
+
+    With `sources`, `lines` holds (line, source) pairs and entries may defer
+    their large fields to the source line (see CompactEntry.defer).
+    """
+    source = None
+    for line in lines:
+        if sources:
+            line, source = line
+        line = line.strip()
+        if not line:
+            continue
+        entry = parse_line(line)
+        if entry is None:
+            continue
+        if source is not None and isinstance(entry, CompactEntry):
+            entry.defer(source)
+        if since is not None:
+            epoch = entry.epoch if isinstance(entry, CompactEntry) else parse_timestamp(entry.get(ts_field, ""))
+            if epoch is not None and epoch < since:
+                return True
+        window.append(entry)
+        if len(window) >= max_entries:
+            return True
+    return False
+
+
+def iter_log_window(path, parse_line, max_entries, since=None, ts_field="ts", label="log", end=None):
+    """Yield the newest entries of a log in chronological order.
+
+    Walks the file backwards from EOF and stops as soon as `max_entries` entries
+    are collected or an entry older than `since` (epoch seconds) is reached, so
+    the cost is proportional to the window rather than to the file size.
+
+    If the live file runs out first, the segments rotated out of it (see
+    log-archive.py) continue the stream newest first. A segment is decompressed
+    only when the window reaches it, and one whose last entry is older than
+    `since` ends the scan unread.
+
+    An event store directory (see event-store.py) is read through mmap instead;
+    its events are already parsed and carry their epoch, so `parse_line` and
+    `ts_field` are not needed there.
+
+    Args:
+        path: Log file path or event store directory
+        parse_line: Callable turning a stripped line into an entry dict (or None)
+        max_entries: Maximum number of entries in the window
+        since: Optional epoch cutoff; older entries end the scan
+        ts_field: Entry key holding the timestamp used for the `since` check
+        label: Log name used in error messages
+        end: Optional byte offset to treat as EOF of the live file
+    """
+    if end is None and event_store.is_store(path):
+        try:
+            yield from compact_entries(parse_line, event_store.iter_window(path, max_entries, since))
+        except (OSError, ValueError, struct.error) as e:
+            sys.stderr.write(f"Error reading {label}: {e}\n")
+        return
+    if not path or max_entries <= 0:
+        return
+    window = []
+    try:
+        done = os.path.isfile(path) and fill_window(
+            window, iter_lines_reverse(path, end=end, sources=True), parse_line, max_entries, since, ts_field,
+            sources=True)
+        for segment in reversed(log_archive.log_segments(path) if not done else []):
+            last_ts = segment.get("lastTs")
+            if since is not None and last_ts is not None and last_ts < since:
+                break
+            lines = log_archive.read_segment(path, segment).decode("utf-8", errors="replace").split("\n")
+            if fill_window(window, reversed(lines), parse_line, max_entries, since, ts_field):
+                break
+    except (IOError, EOFError, ValueError) as e:
+        sys.stderr.write(f"Error reading {label}: {e}\n")
+    yield from reversed(window)
+
+
+# --- Compact Entries ---
+
+MISSING = object()
+
+
+def intern_str(value):
+    """sys.intern() for strings that repeat across entries (types, names, file paths)."""
+    return sys.intern(value) if type(value) is str else value
+
+
+class CompactEntry(abc.ABC):
+    """Base of the __slots__ log entries; reads like the dict it replaces.
+
+    Supports entry[key], get(), `in`, items() and == against plain dicts, so
+    detectors, the event store writer and log-archive.py need no changes.
+    `epoch` (whole epoch seconds of the timestamp, or None) is parsed once at
+    construction and is not part of the dict view. Subclasses implement
+    get() and to_dict() over their slots.
+    """
+
+    __slots__ = ()
+
+    @abc.abstractmethod
+    def get(self, key, default=None):
+        """Value of dict key `key`, or `default` when the entry has no such key."""
+
+    @abc.abstractmethod
+    def to_dict(self):
+        """The entry as the plain dict it replaces."""
+
+    def defer(self, source):
+        """Drop fields that can be read back from `source` (path, offset, length)."""
+
+    def __getitem__(self, key):
+        value = self.get(key, MISSING)
+        if value is MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, MISSING) is not MISSING
+
+    def items(self):
+        return self.to_dict().items()
+
+    def __eq__(self, other):
+        if isinstance(other, CompactEntry):
+            other = other.to_dict()
+        return self.to_dict() == other if isinstance(other, dict) else NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class ActivityEntry(CompactEntry):
+    """activity.jsonl / activity.log entry with interned type/phase/name."""
+
+    __slots__ = ("ts", "type", "phase", "name", "detail", "epoch")
+    FIELDS = ("ts", "type", "phase", "name", "detail")
+
+    def __init__(self, ts, type, phase, name, detail):
+        self.ts = ts
+        self.epoch = epoch_seconds(ts)
+        self.type = intern_str(type)
+        self.phase = intern_str(phase)
+        self.name = intern_str(name)
+        self.detail = detail
+
+    @classmethod
+    def from_dict(cls, entry):
+        return cls(entry.get("ts", ""), entry.get("type", ""), entry.get("phase", "-"),
+                   entry.get("name", ""), entry.get("detail", ""))
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in ActivityEntry.FIELDS else default
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in ActivityEntry.FIELDS}
+
+
+class TestEntry(CompactEntry):
+    """test-runs / tdd-guard entry. `status` (RED/GREEN/"") only for structured records."""
+
+    __slots__ = ("ts", "message", "status", "epoch")
+
+    def __init__(self, ts, message, status=None):
+        self.ts = ts
+        self.epoch = epoch_seconds(ts)
+        self.message = message
+        self.status = status
+
+    def get(self, key, default=None):
+        if key == "ts" or key == "message" or key == "status" and self.status is not None:
+            return getattr(self, key)
+        return default
+
+    def to_dict(self):
+        entry = {"ts": self.ts, "message": self.message}
+        if self.status is not None:
+            entry["status"] = self.status
+        return entry
+
+
+class ChangeEntry(CompactEntry):
+    """changes.jsonl entry: interned tool/file/language, the rest kept apart.
+
+    The rest (old_string/new_string/content_sample, ...) is a dict, or, once
+    deferred, the (path, offset, length) of the source line; it is then read
+    back on every access and never cached, so only the code examples that
+    are actually formatted (or indexed, one at a time) are in memory.
+    """
+
+    __slots__ = ("timestamp", "tool", "file", "language", "_rest", "epoch")
+    CORE = ("timestamp", "tool", "file", "language")
+
+    def __init__(self, entry):
+        self.epoch = epoch_seconds(entry.get("timestamp"))
+        rest = dict(entry)
+        for field in ChangeEntry.CORE:
+            value = rest.get(field)
+            if type(value) is str:
+                del rest[field]
+                setattr(self, field, value if field == "timestamp" else sys.intern(value))
+            else:
+                setattr(self, field, None)
+        self._rest = rest
+
+    @classmethod
+    def from_dict(cls, entry):
+        return cls(entry)
+
+    def defer(self, source):
+        if self._rest:
+            self._rest = source
+
+    def rest(self):
+        """The non-core fields (read back from the source line if deferred)."""
+        if isinstance(self._rest, dict):
+            return self._rest
+        path, offset, length = self._rest
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                entry = json.loads(f.read(length).decode("utf-8", errors="replace"))
+        except (IOError, ValueError):
+            return {}
+        # rotate 등으로 파일이 바뀌었으면 다른 줄을 읽게 됨
+        if not isinstance(entry, dict) or any(entry.get(f) != getattr(self, f) for f in ("timestamp", "file")):
+            return {}
+        for field in ChangeEntry.CORE:
+            if getattr(self, field) is not None:
+                entry.pop(field, None)
+        return entry
+
+    def get(self, key, default=None):
+        if key in ChangeEntry.CORE:
+            value = getattr(self, key)
+            return default if value is None else value
+        return self.rest().get(key, default)
+
+    def to_dict(self):
+        entry = {field: getattr(self, field) for field in ChangeEntry.CORE if getattr(self, field) is not None}
+        entry.update(self.rest())
+        return entry
+
+
+def change_bodies(change):
+    """The old_string/new_string/content_sample fields of a change with at most one read."""
+    return change.rest() if isinstance(change, ChangeEntry) else change
+
+
+def compact_entries(parse_line, entries):
+    """Event store dicts → the compact entries parse_line would have produced."""
+    compact = COMPACT_TYPES.get(parse_line)
+    return entries if compact is None else (compact(entry) for entry in entries)
+
+
+def parse_activity_line(line):
+    """Parse one activity line (JSONL or legacy text) into an entry dict, or None."""
+    # JSONL 형식 시도
+    try:
+        entry = json.loads(line)
+        # 필수 필드 확인
+        if isinstance(entry, dict) and "ts" in entry and "type" in entry:
+            return ActivityEntry.from_dict(entry)
+    except json.JSONDecodeError:
+        pass
+
+    # 레거시 텍스트 형식 fallback
+    m = ACTIVITY_RE.match(line)
+    if m:
+        return ActivityEntry(m.group(1), m.group(2), m.group(3), m.group(4).strip(), (m.group(5) or "").strip())
+    return None
+
+
+def parse_test_record(record):
+    """Entry for a test-runs.jsonl record (test-output-parser.py).
+
+    The message summarizes the run like a text log line, so trigger matching
+    sees "failed" and the error codes only for failing runs.
+    """
+    status = record.get("status", "")
+    parts = [f"{record[key]} {key}" for key in ("failed", "passed", "skipped") if record.get(key)]
+    message = f"{record.get('framework') or 'test'} {status or 'run'}: {', '.join(parts) or 'no results'}"
+    if status == "RED":
+        details = record.get("failures", [])[:3] + record.get("errorCodes", [])
+        if details:
+            message += " — " + ", ".join(details)
+    return TestEntry(record.get("ts", ""), message, status)
+
+
+def parse_test_line(line):
+    """Parse one test-runs.jsonl record or test-runs.log / tdd-guard.log line into an entry dict, or None."""
+    if line.startswith("{"):
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            return None
+        return parse_test_record(record) if isinstance(record, dict) and "ts" in record else None
+    m = TEST_RE.match(line)
+    if m:
+        return TestEntry(m.group(1), m.group(2).strip())
+    return None
+
+
+def parse_changes_line(line):
+    """Parse one changes.jsonl line into a ChangeEntry, or None if it is not a JSON object."""
+    try:
+        entry = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    return ChangeEntry(entry) if isinstance(entry, dict) else None
+
+
+COMPACT_TYPES = {parse_activity_line: ActivityEntry.from_dict, parse_changes_line: ChangeEntry.from_dict}
+
+
+def log_exists(path):
+    """True if `path` is a log file, has archived segments, or is an event store directory."""
+    return bool(path) and (
+        os.path.isfile(path) or event_store.is_store(path) or bool(log_archive.log_segments(path)))
+
+
+def resolve_legacy_log(path):
+    """`path`, or its legacy text log (activity.log, test-runs.log) when only that one exists.
+
+    The structured *.jsonl logs are the source of truth; projects that predate
+    them still have their history in the text log, which is read instead.
+    """
+    if path and path.endswith(".jsonl") and not log_exists(path):
+        legacy = path[:-len(".jsonl")] + ".log"
+        if log_exists(legacy):
+            return legacy
+    return path
+
+
+def iter_activity_log(path, max_lines=DEFAULT_WINDOW_ENTRIES, since=None):
+    """Stream the newest activity entries (oldest first) from activity.jsonl or activity.log."""
+    return iter_log_window(path, parse_activity_line, max_lines, since, label="activity log")
+
+
+def parse_activity_log(path, max_lines=DEFAULT_WINDOW_ENTRIES, since=None):
     """Parse activity.jsonl (or legacy activity.log) into structured entries.
 
     Supports both:
     - JSONL format: {"ts":"...", "type":"...", "phase":"...", "name":"...", "detail":"..."}
     - Legacy text format: [timestamp] TYPE | PHASE | NAME | DETAIL
 
+    Only the newest window is read (tail-first), so large logs stay cheap.
+
     Args:
         path: Path to activity.jsonl or activity.log
-        max_lines: Maximum lines to parse (prevents memory issues)
+        max_lines: Maximum entries in the window (newest kept)
+        since: Optional epoch cutoff; older entries are ignored
     """
-    entries = []
-    if not path or not os.path.isfile(path):
-        return entries
-    if not check_log_size(path):
-        return entries
-    try:
-        with open(path, "r", encoding="utf-8", errors="replace") as f:
-            for i, line in enumerate(f):
-                if i >= max_lines:
-                    break
-                line = line.strip()
-                if not line:
-                    continue
-
-                # JSONL 형식 시도
-                try:
-                    entry = json.loads(line)
-                    # 필수 필드 확인
-                    if "ts" in entry and "type" in entry:
-                        entries.append({
-                            "ts": entry.get("ts", ""),
-                            "type": entry.get("type", ""),
-                            "phase": entry.get("phase", "-"),
-                            "name": entry.get("name", ""),
-                            "detail": entry.get("detail", ""),
-                        })
-                        continue
-                except json.JSONDecodeError:
-                    pass
-
-                # 레거시 텍스트 형식 fallback
-                m = ACTIVITY_RE.match(line)
-                if m:
-                    entries.append({
-                        "ts": m.group(1),
-                        "type": m.group(2),
-                        "phase": m.group(3),
-                        "name": m.group(4).strip(),
-                        "detail": (m.group(5) or "").strip(),
-                    })
-    except IOError as e:
-        sys.stderr.write(f"Error reading activity log: {e}\n")
-    return entries
+    return list(iter_activity_log(path, max_lines, since))
 
 
-def parse_test_log(path, max_lines=5000):
-    """Parse test-runs.log into entries."""
-    entries = []
-    if not path or not os.path.isfile(path):
-        return entries
-    if not check_log_size(path):
-        return entries
-    try:
-        with open(path, "r", encoding="utf-8", errors="replace") as f:
-            for i, line in enumerate(f):
-                if i >= max_lines:
-                    break
-                line = line.rstrip("\n")
-                m = TEST_RE.match(line)
-                if m:
-                    entries.append({
-                        "ts": m.group(1),
-                        "message": m.group(2).strip(),
-                    })
-    except IOError as e:
-        sys.stderr.write(f"Error reading test log: {e}\n")
-    return entries
+def parse_test_log(path, max_lines=DEFAULT_WINDOW_ENTRIES, since=None):
+    """Parse the newest window of test-runs.jsonl (or legacy test-runs.log) into entries."""
+    return list(iter_log_window(path, parse_test_line, max_lines, since, label="test log"))
 
 
-def parse_tdd_guard_log(path):
+def parse_tdd_guard_log(path, max_lines=DEFAULT_WINDOW_ENTRIES, since=None):
     """Parse tdd-guard.log into entries (same format as test log)."""
-    return parse_test_log(path)
+    return parse_test_log(path, max_lines, since)
 
 
-def parse_changes_log(path, max_entries=1000):
-    """Parse changes.jsonl into entries.
+def parse_changes_log(path, max_entries=DEFAULT_MAX_CHANGES, since=None):
+    """Parse the newest window of changes.jsonl into entries.
 
     Each entry contains:
     - timestamp: ISO timestamp
@@ -152,27 +534,10 @@ def parse_changes_log(path, max_entries=1000):
     - language: inferred language
     - old_string/new_string (Edit) or content_sample (Write)
     """
-    entries = []
-    if not path or not os.path.isfile(path):
-        return entries
-    if not check_log_size(path):
-        return entries
-    try:
-        with open(path, "r", encoding="utf-8", errors="replace") as f:
-            for i, line in enumerate(f):
-                if i >= max_entries:
-                    break
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    entry = json.loads(line)
-                    entries.append(entry)
-                except json.JSONDecodeError:
-                    continue
-    except IOError as e:
-        sys.stderr.write(f"Error reading changes log: {e}\n")
-    return entries
+    return list(iter_log_window(
+        path, parse_changes_line, max_entries, since,
+        ts_field="timestamp", label="changes log",
+    ))
 
 
 def get_changes_for_file(changes, file_path):
@@ -184,13 +549,75 @@ def get_changes_by_pattern(changes, pattern_re):
     """Get changes where old_string or new_string matches pattern."""
     matched = []
     for c in changes:
-        old = c.get("old_string", "")
-        new = c.get("new_string", "")
+        bodies = change_bodies(c)
+        old = bodies.get("old_string", "")
+        new = bodies.get("new_string", "")
         if pattern_re.search(old) or pattern_re.search(new):
             matched.append(c)
     return matched
 
 
+# re.IGNORECASE에서 ASCII 문자와 같게 취급되는 문자를 그 ASCII 소문자로 (길이 보존)
+CASE_FOLD_TABLE = str.maketrans({
+    **{c: c.lower() for c in "ABCDEFGHIJKLMNOPQRSTUVWXYZ"},
+    "\u0130": "i", "\u0131": "i", "\u017f": "s", "\u212a": "k",
+})
+ASCII_WORD_RE = re.compile(r"[a-z0-9_]+")
+TS_CODE_RE = re.compile(r"(?=(ts[0-9]{4}))")
+MAX_INDEXED_CODE_LEN = 64
+
+
+def error_code_keys(text):
+    """Lowercase error codes (TS\\d{4} / [A-Z]\\w*Error) that occur in text as a case-insensitive substring.
+
+    Every code is ASCII \\w, so an occurrence lies inside a run of ASCII word
+    characters of the case-folded text: TS codes are collected with an
+    overlapping scan and *Error codes as every letter-initial substring of a
+    run that ends in "error" (up to MAX_INDEXED_CODE_LEN characters).
+    """
+    folded = text.translate(CASE_FOLD_TABLE)
+    keys = {m.group(1) for m in TS_CODE_RE.finditer(folded)}
+    if "error" in folded:
+        for run in ASCII_WORD_RE.finditer(folded):
+            word = run.group()
+            end = word.find("error") + 5
+            while end >= 5:
+                for start in range(max(0, end - MAX_INDEXED_CODE_LEN), end - 5):
+                    if word[start].isalpha():
+                        keys.add(word[start:end])
+                end = word.find("error", end - 4) + 5
+    return keys
+
+
+def index_changes(changes):
+    """Index changes in one pass: {"codes": {code: [pos]}, "files": {file: [pos]}}.
+
+    Positions are ascending, so lookups return changes in log order exactly
+    like get_changes_by_pattern()/get_changes_for_file().
+    """
+    codes = {}
+    files = {}
+    for pos, c in enumerate(changes):
+        files.setdefault(c.get("file"), []).append(pos)
+        # 지연된 본문은 한 번에 하나씩만 읽힘
+        bodies = change_bodies(c)
+        for key in error_code_keys(bodies.get("old_string", "")) | error_code_keys(bodies.get("new_string", "")):
+            codes.setdefault(key, []).append(pos)
+    return {"codes": codes, "files": files}
+
+
+def get_changes_for_code(changes, change_index, code):
+    """Changes whose old_string or new_string contains code (case-insensitive)."""
+    if not code.isascii() or len(code) > MAX_INDEXED_CODE_LEN or not ERROR_CODE_RE.fullmatch(code):
+        return get_changes_by_pattern(changes, re.compile(re.escape(code), re.IGNORECASE))
+    return [changes[pos] for pos in change_index["codes"].get(code.lower(), ())]
+
+
+def get_indexed_changes_for_file(changes, change_index, file_path):
+    """Indexed get_changes_for_file()."""
+    return [changes[pos] for pos in change_index["files"].get(file_path, ())]
+
+
 def format_code_example(changes, max_examples=2):
     """Format changes into Before/After code example.
 
@@ -203,17 +630,18 @@ def format_code_example(changes, max_examples=2):
     for change in changes[:max_examples]:
         file_path = change.get("file", "unknown")
         language = change.get("language", "text")
+        bodies = change_bodies(change)
 
         if change.get("tool") == "Edit":
-            old = change.get("old_string", "").strip()
-            new = change.get("new_string", "").strip()
+            old = bodies.get("old_string", "").strip()
+            new = bodies.get("new_string", "").strip()
             if old and new:
                 example = f"### File: `{file_path}`\n\n"
                 example += f"**Before:**\n```{language}\n{old}\n```\n\n"
                 example += f"**After:**\n```{language}\n{new}\n```"
                 examples.append(example)
         elif change.get("tool") == "Write":
-            content = change.get("content_sample", "").strip()
+            content = bodies.get("content_sample", "").strip()
             if content:
                 example = f"### File: `{file_path}` (created)\n\n"
                 example += f"```{language}\n{content}\n```"
@@ -224,11 +652,66 @@ def format_code_example(changes, max_examples=2):
 
 # --- Config & Existing Patterns ---
 
+NO_HITS = frozenset()
+# 다른 그룹을 번호/이름으로 참조하는 패턴은 하나의 정규식으로 합칠 수 없음
+GROUP_REFERENCE_RE = re.compile(r"\\[1-9]|\(\?P=|\\g<")
+
+
+class TriggerMatcher:
+    """Config triggers matched together with one alternation regex.
+
+    match() returns the names of the triggers found in a text. Texts without
+    any trigger (most log entries) cost one scan. A combined match hides
+    alternatives that overlap it, so once one trigger is found the others
+    are confirmed with their own regex; the result always equals searching
+    every trigger separately. Patterns that cannot be combined (group
+    references, conflicting group names) fall back to separate searches.
+    """
+
+    def __init__(self, patterns=None, candidates=None, windows=None):
+        self.patterns = patterns or {}
+        self.candidates = candidates or {}
+        # detector 시간 창 (초, 0 = 제한 없음): {"recurrence": ..., "tddCycle": ...}
+        self.windows = windows or {}
+        self.names = list(self.patterns)
+        self.combined = None
+        if self.patterns and not any(GROUP_REFERENCE_RE.search(p.pattern) for p in self.patterns.values()):
+            try:
+                self.combined = re.compile(
+                    "|".join(f"(?P<t{i}>{p.pattern})" for i, p in enumerate(self.patterns.values())),
+                    re.IGNORECASE,
+                )
+            except re.error:
+                pass
+
+    def match(self, text):
+        if not self.patterns:
+            return NO_HITS
+        if self.combined is None:
+            return frozenset(name for name, regex in self.patterns.items() if regex.search(text))
+        found = set()
+        for m in self.combined.finditer(text):
+            found.add(self.names[int(m.lastgroup[1:])])
+            if len(found) == len(self.names):
+                return frozenset(found)
+        if not found:
+            return NO_HITS
+        for name in self.names:
+            if name not in found and self.patterns[name].search(text):
+                found.add(name)
+        return frozenset(found)
+
+
+WINDOW_RULES = {"recurrence": "recurrenceWindowMinutes", "tddCycle": "tddCycleMinutes"}
+
+
 def load_triggers(config_path):
-    """Load trigger patterns from config.json and compile regexes."""
-    triggers = {}
+    """Load trigger patterns (their optional `candidate` detectors and the detector time windows) from config.json."""
+    patterns = {}
+    candidates = {}
+    windows = {}
     if not config_path or not os.path.isfile(config_path):
-        return triggers
+        return TriggerMatcher()
     try:
         with open(config_path, "r", encoding="utf-8") as f:
             config = json.load(f)
@@ -236,108 +719,352 @@ def load_triggers(config_path):
         for key, val in raw.items():
             if val.get("enabled", True) and val.get("pattern"):
                 try:
-                    triggers[key] = re.compile(val["pattern"], re.IGNORECASE)
+                    patterns[key] = re.compile(val["pattern"], re.IGNORECASE)
                 except re.error:
-                    pass
-    except (json.JSONDecodeError, IOError):
+                    continue
+                candidate = val.get("candidate")
+                if isinstance(candidate, dict) and candidate.get("category") and candidate.get("title"):
+                    candidates[key] = candidate
+        rules = config.get("extractionRules", {})
+        for name, key in WINDOW_RULES.items():
+            minutes = rules.get(key, 0)
+            if isinstance(minutes, (int, float)) and minutes > 0:
+                windows[name] = int(minutes * 60)
+    except (json.JSONDecodeError, IOError, AttributeError):
         pass
-    return triggers
+    return TriggerMatcher(patterns, candidates, windows)
+
+
+def read_pattern_sections(fpath):
+    """Parse a pattern file into {"Title": ..., "<## Section>": body text}."""
+    sections = {}
+    current = None
+    with open(fpath, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.startswith("# Pattern:"):
+                sections["Title"] = line[len("# Pattern:"):].strip()
+            elif line.startswith("## "):
+                current = line[3:].strip()
+                sections[current] = []
+            elif current:
+                sections[current].append(line)
+    return {k: v if isinstance(v, str) else "\n".join(v).strip() for k, v in sections.items()}
+
+
+def parse_keywords(line):
+    return {k.strip().lower() for k in line.split(",") if k.strip()}
+
 
+def pattern_text(title, problem, solution):
+    """Text a pattern's MinHash shingles are taken from."""
+    return "\n".join(part for part in (title, problem, solution) if part)
 
-def load_existing_patterns(patterns_dir):
-    """Load existing pattern files and extract keywords sets.
-    Returns list of {"path": str, "keywords": set}.
+
+# --- Near-Duplicate Detection (MinHash/LSH) ---
+
+MINHASH_PRIME = (1 << 61) - 1
+_minhash_rng = random.Random(MINHASH_SEED)
+MINHASH_PARAMS = [
+    (_minhash_rng.randrange(1, MINHASH_PRIME), _minhash_rng.randrange(0, MINHASH_PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+WORD_RE = re.compile(r"\w+")
+DIGITS_RE = re.compile(r"\d+")
+
+
+def pattern_features(keywords, text):
+    """Feature set of a pattern: its keywords plus word shingles of its text.
+
+    Numbers are normalized so "occurred 3 times" and "occurred 5 times" shingle alike.
     """
-    patterns = []
+    features = {f"kw:{k.lower()}" for k in keywords}
+    words = [DIGITS_RE.sub("0", w) for w in WORD_RE.findall(text.lower())]
+    if len(words) < SHINGLE_SIZE:
+        features.update(f"w:{w}" for w in words)
+    for i in range(len(words) - SHINGLE_SIZE + 1):
+        features.add("sh:" + " ".join(words[i:i + SHINGLE_SIZE]))
+    return features
+
+
+def minhash_signature(features):
+    """Return the MinHash signature (MINHASH_PERMUTATIONS ints) of a feature set, [] if empty."""
+    if not features:
+        return []
+    hashes = [
+        int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "big")
+        for f in features
+    ]
+    return [min((a * h + b) % MINHASH_PRIME for h in hashes) for a, b in MINHASH_PARAMS]
+
+
+def estimate_similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def lsh_band_keys(signature, bands):
+    """Bucket keys of a signature split into `bands` bands of equal rows."""
+    if not signature:
+        return []
+    rows = len(signature) // bands
+    return [
+        f"{band}:" + hashlib.blake2b(
+            repr(signature[band * rows:(band + 1) * rows]).encode("ascii"), digest_size=8
+        ).hexdigest()
+        for band in range(bands)
+    ]
+
+
+# --- Pattern Index ---
+
+def new_pattern_index(patterns_dir, bands=DEFAULT_LSH_BANDS):
+    """Return an empty pattern index for patterns_dir."""
+    return {
+        "dir": patterns_dir, "dirMtime": None, "bands": bands,
+        "patterns": {}, "keywords": {}, "buckets": {}, "dirty": False,
+    }
+
+
+def pattern_index_path(patterns_dir):
+    return os.path.join(patterns_dir, PATTERN_INDEX_FILE)
+
+
+def index_pattern_entry(index, fname, entry):
+    """Add a pattern entry to the keyword postings and LSH buckets."""
+    index["patterns"][fname] = entry
+    for kw in entry["keywords"]:
+        index["keywords"].setdefault(kw, []).append(fname)
+    for key in lsh_band_keys(entry.get("minhash", []), index["bands"]):
+        index["buckets"].setdefault(key, []).append(fname)
+
+
+def unindex_pattern_entry(index, fname):
+    """Remove a pattern entry from the keyword postings and LSH buckets."""
+    entry = index["patterns"].pop(fname, None)
+    if not entry:
+        return
+    for postings, keys in (
+        (index["keywords"], entry["keywords"]),
+        (index["buckets"], lsh_band_keys(entry.get("minhash", []), index["bands"])),
+    ):
+        for key in keys:
+            posting = postings.get(key, [])
+            if fname in posting:
+                posting.remove(fname)
+            if not posting:
+                postings.pop(key, None)
+
+
+def rebuild_postings(index):
+    """Recompute keyword postings and LSH buckets from index["patterns"]."""
+    patterns = index["patterns"]
+    index["patterns"], index["keywords"], index["buckets"] = {}, {}, {}
+    for fname in sorted(patterns):
+        index_pattern_entry(index, fname, patterns[fname])
+
+
+def read_pattern_entry(fpath):
+    """Read one pattern file into an index entry (mtime, keywords, MinHash signature)."""
+    mtime = os.stat(fpath).st_mtime_ns
+    sections = read_pattern_sections(fpath)
+    keywords_line = sections.get("Trigger Keywords", "").split("\n", 1)[0]
+    keywords = parse_keywords(keywords_line)
+    text = pattern_text(sections.get("Title", ""), sections.get("Problem", ""), sections.get("Solution", ""))
+    return {
+        "mtime": mtime,
+        "keywords": sorted(keywords),
+        "minhash": minhash_signature(pattern_features(keywords, text)),
+    }
+
+
+def load_pattern_index(patterns_dir, bands=DEFAULT_LSH_BANDS, rebuild=False):
+    """Load the persistent pattern index of patterns_dir, refreshing it if the directory changed.
+
+    When the directory mtime still matches the saved one the index is used as-is.
+    Otherwise the .md files are stat'ed and only new or modified ones are re-read.
+    rebuild=True ignores the saved index and re-reads every file.
+    Returns {"dir", "dirMtime", "bands", "patterns": {file: {"mtime", "keywords", "minhash"}},
+    "keywords": {keyword: [file, ...]}, "buckets": {band key: [file, ...]}, "dirty"}.
+    """
+    index = new_pattern_index(patterns_dir, bands)
     if not patterns_dir or not os.path.isdir(patterns_dir):
-        return patterns
+        return index
+
+    if not rebuild:
+        try:
+            with open(pattern_index_path(patterns_dir), "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("version") == PATTERN_INDEX_VERSION:
+                index["dirMtime"] = saved.get("dirMtime")
+                index["patterns"] = saved.get("patterns", {})
+                index["keywords"] = saved.get("keywords", {})
+                index["buckets"] = saved.get("buckets", {})
+                if saved.get("bands") != bands:
+                    # 밴드 설정 변경: 시그니처는 재사용하고 버킷만 재구성
+                    rebuild_postings(index)
+                    index["dirty"] = True
+        except (IOError, json.JSONDecodeError, AttributeError):
+            pass
+
     try:
-        for fname in os.listdir(patterns_dir):
-            if not fname.endswith(".md"):
-                continue
-            fpath = os.path.join(patterns_dir, fname)
-            keywords = set()
-            try:
-                with open(fpath, "r", encoding="utf-8") as f:
-                    in_keywords = False
-                    for line in f:
-                        line = line.strip()
-                        if line == "## Trigger Keywords":
-                            in_keywords = True
-                            continue
-                        if in_keywords:
-                            if line.startswith("##"):
-                                break
-                            if line:
-                                keywords = {k.strip().lower() for k in line.split(",") if k.strip()}
-                            break
-            except IOError:
-                continue
-            patterns.append({"path": fpath, "keywords": keywords})
+        dir_mtime = os.stat(patterns_dir).st_mtime_ns
     except OSError:
-        pass
-    return patterns
+        return index
+    if index["dirMtime"] == dir_mtime:
+        return index
+
+    # 디렉토리가 변경됨: mtime이 바뀐 파일만 다시 읽는다
+    old_patterns = index["patterns"]
+    patterns = {}
+    try:
+        fnames = os.listdir(patterns_dir)
+    except OSError:
+        fnames = []
+    for fname in fnames:
+        if not fname.endswith(".md"):
+            continue
+        fpath = os.path.join(patterns_dir, fname)
+        try:
+            old = old_patterns.get(fname)
+            if old and old.get("mtime") == os.stat(fpath).st_mtime_ns:
+                patterns[fname] = old
+            else:
+                patterns[fname] = read_pattern_entry(fpath)
+        except (IOError, OSError):
+            continue
+    index["patterns"] = patterns
+    index["dirMtime"] = dir_mtime
+    index["dirty"] = True
+    rebuild_postings(index)
+    return index
 
 
-def find_duplicate(keywords, existing_patterns):
-    """Return path of existing pattern if Jaccard similarity >= 0.5, else None."""
-    if not keywords:
+def save_pattern_index(index):
+    """Persist the keyword index next to the pattern files if it changed.
+
+    The file is rewritten in place (no rename) so saving it does not change the
+    directory mtime that the index is validated against.
+    """
+    patterns_dir = index["dir"]
+    if not index["dirty"] or not patterns_dir or not os.path.isdir(patterns_dir):
+        return
+    path = pattern_index_path(patterns_dir)
+    try:
+        if not os.path.exists(path):
+            # 최초 생성은 디렉토리 mtime을 바꾸므로 다음 실행에서 한 번 더 검증된다
+            index["dirMtime"] = None
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": PATTERN_INDEX_VERSION,
+                "dirMtime": index["dirMtime"],
+                "bands": index["bands"],
+                "patterns": index["patterns"],
+                "keywords": index["keywords"],
+                "buckets": index["buckets"],
+            }, f, ensure_ascii=False, separators=(",", ":"))
+        index["dirty"] = False
+    except (IOError, OSError) as e:
+        sys.stderr.write(f"Error saving pattern index: {e}\n")
+
+
+def dir_mtime_ns(path):
+    """Return the mtime (ns) of a directory, or None if it cannot be stat'ed."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
         return None
+
+
+def find_duplicate(keywords, index, text="", threshold=DEFAULT_DEDUP_THRESHOLD):
+    """Return path of the most similar indexed pattern if similarity >= threshold, else None.
+
+    Candidates come from two sub-linear lookups:
+    - keyword postings with prefix filtering: a pattern whose keyword Jaccard
+      reaches the threshold must share one of the rarest len(kw) - ceil(t * len(kw)) + 1
+      keywords, so only those postings are read;
+    - LSH buckets of the MinHash signature over keywords + text shingles, which
+      catches near-duplicates whose keywords differ slightly (e.g. file names).
+    Each candidate scores max(keyword Jaccard, estimated MinHash similarity).
+    """
     kw_set = {k.lower() for k in keywords}
-    for pat in existing_patterns:
-        if not pat["keywords"]:
-            continue
-        intersection = kw_set & pat["keywords"]
-        union = kw_set | pat["keywords"]
-        if union and len(intersection) / len(union) >= 0.5:
-            return pat["path"]
-    return None
+    if not kw_set and not text:
+        return None
+
+    candidates = set()
+    if kw_set:
+        min_overlap = max(1, math.ceil(threshold * len(kw_set) - 1e-9))
+        rarest = sorted(kw_set, key=lambda k: (len(index["keywords"].get(k, ())), k))
+        for kw in rarest[:len(kw_set) - min_overlap + 1]:
+            candidates.update(index["keywords"].get(kw, ()))
+    signature = minhash_signature(pattern_features(kw_set, text))
+    for key in lsh_band_keys(signature, index["bands"]):
+        candidates.update(index["buckets"].get(key, ()))
+
+    best, best_score = None, threshold
+    for fname in sorted(candidates):
+        entry = index["patterns"][fname]
+        pat_keywords = set(entry["keywords"])
+        score = estimate_similarity(signature, entry.get("minhash", []))
+        if kw_set and pat_keywords:
+            score = max(score, len(kw_set & pat_keywords) / len(kw_set | pat_keywords))
+        if score >= best_score and (best is None or score > best_score):
+            best, best_score = fname, score
+    return os.path.join(index["dir"], best) if best else None
+
+
+# --- Time Windows ---
+# 이벤트 시각(epoch 초)의 정렬 리스트: 최근 TIMELINE_CAP개만 유지하고 bisect로 구간 집계
+
+def entry_epoch(entry):
+    """Epoch seconds of a log entry (parsed once for compact entries), or None."""
+    if isinstance(entry, CompactEntry):
+        return entry.epoch
+    return epoch_seconds(entry.get("ts") or entry.get("timestamp"))
+
+
+def insert_time(times, epoch, cap=TIMELINE_CAP):
+    """Insert into the sorted list `times`, dropping the oldest beyond `cap`."""
+    bisect.insort(times, epoch)
+    if len(times) > cap:
+        del times[:len(times) - cap]
+
+
+def count_between(times, start, end):
+    """Number of times in [start, end]."""
+    return bisect.bisect_right(times, end) - bisect.bisect_left(times, start)
+
+
+def max_in_window(times, seconds):
+    """Most times falling within any `seconds`-long window (two pointers over the sorted list)."""
+    best = 0
+    first = 0
+    for last, epoch in enumerate(times):
+        while epoch - times[first] > seconds:
+            first += 1
+        best = max(best, last - first + 1)
+    return best
 
 
 # --- Pattern Detection ---
 
 ERROR_CODE_RE = re.compile(r"(TS\d{4}|[A-Z]\w*Error)")
 FILE_PATH_RE = re.compile(r"(?:^|[\s\"'])([./\w-]+\.[a-zA-Z]{1,5})(?:[\s\"':,]|$)")
+FAIL_RE = re.compile(r"FAIL|failed|failure", re.IGNORECASE)
+VIOLATION_RE = re.compile(r"violation|blocked|rejected", re.IGNORECASE)
 
 
-def detect_errors(entries, test_entries, triggers, changes=None):
-    """Detect recurring error codes from activity log and test log.
-
-    Args:
-        entries: Activity log entries
-        test_entries: Test log entries
-        triggers: Compiled trigger patterns
-        changes: Parsed changes.jsonl entries (optional)
-    """
+def build_error_patterns(code_counter, code_context, changes, change_index=None):
+    """Build error_resolution patterns for codes appearing 2+ times."""
     patterns = []
-    changes = changes or []
-    error_trigger = triggers.get("errorResolved")
-
-    error_lines = []
-    for e in entries:
-        text = f"{e['name']} {e['detail']}"
-        if error_trigger and error_trigger.search(text):
-            error_lines.append(text)
-    for te in test_entries:
-        if error_trigger and error_trigger.search(te["message"]):
-            error_lines.append(te["message"])
-
-    # Count error codes
-    code_counter = Counter()
-    code_context = {}
-    for line in error_lines:
-        codes = ERROR_CODE_RE.findall(line)
-        for code in codes:
-            code_counter[code] += 1
-            if code not in code_context:
-                code_context[code] = line
-
-    # Patterns for codes appearing 2+ times
     for code, count in code_counter.items():
         if count >= 2:
             # Find related changes containing the error code
-            code_re = re.compile(re.escape(code), re.IGNORECASE)
-            related_changes = get_changes_by_pattern(changes, code_re)
+            if change_index is None:
+                change_index = index_changes(changes)
+            related_changes = get_changes_for_code(changes, change_index, code)
             code_example = format_code_example(related_changes)
 
             # Generate more specific solution if we have code examples
@@ -354,43 +1081,22 @@ def detect_errors(entries, test_entries, triggers, changes=None):
                 "code_example": code_example,
                 "keywords": [code, "error", "resolution"],
             })
-
     return patterns
 
 
-def detect_repeated_edits(entries, changes=None):
-    """Detect files edited 3+ times in EXECUTE phase → user_corrections pattern.
-
-    Args:
-        entries: Activity log entries
-        changes: Parsed changes.jsonl entries (optional)
-    """
+def build_repeated_edit_patterns(file_counter, changes, change_index=None):
+    """Build a user_corrections pattern for files edited 3+ times."""
     patterns = []
-    changes = changes or []
-    file_counter = Counter()
-
-    # Count from activity log
-    for e in entries:
-        if e["type"] == "AGENT" and e["phase"] == "EXECUTE" and "[done]" in e.get("detail", ""):
-            paths = FILE_PATH_RE.findall(e["detail"])
-            for p in paths:
-                if "/" in p or p.count(".") <= 1:
-                    file_counter[p] += 1
-
-    # Also count from changes.jsonl for more accuracy
-    for c in changes:
-        file_path = c.get("file", "")
-        if file_path:
-            file_counter[file_path] += 1
-
     repeated = [(f, c) for f, c in file_counter.items() if c >= 3]
     if repeated:
         file_list = ", ".join(f"{f} ({c}x)" for f, c in repeated[:5])
 
         # Get code examples from changes for the most repeated files
+        if change_index is None:
+            change_index = index_changes(changes)
         all_related_changes = []
         for file_path, _ in repeated[:2]:
-            file_changes = get_changes_for_file(changes, file_path)
+            file_changes = get_indexed_changes_for_file(changes, change_index, file_path)
             all_related_changes.extend(file_changes[-2:])  # Last 2 changes per file
 
         code_example = format_code_example(all_related_changes)
@@ -408,52 +1114,30 @@ def detect_repeated_edits(entries, changes=None):
             "code_example": code_example,
             "keywords": ["repeated edit", "correction"] + [f.split("/")[-1] for f, _ in repeated[:3]],
         })
-
     return patterns
 
 
-def detect_workarounds(entries, triggers):
-    """Detect workaround patterns using trigger regex."""
+def build_workaround_patterns(workarounds):
+    """Build a workarounds pattern when the trigger matched 2+ times."""
     patterns = []
-    workaround_trigger = triggers.get("workaround")
-    if not workaround_trigger:
-        return patterns
-
-    workaround_lines = []
-    for e in entries:
-        text = f"{e['name']} {e['detail']}"
-        if workaround_trigger.search(text):
-            workaround_lines.append(text)
-
-    if len(workaround_lines) >= 2:
-        sample = workaround_lines[0][:200]
+    if workarounds["count"] >= 2:
+        sample = workarounds["sample"][:200]
         patterns.append({
             "category": "workarounds",
             "title": "Workaround Pattern Detected",
-            "problem": f"Workaround applied {len(workaround_lines)} times. Sample: {sample}",
+            "problem": f"Workaround applied {workarounds['count']} times. Sample: {sample}",
             "solution": "Consider finding a proper solution to replace the workaround.",
             "code_example": "",
             "keywords": ["workaround", "temporary", "alternative"],
         })
-
     return patterns
 
 
-def detect_tdd_issues(test_entries, tdd_guard_entries):
-    """Detect TDD issues: consecutive test failures, TDD guard violations."""
+def build_tdd_patterns(max_consecutive, violations):
+    """Build TDD patterns from the longest failure streak and the violation count."""
     patterns = []
 
     # Consecutive test failures
-    fail_re = re.compile(r"FAIL|failed|failure", re.IGNORECASE)
-    consecutive_fails = 0
-    max_consecutive = 0
-    for te in test_entries:
-        if fail_re.search(te["message"]):
-            consecutive_fails += 1
-            max_consecutive = max(max_consecutive, consecutive_fails)
-        else:
-            consecutive_fails = 0
-
     if max_consecutive >= 3:
         patterns.append({
             "category": "debugging_techniques",
@@ -465,13 +1149,11 @@ def detect_tdd_issues(test_entries, tdd_guard_entries):
         })
 
     # TDD guard violations
-    violation_re = re.compile(r"violation|blocked|rejected", re.IGNORECASE)
-    violations = [e for e in tdd_guard_entries if violation_re.search(e["message"])]
-    if len(violations) >= 2:
+    if violations >= 2:
         patterns.append({
             "category": "best_practices",
             "title": "TDD Guard Violations",
-            "problem": f"TDD guard triggered {len(violations)} times — code was modified without tests",
+            "problem": f"TDD guard triggered {violations} times — code was modified without tests",
             "solution": "Always write tests before implementation (RED → GREEN → REFACTOR).",
             "code_example": "",
             "keywords": ["tdd", "violation", "test first", "best practice"],
@@ -480,6 +1162,573 @@ def detect_tdd_issues(test_entries, tdd_guard_entries):
     return patterns
 
 
+# 엔트리 → trigger 매칭 대상 텍스트 (changes.jsonl은 trigger 대상 아님)
+STREAM_TEXT = {
+    "activity": lambda e: f"{e['name']} {e['detail']}",
+    "tests": lambda te: te["message"],
+    "tddGuard": lambda e: e["message"],
+}
+STREAMS = ("activity", "tests", "tddGuard", "changes")
+
+
+def count_trigger_hit(counts, text):
+    """Count one trigger hit into {"count", "sample"} (the first hit is the sample)."""
+    if not counts["count"]:
+        counts["sample"] = text
+    counts["count"] += 1
+
+
+def merge_trigger_count(merged, counts):
+    if counts["count"] and not merged["count"]:
+        merged["sample"] = counts["sample"]
+    merged["count"] += counts["count"]
+
+
+# Registered detector classes; candidates are built in this order
+DETECTORS = []
+
+
+def register_detector(cls):
+    """Class decorator adding a Detector subclass to the single-pass engine."""
+    DETECTORS.append(cls)
+    return cls
+
+
+class Detector:
+    """A pattern detector driven by DetectorEngine.
+
+    observe() is called once per entry of the logs named in `streams`, with
+    the entry's text and the names of the config triggers that matched it.
+    Counters live in `state` (the persisted detector state; each detector
+    owns the keys of its new_state()), so incremental, batch and watch runs
+    resume them. finalize() builds the pattern candidates from the counters.
+    """
+
+    streams = ()
+
+    def __init__(self, state):
+        self.state = state
+
+    @classmethod
+    def create(cls, state, triggers):
+        """Detector instances for one engine run."""
+        return [cls(state)]
+
+    @staticmethod
+    def new_state():
+        return {}
+
+    @staticmethod
+    def merge(merged, state):
+        """Fold one project's counters into the batch aggregate."""
+
+    def observe(self, stream, entry, text, hits):
+        pass
+
+    def finalize(self, changes, change_index):
+        return []
+
+
+@register_detector
+class ErrorCodeDetector(Detector):
+    """Recurring error codes (TS2322, TypeError, ...) on errorResolved trigger lines.
+
+    With a recurrence window (extractionRules.recurrenceWindowMinutes) a code
+    only recurs if it appears 2+ times within the window; errorBursts keeps
+    the most occurrences seen within one window, errorTimes the newest
+    occurrence times per code. An occurrence with no timestamp of its own or
+    of an earlier entry is counted but left out of the windows.
+    """
+
+    streams = ("activity", "tests")
+
+    def __init__(self, state, window=0):
+        super().__init__(state)
+        self.window = window
+        # 시각 없는 엔트리는 직전 엔트리 시각으로 취급 (앞선 시각이 없으면 창 집계에서 제외)
+        self.clock = None
+
+    @classmethod
+    def create(cls, state, triggers):
+        return [cls(state, triggers.windows.get("recurrence", 0))]
+
+    @staticmethod
+    def new_state():
+        return {"errorCodes": {}, "errorContext": {}, "errorTimes": {}, "errorBursts": {}}
+
+    @staticmethod
+    def merge(merged, state):
+        for code, count in state["errorCodes"].items():
+            merged["errorCodes"][code] = merged["errorCodes"].get(code, 0) + count
+        for code, context in state["errorContext"].items():
+            merged["errorContext"].setdefault(code, context)
+        # 프로젝트 간 시각은 합쳐서 finalize에서 다시 창 집계
+        for code, times in state["errorTimes"].items():
+            merged_times = merged["errorTimes"].setdefault(code, [])
+            for epoch in times:
+                insert_time(merged_times, epoch)
+        for code, burst in state["errorBursts"].items():
+            merged["errorBursts"][code] = max(merged["errorBursts"].get(code, 0), burst)
+
+    def observe(self, stream, entry, text, hits):
+        epoch = entry_epoch(entry)
+        if epoch is not None:
+            self.clock = epoch
+        if "errorResolved" not in hits:
+            return
+        codes = self.state["errorCodes"]
+        for code in ERROR_CODE_RE.findall(text):
+            codes[code] = codes.get(code, 0) + 1
+            self.state["errorContext"].setdefault(code, text)
+            if self.clock is None:
+                continue
+            times = self.state["errorTimes"].setdefault(code, [])
+            insert_time(times, self.clock)
+            if self.window:
+                # 이번 발생을 포함하는 창들 중 최대 발생 수
+                nearby = times[bisect.bisect_left(times, self.clock - self.window):
+                               bisect.bisect_right(times, self.clock + self.window)]
+                bursts = self.state["errorBursts"]
+                bursts[code] = max(bursts.get(code, 0), max_in_window(nearby, self.window))
+
+    def recurring(self):
+        """Occurrence counts of the codes that recur (within the window, if one is set)."""
+        counts = Counter(self.state["errorCodes"])
+        if not self.window:
+            return counts
+        bursts = self.state["errorBursts"]
+        return Counter({
+            code: count for code, count in counts.items()
+            if max(bursts.get(code, 0), max_in_window(self.state["errorTimes"].get(code, []), self.window)) >= 2
+        })
+
+    def finalize(self, changes, change_index):
+        return build_error_patterns(self.recurring(), self.state["errorContext"], changes, change_index)
+
+
+@register_detector
+class RepeatedEditDetector(Detector):
+    """Files edited 3+ times (EXECUTE-phase activity and changes.jsonl)."""
+
+    streams = ("activity", "changes")
+
+    @staticmethod
+    def new_state():
+        return {"fileEdits": {}}
+
+    @staticmethod
+    def merge(merged, state):
+        for path, count in state["fileEdits"].items():
+            merged["fileEdits"][path] = merged["fileEdits"].get(path, 0) + count
+
+    def observe(self, stream, entry, text, hits):
+        edits = self.state["fileEdits"]
+        if stream == "changes":
+            file_path = entry.get("file", "")
+            if file_path:
+                edits[file_path] = edits.get(file_path, 0) + 1
+        elif entry["type"] == "AGENT" and entry["phase"] == "EXECUTE" and "[done]" in entry.get("detail", ""):
+            for path in FILE_PATH_RE.findall(entry["detail"]):
+                if "/" in path or path.count(".") <= 1:
+                    edits[path] = edits.get(path, 0) + 1
+
+    def finalize(self, changes, change_index):
+        return build_repeated_edit_patterns(Counter(self.state["fileEdits"]), changes, change_index)
+
+
+@register_detector
+class WorkaroundDetector(Detector):
+    """Activity entries matching the workaround trigger."""
+
+    streams = ("activity",)
+
+    @staticmethod
+    def new_state():
+        return {"workarounds": {"count": 0, "sample": ""}}
+
+    @staticmethod
+    def merge(merged, state):
+        merge_trigger_count(merged["workarounds"], state["workarounds"])
+
+    def observe(self, stream, entry, text, hits):
+        if "workaround" in hits:
+            count_trigger_hit(self.state["workarounds"], text)
+
+    def finalize(self, changes, change_index):
+        return build_workaround_patterns(self.state["workarounds"])
+
+
+@register_detector
+class TddDetector(Detector):
+    """Consecutive test failures and TDD guard violations.
+
+    A failure more than one TDD cycle (extractionRules.tddCycleMinutes) after
+    the previous one starts a new streak.
+    """
+
+    streams = ("tests", "tddGuard")
+
+    def __init__(self, state, cycle=0):
+        super().__init__(state)
+        self.cycle = cycle
+
+    @classmethod
+    def create(cls, state, triggers):
+        return [cls(state, triggers.windows.get("tddCycle", 0))]
+
+    @staticmethod
+    def new_state():
+        return {"failStreak": {"current": 0, "max": 0}, "tddViolations": 0}
+
+    @staticmethod
+    def merge(merged, state):
+        # 연속 실패는 프로젝트를 넘어 이어지지 않으므로 가장 긴 값만 유지
+        merged["failStreak"]["max"] = max(merged["failStreak"]["max"], state["failStreak"]["max"])
+        merged["tddViolations"] += state["tddViolations"]
+
+    def observe(self, stream, entry, text, hits):
+        if stream == "tddGuard":
+            if VIOLATION_RE.search(text):
+                self.state["tddViolations"] += 1
+            return
+        # 구조화된 기록은 요약 카운트 기반 status, 텍스트 로그는 정규식
+        streak = self.state["failStreak"]
+        failing = entry["status"] == "RED" if "status" in entry else FAIL_RE.search(text)
+        if failing:
+            epoch = entry_epoch(entry)
+            last = streak.get("lastEpoch")
+            if self.cycle and epoch is not None and last is not None and epoch - last > self.cycle:
+                streak["current"] = 0
+            if epoch is not None:
+                streak["lastEpoch"] = epoch
+            streak["current"] += 1
+            streak["max"] = max(streak["max"], streak["current"])
+        else:
+            streak["current"] = 0
+
+    def finalize(self, changes, change_index):
+        return build_tdd_patterns(self.state["failStreak"]["max"], self.state["tddViolations"])
+
+
+@register_detector
+class TriggerCountDetector(Detector):
+    """Config-declared detectors: a trigger with a `candidate` block counts its hits.
+
+    config.json:
+      "triggers": {"userCorrection": {"pattern": "...", "candidate": {
+          "category": "user_corrections", "title": "...", "solution": "...",
+          "keywords": [...], "minOccurrences": 2, "streams": ["activity"]}}}
+    """
+
+    def __init__(self, state, name, spec):
+        super().__init__(state)
+        self.name = name
+        self.spec = spec
+        self.streams = tuple(s for s in spec.get("streams", ("activity",)) if s in STREAM_TEXT)
+
+    @classmethod
+    def create(cls, state, triggers):
+        return [cls(state, name, spec) for name, spec in triggers.candidates.items()]
+
+    @staticmethod
+    def new_state():
+        return {"triggerCounts": {}}
+
+    @staticmethod
+    def merge(merged, state):
+        for name, counts in state.get("triggerCounts", {}).items():
+            merge_trigger_count(merged["triggerCounts"].setdefault(name, {"count": 0, "sample": ""}), counts)
+
+    def observe(self, stream, entry, text, hits):
+        if self.name in hits:
+            count_trigger_hit(self.state["triggerCounts"].setdefault(self.name, {"count": 0, "sample": ""}), text)
+
+    def finalize(self, changes, change_index):
+        counts = self.state["triggerCounts"].get(self.name)
+        if not counts or counts["count"] < self.spec.get("minOccurrences", 2):
+            return []
+        return [{
+            "category": self.spec["category"],
+            "title": self.spec["title"],
+            "problem": f"'{self.name}' trigger matched {counts['count']} times. Sample: {counts['sample'][:200]}",
+            "solution": self.spec.get("solution", "Review the matching log entries for a reusable approach."),
+            "code_example": "",
+            "keywords": self.spec.get("keywords", [self.name]),
+        }]
+
+
+class DetectorEngine:
+    """Runs every registered detector over the logs in a single pass.
+
+    Each entry is visited once: its text is built once, the config triggers
+    are matched against it together (TriggerMatcher), and the detectors that
+    observe its log are called. Logs are visited in STREAMS order, so
+    first-seen samples and contexts are stable across modes.
+    """
+
+    def __init__(self, state, triggers):
+        self.triggers = triggers
+        self.detectors = [detector for cls in DETECTORS for detector in cls.create(state, triggers)]
+        self.observers = {stream: [d for d in self.detectors if stream in d.streams] for stream in STREAMS}
+
+    def observe(self, logs):
+        """Feed {stream: entries} through the detectors."""
+        match = self.triggers.match
+        for stream in STREAMS:
+            observers = self.observers[stream]
+            entries = logs.get(stream)
+            if not observers or not entries:
+                continue
+            entry_text = STREAM_TEXT.get(stream)
+            for entry in entries:
+                text = entry_text(entry) if entry_text else ""
+                hits = match(text) if text else NO_HITS
+                for detector in observers:
+                    detector.observe(stream, entry, text, hits)
+
+    def finalize(self, changes):
+        change_index = index_changes(changes)
+        return [candidate for detector in self.detectors for candidate in detector.finalize(changes, change_index)]
+
+
+# --- Incremental State ---
+
+def new_detector_state():
+    """Return empty running detector state (JSON-serializable)."""
+    state = {}
+    for cls in DETECTORS:
+        state.update(cls.new_state())
+    return state
+
+
+def load_analyzer_state(path):
+    """Load the incremental analyzer state file, or a fresh state if missing/corrupt."""
+    state = {"version": ANALYZER_STATE_VERSION, "logs": {}, "detectors": new_detector_state()}
+    if not path or not os.path.isfile(path):
+        return state
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved.get("version") == ANALYZER_STATE_VERSION:
+            state["logs"] = saved.get("logs", {})
+            state["detectors"].update(saved.get("detectors", {}))
+    except (json.JSONDecodeError, IOError, AttributeError) as e:
+        sys.stderr.write(f"Ignoring unreadable analyzer state: {e}\n")
+    return state
+
+
+def write_json_atomic(path, data):
+    """Write `data` as JSON to `path` atomically (temp file + rename)."""
+    dir_path = os.path.dirname(path) or "."
+    os.makedirs(dir_path, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dir_path, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.rename(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def save_analyzer_state(path, state):
+    """Write the analyzer state file atomically."""
+    write_json_atomic(path, state)
+
+
+def log_fingerprint_matches(path, saved):
+    """True if `path` is still the file recorded in `saved` and has not shrunk."""
+    if event_store.is_store(path):
+        return saved.get("path") == path and "segment" in saved and event_store.position_valid(path, saved)
+    if saved.get("inode", 0) is None:
+        # live 파일이 아직 없던 로그: 새 파일을 처음부터 읽음
+        return saved.get("path") == path
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return (
+        saved.get("path") == path
+        and saved.get("inode") == st.st_ino
+        and st.st_size >= saved.get("offset", 0)
+    )
+
+
+def complete_lines_end(path):
+    """Return the offset just past the last newline of a file (0 if none)."""
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        while pos > 0:
+            step = min(READ_BLOCK_SIZE, pos)
+            pos -= step
+            f.seek(pos)
+            idx = f.read(step).rfind(b"\n")
+            if idx >= 0:
+                return pos + idx + 1
+    return 0
+
+
+def read_appended(path, offset, parse_line, label="log"):
+    """Parse complete lines appended after `offset`. Returns (entries, new_offset).
+
+    A trailing line without newline is left for the next run (writer may be mid-line).
+    """
+    entries = []
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                start = offset
+                offset += len(raw)
+                line = raw.decode("utf-8", errors="replace").strip()
+                if not line:
+                    continue
+                entry = parse_line(line)
+                if entry is not None:
+                    if isinstance(entry, CompactEntry):
+                        entry.defer((path, start, len(raw) - 1))
+                    entries.append(entry)
+    except IOError as e:
+        sys.stderr.write(f"Error reading {label}: {e}\n")
+    return entries, offset
+
+
+def newest_segment_name(path):
+    segments = log_archive.log_segments(path)
+    return segments[-1]["file"] if segments else ""
+
+
+def rotated_segments(path, saved):
+    """Archived segments holding unread lines of a log rotated since `saved`, or None.
+
+    Segments archived after the one recorded in `saved["archived"]` are new;
+    the first of them must be the old live file (same inode, at least
+    `offset` bytes long). Checked before the inode fingerprint because the
+    new live file may reuse the inode. For a log whose live file did not exist
+    yet ("inode" None), every new segment is unread.
+    """
+    if saved.get("path") != path or event_store.is_store(path):
+        return None
+    segments = log_archive.log_segments(path)
+    names = [segment["file"] for segment in segments]
+    last = saved.get("archived", "")
+    if last and last not in names:
+        return None
+    new = segments[names.index(last) + 1:] if last else segments
+    if not new:
+        return None
+    if saved.get("inode") is None:
+        return new
+    if new[0].get("inode") == saved["inode"] and new[0].get("bytes", 0) >= saved.get("offset", 0):
+        return new
+    return None
+
+
+def read_rotated(path, segments, offset, parse_line, label="log"):
+    """Parse the lines after `offset` of the first segment and all lines of the rest."""
+    entries = []
+    for i, segment in enumerate(segments):
+        try:
+            data = log_archive.read_segment(path, segment)
+        except (IOError, EOFError, ValueError) as e:
+            sys.stderr.write(f"Error reading {label}: {e}\n")
+            continue
+        for line in data[offset if i == 0 else 0:].decode("utf-8", errors="replace").split("\n"):
+            line = line.strip()
+            if line:
+                entry = parse_line(line)
+                if entry is not None:
+                    entries.append(entry)
+    return entries
+
+
+def read_logs_incremental(state, logs):
+    """Read only the bytes appended to each log since the last run.
+
+    `logs` maps a log key to (path, parse_line, window, ts_field). If any known
+    log was replaced or truncated, the whole state is reset; a log rotated into
+    the archive (log-archive.py) is instead finished from its segments and
+    continued from the start of the new live file. A log seen for the first
+    time is read from its tail window and tracked from there. Offsets (or event
+    store segment positions) in `state["logs"]` are advanced in place. An
+    "inode" of None means the live file does not exist yet and will be read
+    from its start.
+
+    Returns a dict of log key → newly parsed entries.
+    """
+    saved_logs = state["logs"]
+    rotated = {}
+    for key, (path, _, _, _) in logs.items():
+        saved = saved_logs.get(key)
+        if saved is None or not log_exists(path):
+            continue
+        segments = rotated_segments(path, saved)
+        if segments:
+            rotated[key] = segments
+        elif not log_fingerprint_matches(path, saved):
+            state["logs"] = saved_logs = {}
+            state["detectors"] = new_detector_state()
+            rotated = {}
+            break
+
+    new_entries = {}
+    for key, (path, parse_line, window, ts_field) in logs.items():
+        if not log_exists(path):
+            saved_logs.pop(key, None)
+            new_entries[key] = []
+            continue
+        if event_store.is_store(path):
+            # 이벤트 저장소: (세그먼트, 바이트 오프셋)으로 추적
+            if key in saved_logs:
+                entries, position = event_store.read_appended(path, saved_logs[key])
+                entries = list(compact_entries(parse_line, entries))
+            else:
+                entries = list(iter_log_window(path, parse_line, window, label=key))
+                position = event_store.end_position(path)
+            saved_logs[key] = {"path": path, **position}
+            new_entries[key] = entries
+            continue
+        saved = saved_logs.get(key)
+        if key in rotated:
+            # rotate된 live 파일의 나머지 → 새 live 파일 처음부터
+            entries = read_rotated(path, rotated[key], saved.get("offset", 0), parse_line, label=key)
+            offset = 0
+        elif saved is not None:
+            entries = []
+            offset = saved["offset"] if saved.get("inode") is not None else 0
+        else:
+            # 첫 실행: 최신 window만 읽고 그 끝부터 추적 시작 (아카이브 포함)
+            offset = complete_lines_end(path) if os.path.isfile(path) else 0
+            entries = list(iter_log_window(path, parse_line, window, ts_field=ts_field, label=key, end=offset))
+        if os.path.isfile(path):
+            if saved is not None:
+                appended, offset = read_appended(path, offset, parse_line, label=key)
+                entries += appended
+            saved_logs[key] = {"path": path, "inode": os.stat(path).st_ino, "offset": offset}
+        else:
+            saved_logs[key] = {"path": path, "inode": None, "offset": 0}
+        saved_logs[key]["archived"] = newest_segment_name(path)
+        new_entries[key] = entries
+    return new_entries
+
+
+def update_detector_state(detectors, entries, test_entries, tdd_guard_entries, changes, triggers):
+    """Fold newly read entries into the running detector state (one pass over all logs)."""
+    DetectorEngine(detectors, triggers).observe({
+        "activity": entries,
+        "tests": test_entries,
+        "tddGuard": tdd_guard_entries,
+        "changes": changes,
+    })
+
+
+def build_patterns_from_state(detectors, changes, triggers):
+    """Build pattern candidates from running detector state (detector registration order)."""
+    return DetectorEngine(detectors, triggers).finalize(changes)
+
+
 # --- Pattern File I/O ---
 
 def generate_pattern_id(category):
@@ -489,21 +1738,8 @@ def generate_pattern_id(category):
     return f"{category}-{ts}-{random_hex}"
 
 
-def create_pattern_file(patterns_dir, category, title, problem, solution, code_example, keywords):
-    """Create a new pattern markdown file atomically. Returns the file path.
-
-    Args:
-        patterns_dir: Directory to store pattern files
-        category: Pattern category (e.g., error_resolution, user_corrections)
-        title: Pattern title
-        problem: Description of the problem
-        solution: How the problem was solved
-        code_example: Formatted code example (may include Before/After sections)
-        keywords: List of trigger keywords
-    """
-    pattern_id = generate_pattern_id(category)
-    fpath = os.path.join(patterns_dir, f"{pattern_id}.md")
-    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+def render_pattern(pattern_id, category, title, problem, solution, code_example, keywords, now):
+    """Render the markdown body of a new pattern (immutable once written)."""
     kw_str = ", ".join(keywords) if keywords else ""
 
     # Handle code example formatting
@@ -517,7 +1753,7 @@ def create_pattern_file(patterns_dir, category, title, problem, solution, code_e
     else:
         code_section = "_No code example captured for this session._"
 
-    content = f"""# Pattern: {title}
+    return f"""# Pattern: {title}
 
 ## ID
 {pattern_id}
@@ -539,154 +1775,890 @@ def create_pattern_file(patterns_dir, category, title, problem, solution, code_e
 
 ## Trigger Keywords
 {kw_str}
+"""
 
-## Usage Count
-1
 
-## Last Used
-{now}
-"""
-    os.makedirs(patterns_dir, exist_ok=True)
+def pattern_meta_path(patterns_dir):
+    return os.path.join(patterns_dir, PATTERN_META_FILE)
 
-    # 원자적 쓰기 (임시 파일 → 이동)
+
+def load_pattern_meta(patterns_dir):
+    """Load {pattern file: {"usageCount", "lastUsed", "keywords"}} from the metadata store."""
     try:
-        fd, tmp_path = tempfile.mkstemp(dir=patterns_dir, suffix=".tmp")
-        try:
-            with os.fdopen(fd, "w", encoding="utf-8") as f:
-                f.write(content)
-            os.rename(tmp_path, fpath)
-        except Exception:
-            os.unlink(tmp_path)
-            raise
-    except Exception as e:
-        # Fallback: 직접 쓰기
-        sys.stderr.write(f"Atomic write failed, using direct write: {e}\n")
-        with open(fpath, "w", encoding="utf-8") as f:
-            f.write(content)
+        with open(pattern_meta_path(patterns_dir), "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved.get("version") == PATTERN_META_VERSION:
+            return saved.get("patterns", {})
+    except (IOError, json.JSONDecodeError, AttributeError):
+        pass
+    return {}
 
+
+def save_pattern_meta(patterns_dir, meta):
+    """Write the metadata store atomically (caller holds PATTERN_META_LOCK)."""
+    write_json_atomic(pattern_meta_path(patterns_dir), {"version": PATTERN_META_VERSION, "patterns": meta})
+
+
+def seed_pattern_meta(fpath):
+    """Metadata for a pattern file not in the store yet.
+
+    Files written before the store keep their counters in "## Usage Count" /
+    "## Last Used" sections; those are read once and then left untouched.
+    """
+    try:
+        sections = read_pattern_sections(fpath)
+    except (IOError, OSError):
+        sections = {}
+    usage = sections.get("Usage Count", "").split("\n", 1)[0]
+    keywords = sections.get("Trigger Keywords", "").split("\n", 1)[0]
+    return {
+        "usageCount": int(usage) if usage.isdigit() else 1,
+        "lastUsed": sections.get("Last Used") or sections.get("Created", ""),
+        "keywords": sorted(parse_keywords(keywords)),
+    }
+
+
+def new_pattern_batch(patterns_dir, index=None):
+    """Return an empty batch of pattern creates/updates for commit_patterns()."""
+    return {"dir": patterns_dir, "index": index, "creates": [], "hits": {}}
+
+
+def create_pattern_file(patterns_dir, category, title, problem, solution, code_example, keywords, index=None,
+                        batch=None):
+    """Create a new pattern file. Returns the file path.
+
+    With `batch` the file is only staged (and indexed, so later candidates of
+    the same run dedup against it) until commit_patterns(); otherwise it is
+    committed right away.
+
+    Args:
+        patterns_dir: Directory to store pattern files
+        category: Pattern category (e.g., error_resolution, user_corrections)
+        title: Pattern title
+        problem: Description of the problem
+        solution: How the problem was solved
+        code_example: Formatted code example (may include Before/After sections)
+        keywords: List of trigger keywords
+        index: Pattern keyword index to update in place (optional)
+        batch: new_pattern_batch() to stage the write in (optional)
+    """
+    pending = batch if batch is not None else new_pattern_batch(patterns_dir, index)
+    pattern_id = generate_pattern_id(category)
+    fpath = os.path.join(patterns_dir, f"{pattern_id}.md")
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    pending["creates"].append({
+        "path": fpath,
+        "content": render_pattern(pattern_id, category, title, problem, solution, code_example, keywords, now),
+        "keywords": sorted({k.lower() for k in keywords or []}),
+    })
+    index = pending["index"]
+    if index is not None and os.path.abspath(patterns_dir) == os.path.abspath(index["dir"]):
+        fname = os.path.basename(fpath)
+        unindex_pattern_entry(index, fname)
+        index_pattern_entry(index, fname, {
+            "mtime": None,
+            "keywords": sorted({k.lower() for k in keywords or []}),
+            "minhash": minhash_signature(pattern_features(keywords or [], pattern_text(title, problem, solution))),
+        })
+        index["dirty"] = True
+    if batch is None:
+        commit_patterns(pending)
     return fpath
 
 
-def update_pattern_file(path):
-    """Increment Usage Count and update Last Used in an existing pattern file atomically."""
+def update_pattern_file(path, index=None, keywords=None, batch=None):
+    """Record a duplicate hit: Usage Count + 1, Last Used = now, keywords merged.
+
+    Only the metadata store changes; the markdown file is not rewritten. With
+    `batch` the hit is applied by commit_patterns(), otherwise right away.
+    """
     if not os.path.isfile(path):
         return
+    pending = batch if batch is not None else new_pattern_batch(os.path.dirname(path), index)
+    hit = pending["hits"].setdefault(os.path.basename(path), {"count": 0, "keywords": set()})
+    hit["count"] += 1
+    hit["keywords"].update(k.lower() for k in keywords or [])
+    if batch is None:
+        commit_patterns(pending)
+
+
+def locked(path):
+    """Exclusive advisory lock on `path` (a no-op context without fcntl)."""
+    f = open(path, "a")
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX)
+    return f
+
+
+def commit_patterns(batch):
+    """Apply all staged creates and usage hits of one run as a group commit.
+
+    New markdown files are written first (each via temp file + rename), then
+    the metadata store is read, updated and replaced once under a lock, so
+    hits from concurrent runs are added rather than overwritten. The store
+    rename is the commit point: a file written before a crash is picked up
+    with Usage Count 1 when first hit. Index entries of new files get their
+    mtimes here; if only this commit touched the directory the index stays
+    valid. Returns the number of creates + hits applied.
+    """
+    patterns_dir, index = batch["dir"], batch["index"]
+    creates, hits = batch["creates"], batch["hits"]
+    if not creates and not hits:
+        return 0
+    os.makedirs(patterns_dir, exist_ok=True)
+    dir_mtime_before = dir_mtime_ns(patterns_dir)
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    written = []
+    for create in creates:
+        fpath = create["path"]
+        # 원자적 쓰기 (임시 파일 → 이동)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=patterns_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(create["content"])
+                os.rename(tmp_path, fpath)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            # Fallback: 직접 쓰기
+            sys.stderr.write(f"Atomic write failed, using direct write: {e}\n")
+            try:
+                with open(fpath, "w", encoding="utf-8") as f:
+                    f.write(create["content"])
+            except (IOError, OSError) as e:
+                sys.stderr.write(f"Error creating pattern file: {e}\n")
+                if index is not None:
+                    unindex_pattern_entry(index, os.path.basename(fpath))
+                continue
+        written.append(create)
+
+    try:
+        with locked(os.path.join(patterns_dir, PATTERN_META_LOCK)):
+            meta = load_pattern_meta(patterns_dir)
+            for create in written:
+                meta[os.path.basename(create["path"])] = {
+                    "usageCount": 1, "lastUsed": now, "keywords": create["keywords"],
+                }
+            for fname, hit in hits.items():
+                entry = meta.get(fname) or seed_pattern_meta(os.path.join(patterns_dir, fname))
+                entry["usageCount"] += hit["count"]
+                entry["lastUsed"] = now
+                entry["keywords"] = sorted(set(entry["keywords"]) | hit["keywords"])
+                meta[fname] = entry
+            save_pattern_meta(patterns_dir, meta)
+    except (IOError, OSError) as e:
+        sys.stderr.write(f"Error saving pattern metadata: {e}\n")
+
+    if index is not None and os.path.abspath(patterns_dir) == os.path.abspath(index["dir"]):
+        for create in written:
+            entry = index["patterns"].get(os.path.basename(create["path"]))
+            try:
+                if entry is not None:
+                    entry["mtime"] = os.stat(create["path"]).st_mtime_ns
+            except OSError:
+                pass
+        if index["dirMtime"] is not None and index["dirMtime"] == dir_mtime_before:
+            index["dirMtime"] = dir_mtime_ns(patterns_dir)
+        else:
+            index["dirMtime"] = None
+        index["dirty"] = True
+    batch["creates"], batch["hits"] = [], {}
+    return len(written) + sum(hit["count"] for hit in hits.values())
+
+
+# --- Parallel Execution ---
+
+_FORKED_CALLS = []
+
+
+def _run_forked_call(i):
+    fn, fn_args = _FORKED_CALLS[i]
+    return fn(*fn_args)
+
+
+def run_calls(jobs, calls):
+    """Run [(fn, args), ...] and return their results in call order.
+
+    jobs > 1 runs the calls in a process pool; results are still collected in
+    submission order so the merge is identical to serial mode. With the fork
+    start method the workers inherit the call arguments instead of receiving
+    them pickled, so only results cross the process boundary. Leaving the
+    pool (including on the SIGALRM timeout) terminates the workers.
+    """
+    global _FORKED_CALLS
+    if jobs <= 1 or len(calls) <= 1:
+        return [fn(*fn_args) for fn, fn_args in calls]
+    workers = min(jobs, len(calls))
+    if "fork" in multiprocessing.get_all_start_methods():
+        _FORKED_CALLS = calls
+        try:
+            with multiprocessing.get_context("fork").Pool(workers) as pool:
+                pending = [pool.apply_async(_run_forked_call, (i,)) for i in range(len(calls))]
+                return [result.get() for result in pending]
+        finally:
+            _FORKED_CALLS = []
+    with multiprocessing.Pool(workers) as pool:
+        pending = [pool.apply_async(fn, fn_args) for fn, fn_args in calls]
+        return [result.get() for result in pending]
+
+
+# --- Stage Timings ---
+
+def peak_rss_kb():
+    """Peak RSS of this process in KiB (ru_maxrss is bytes on macOS), or None."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def measure_call(fn, args):
+    """Run fn(*args) and return (result, wall/CPU seconds and peak RSS of the calling process).
+
+    While tracemalloc is tracing (--memory), also the peak Python heap of the call.
+    """
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    result = fn(*args)
+    record = {
+        "wallSeconds": time.perf_counter() - wall,
+        "cpuSeconds": time.process_time() - cpu,
+        "peakRssKb": peak_rss_kb(),
+    }
+    if tracing:
+        record["peakHeapKb"] = tracemalloc.get_traced_memory()[1] // 1024
+    return result, record
+
+
+class StageTimings:
+    """Wall/CPU time, items and peak RSS per analyzer stage.
+
+    Always collected (a few clock reads per stage) so a timeout can report the
+    stage it interrupted; written out only with --timings/--profile. Repeated
+    stages (find_duplicate, analyze_project) are summed into one record.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.current = None
+
+    def run(self, name, fn, *args, items=len):
+        return self.run_parallel(1, [(name, fn, args)], items)[0]
+
+    def run_parallel(self, jobs, stages, items=len):
+        """Run [(name, fn, args), ...] through run_calls and record each stage.
+
+        Serial calls narrow `current` to the running stage; in worker processes
+        that assignment is invisible, so the parent keeps the group label.
+        """
+        self.current = " + ".join(dict.fromkeys(name for name, _, _ in stages))
+        measured = run_calls(jobs, [(self.measure, (name, fn, fn_args)) for name, fn, fn_args in stages])
+        results = []
+        for (name, _, _), (result, record) in zip(stages, measured):
+            self.add(name, record, items(result) if items and result is not None else None)
+            results.append(result)
+        self.current = None
+        return results
+
+    def measure(self, name, fn, args):
+        self.current = name
+        return measure_call(fn, args)
+
+    def add(self, name, record, count):
+        stage = self.stages.setdefault(name, {
+            "stage": name, "calls": 0, "wallSeconds": 0.0, "cpuSeconds": 0.0, "items": None, "peakRssKb": None,
+        })
+        stage["calls"] += 1
+        stage["wallSeconds"] += record["wallSeconds"]
+        stage["cpuSeconds"] += record["cpuSeconds"]
+        if count is not None:
+            stage["items"] = (stage["items"] or 0) + count
+        if record["peakRssKb"] is not None:
+            stage["peakRssKb"] = max(stage["peakRssKb"] or 0, record["peakRssKb"])
+        if "peakHeapKb" in record:
+            stage["peakHeapKb"] = max(stage.get("peakHeapKb", 0), record["peakHeapKb"])
+
+    def summary(self):
+        """One-line "stage 0.12s, ..." list of completed stages."""
+        return ", ".join(f"{s['stage']} {s['wallSeconds']:.2f}s" for s in self.stages.values())
+
+    def record(self, **fields):
+        stages = [dict(s, wallSeconds=round(s["wallSeconds"], 6), cpuSeconds=round(s["cpuSeconds"], 6))
+                  for s in self.stages.values()]
+        record = {
+            "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "totalWallSeconds": round(time.perf_counter() - self.started, 6),
+            "peakRssKb": peak_rss_kb(),
+        }
+        if tracemalloc.is_tracing():
+            # 단계마다 peak를 초기화하므로 전체 peak는 단계별 최댓값
+            record["peakHeapKb"] = max([s["peakHeapKb"] for s in stages if "peakHeapKb" in s]
+                                       + [tracemalloc.get_traced_memory()[1] // 1024])
+        return {**record, **fields, "stages": stages}
+
+
+def append_timings(path, record):
+    """Append one timings record as a JSONL line."""
+    dir_path = os.path.dirname(path) or "."
+    os.makedirs(dir_path, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+# --- Batch Mode ---
+
+def expand_project_roots(specs):
+    """Expand project roots/globs into existing directories that have .orchestra/logs (input order, no dups)."""
+    roots = []
+    for spec in specs:
+        spec = os.path.expanduser(spec)
+        matches = sorted(glob.glob(spec)) if glob.has_magic(spec) else [spec]
+        for match in matches:
+            root = os.path.abspath(match)
+            if root not in roots and os.path.isdir(os.path.join(root, PROJECT_LOG_DIR)):
+                roots.append(root)
+    return roots
+
+
+def project_logs(root, window):
+    """read_logs_incremental log spec for one project's .orchestra/logs."""
+    log_dir = os.path.join(root, PROJECT_LOG_DIR)
+    return {
+        "activity": (resolve_legacy_log(os.path.join(log_dir, "activity.jsonl")), parse_activity_line, window, "ts"),
+        "tests": (resolve_legacy_log(os.path.join(log_dir, "test-runs.jsonl")), parse_test_line, window, "ts"),
+        "tddGuard": (os.path.join(log_dir, "tdd-guard.log"), parse_test_line, window, "ts"),
+        "changes": (os.path.join(log_dir, "changes.jsonl"), parse_changes_line, window, "timestamp"),
+    }
+
+
+def project_fingerprint(logs):
+    """(size, mtime) of each analyzed log, its event store segments and the archive manifest.
+
+    Any write to a project's logs (append, rotate, store roll) changes it.
+    """
+    paths = []
+    for path, _, _, _ in logs.values():
+        if event_store.is_store(path):
+            paths += sorted(os.path.join(path, name) for name in os.listdir(path))
+        else:
+            paths.append(path)
+            paths.append(os.path.join(os.path.dirname(path), log_archive.ARCHIVE_DIR, log_archive.MANIFEST_FILE))
+    fingerprint = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        fingerprint[path] = [st.st_size, st.st_mtime_ns]
+    return fingerprint
+
+
+def load_batch_state(path):
+    """Load the batch state file ({"projects": {root: {"fingerprint", "logs", "detectors"}}})."""
+    state = {"version": BATCH_STATE_VERSION, "projects": {}}
+    if not os.path.isfile(path):
+        return state
     try:
         with open(path, "r", encoding="utf-8") as f:
-            content = f.read()
+            saved = json.load(f)
+        if saved.get("version") == BATCH_STATE_VERSION:
+            state["projects"] = saved.get("projects", {})
+    except (json.JSONDecodeError, IOError, AttributeError) as e:
+        sys.stderr.write(f"Ignoring unreadable batch state: {e}\n")
+    return state
+
+
+def analyze_project(root, saved, window, triggers):
+    """Fold the logs a project appended since `saved` into its detector state.
+
+    Runs in a worker process. Returns (project state, newest changes window);
+    the changes are only used for code examples.
+    """
+    state = {"logs": saved.get("logs", {}), "detectors": new_detector_state()}
+    state["detectors"].update(saved.get("detectors", {}))
+    logs = project_logs(root, window)
+    new_entries = read_logs_incremental(state, logs)
+    update_detector_state(
+        state["detectors"],
+        new_entries["activity"],
+        new_entries["tests"],
+        new_entries["tddGuard"],
+        new_entries["changes"],
+        triggers,
+    )
+    return state, parse_changes_log(logs["changes"][0], window)
+
+
+def merge_detector_states(states):
+    """Aggregate per-project detector state before thresholds apply.
+
+    Each detector merges its own counters: counts are summed, contexts and
+    samples keep the first project's, failure streaks keep the longest.
+    """
+    merged = new_detector_state()
+    for detectors in states:
+        for cls in DETECTORS:
+            cls.merge(merged, detectors)
+    return merged
 
-        # Update Usage Count
-        usage_match = re.search(r"(## Usage Count\n)(\d+)", content)
-        if usage_match:
-            old_count = int(usage_match.group(2))
-            content = content[:usage_match.start(2)] + str(old_count + 1) + content[usage_match.end(2):]
 
-        # Update Last Used
-        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-        content = re.sub(r"(## Last Used\n).*", rf"\g<1>{now}", content)
+def analyze_batch(roots, state, window, triggers, jobs, timings):
+    """Rescan the projects whose logs changed and return (aggregated detectors, changes, rescanned count).
 
-        # 원자적 쓰기
-        dir_path = os.path.dirname(path)
-        fd, tmp_path = tempfile.mkstemp(dir=dir_path, suffix=".tmp")
+    Projects with an unchanged fingerprint reuse their saved detector state;
+    the rest are analyzed in a process pool. `state["projects"]` is updated
+    in place. Only projects in `roots` are aggregated.
+    """
+    projects = state["projects"]
+    fingerprints = {root: project_fingerprint(project_logs(root, window)) for root in roots}
+    changed = [root for root in roots
+               if root not in projects or projects[root].get("fingerprint") != fingerprints[root]]
+    results = timings.run_parallel(jobs, [
+        ("analyze_project", analyze_project, (root, projects.get(root, {}), window, triggers))
+        for root in changed
+    ], items=lambda result: len(result[1]))
+    changes = []
+    for root, (project_state, project_changes) in zip(changed, results):
+        projects[root] = {"fingerprint": fingerprints[root], **project_state}
+        changes.extend(project_changes)
+    detectors = timings.run("merge_detector_states", merge_detector_states,
+                            [projects[root]["detectors"] for root in roots], items=None)
+    return detectors, changes, len(changed)
+
+
+def refresh_search_index(patterns_dir):
+    """Index new pattern files for pattern-search.py queries (errors only logged)."""
+    try:
+        pattern_search.refresh(patterns_dir).close()
+    except (pattern_search.sqlite3.Error, OSError) as e:
+        sys.stderr.write(f"Error refreshing pattern search index: {e}\n")
+
+
+def write_candidates(candidates, args, timings):
+    """Deduplicate candidates against --patterns-dir and create/update pattern files.
+
+    Returns the number of patterns created or updated (at most --max-patterns).
+    """
+    index = timings.run("load_pattern_index", load_pattern_index, args.patterns_dir, args.dedup_bands,
+                        items=lambda loaded: len(loaded["patterns"]))
+
+    # Deduplicate & create/update (한 번의 group commit으로 적용)
+    batch = new_pattern_batch(args.patterns_dir, index)
+    created_count = 0
+    updated_count = 0
+
+    for candidate in candidates:
+        if created_count + updated_count >= args.max_patterns:
+            break
+
+        kw = candidate.get("keywords", [])
+        text = pattern_text(candidate["title"], candidate["problem"], candidate["solution"])
+        dup_path = timings.run("find_duplicate", find_duplicate, kw, index, text, args.dedup_threshold,
+                               items=None)
+
+        if dup_path:
+            update_pattern_file(dup_path, index, kw, batch)
+            updated_count += 1
+        else:
+            create_pattern_file(
+                args.patterns_dir,
+                candidate["category"],
+                candidate["title"],
+                candidate["problem"],
+                candidate["solution"],
+                candidate.get("code_example", ""),
+                kw,
+                index,
+                batch,
+            )
+            created_count += 1
+
+    timings.run("commit_patterns", commit_patterns, batch, items=None)
+    timings.run("save_pattern_index", save_pattern_index, index, items=None)
+    if created_count:
+        # 세션 시작/프롬프트 검색이 파일을 다시 읽지 않도록 검색 인덱스를 미리 갱신
+        timings.run("refresh_search_index", refresh_search_index, args.patterns_dir, items=None)
+    return created_count + updated_count
+
+
+# --- Watch Mode ---
+#
+# 세션 도중 로그를 따라가는 실시간 consumer. 로그마다 polling tailer task가
+# read_logs_incremental로 새 줄을 읽어 bounded queue에 넣고, 하나의 consumer가
+# --incremental과 같은 detector 상태에 반영한다. 새로 임계값을 넘은 후보는
+# debounce 후 한 번의 group commit으로 기록된다. 상태 파일은 queue가 비었을
+# 때만 저장하므로 offset과 카운터는 항상 같은 시점의 것이다.
+
+def incremental_logs(args):
+    """Log key → (path, parse_line, window, ts_field) for read_logs_incremental."""
+    return {
+        "activity": (args.activity, parse_activity_line, args.window_entries, "ts"),
+        "tests": (args.tests, parse_test_line, args.window_entries, "ts"),
+        "tddGuard": (args.tdd_guard, parse_test_line, args.window_entries, "ts"),
+        "changes": (args.changes, parse_changes_line, args.window_entries, "timestamp"),
+    }
+
+
+def candidate_titles(detectors, triggers):
+    """Titles of the candidates the running detector state currently yields."""
+    return {candidate["title"] for candidate in build_patterns_from_state(detectors, [], triggers)}
+
+
+def emit_watch_event(event, **fields):
+    print(json.dumps({"event": event, **fields}, ensure_ascii=False), flush=True)
+
+
+async def tail_log(state, key, spec, queue, interval, stop):
+    """Poll one log for appended lines and queue them as (key, entries) batches.
+
+    After `stop` is set the log is read once more, so lines written just
+    before the stop request are not left for the next run.
+    """
+    while True:
+        entries = read_logs_incremental(state, {key: spec})[key]
+        if entries:
+            # queue가 가득 차면 consumer가 따라잡을 때까지 읽기를 멈춤 (backpressure)
+            await queue.put((key, entries))
+            continue
+        if stop.is_set():
+            return
         try:
-            with os.fdopen(fd, "w", encoding="utf-8") as f:
-                f.write(content)
-            os.rename(tmp_path, path)
-        except Exception:
-            os.unlink(tmp_path)
-            raise
-    except Exception as e:
-        sys.stderr.write(f"Error updating pattern file: {e}\n")
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+def apply_watch_batch(state, key, entries, triggers):
+    """Fold one tailer batch into the detector state."""
+    DetectorEngine(state["detectors"], triggers).observe({key: entries})
+
+
+def commit_watch(args, state, pending, triggers, timings):
+    """Write the pending candidates (one group commit) and save the analyzer state."""
+    written = 0
+    if pending:
+        # Code examples come from the newest changes window (as in --incremental)
+        changes = parse_changes_log(args.changes, args.window_entries)
+        candidates = [candidate for candidate in build_patterns_from_state(state["detectors"], changes, triggers)
+                      if candidate["title"] in pending]
+        written = write_candidates(candidates, args, timings)
+        emit_watch_event("commit", patterns=written)
+    save_analyzer_state(args.state_file, state)
+    return written
+
+
+async def watch_logs(args, triggers, timings):
+    """Follow the session logs and write pattern candidates as they appear.
+
+    Shares --state-file with --incremental, so a Stop-time run after the
+    watcher only has the tail it had not consumed yet. Candidates the saved
+    state already yielded are not rewritten. New candidates are committed
+    --debounce seconds after the last one appeared; SIGUSR1 commits them once
+    every log has been polled again, and SIGTERM/SIGINT (or --idle-exit
+    seconds without new entries) commit and stop. Returns the number of
+    patterns written.
+    """
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    flush = asyncio.Event()
+    for signame, event in (("SIGTERM", stop), ("SIGINT", stop), ("SIGUSR1", flush)):
+        if hasattr(signal, signame):
+            loop.add_signal_handler(getattr(signal, signame), event.set)
+
+    state = load_analyzer_state(args.state_file)
+    emitted = candidate_titles(state["detectors"], triggers)
+    queue = asyncio.Queue(maxsize=args.queue_size)
+    tailers = [asyncio.create_task(tail_log(state, key, spec, queue, args.poll_interval, stop))
+               for key, spec in incremental_logs(args).items()]
+
+    pending = set()
+    dirty = False
+    written = 0
+    last_entry = last_candidate = loop.time()
+    flush_requested = None
+    while True:
+        try:
+            key, entries = await asyncio.wait_for(queue.get(), args.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        else:
+            apply_watch_batch(state, key, entries, triggers)
+            dirty = True
+            last_entry = loop.time()
+            for title in sorted(candidate_titles(state["detectors"], triggers) - emitted):
+                emitted.add(title)
+                pending.add(title)
+                last_candidate = last_entry
+                emit_watch_event("candidate", title=title)
+
+        now = loop.time()
+        if args.idle_exit and now - last_entry >= args.idle_exit:
+            stop.set()
+        if stop.is_set():
+            # 모든 tailer가 마지막 read를 마치고 queue가 빌 때까지 계속 소비
+            if queue.empty() and all(tailer.done() for tailer in tailers):
+                break
+            continue
+        if not queue.empty():
+            continue
+        if flush.is_set() and flush_requested is None:
+            flush_requested = now
+        # flush 요청 후 한 poll 주기를 기다려 요청 직전에 쓰인 줄까지 포함
+        flush_due = flush_requested is not None and now - flush_requested >= args.poll_interval
+        if (flush_due
+                or pending and now - last_candidate >= args.debounce
+                or dirty and now - last_entry >= args.debounce):
+            if dirty or pending:
+                written += commit_watch(args, state, pending, triggers, timings)
+                pending = set()
+                dirty = False
+            if flush_due:
+                flush.clear()
+                flush_requested = None
+
+    if dirty or pending:
+        written += commit_watch(args, state, pending, triggers, timings)
+    return written
+
+
+def write_pid_file(path):
+    dir_path = os.path.dirname(path) or "."
+    os.makedirs(dir_path, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"{os.getpid()}\n")
+
+
+def remove_pid_file(path):
+    """Remove the pid file if it still names this process."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read().strip() == str(os.getpid()):
+                os.unlink(path)
+    except (IOError, OSError):
+        pass
 
 
 # --- Main ---
 
 def main():
     parser = argparse.ArgumentParser(description="Analyze session logs for learning patterns")
-    parser.add_argument("--activity", default=".orchestra/logs/activity.jsonl", help="Path to activity.jsonl (or legacy activity.log)")
-    parser.add_argument("--tests", default=".orchestra/logs/test-runs.log", help="Path to test-runs.log")
+    parser.add_argument("--activity", default=".orchestra/logs/activity.jsonl",
+                        help="Path to activity.jsonl (or legacy activity.log, or an event store directory)")
+    parser.add_argument("--tests", default=".orchestra/logs/test-runs.jsonl",
+                        help="Path to test-runs.jsonl (or legacy test-runs.log)")
     parser.add_argument("--tdd-guard", default=".orchestra/logs/tdd-guard.log", help="Path to tdd-guard.log")
-    parser.add_argument("--changes", default=".orchestra/logs/changes.jsonl", help="Path to changes.jsonl")
+    parser.add_argument("--changes", default=".orchestra/logs/changes.jsonl",
+                        help="Path to changes.jsonl (or an event store directory)")
     parser.add_argument("--config", default="hooks/learning/config.json", help="Path to config.json")
     parser.add_argument("--patterns-dir", default="hooks/learning/learned-patterns", help="Path to patterns directory")
     parser.add_argument("--max-patterns", type=int, default=5, help="Max patterns per session")
+    parser.add_argument("--window-entries", type=int, default=DEFAULT_WINDOW_ENTRIES,
+                        help="Newest entries to analyze per log (activity, tests, changes)")
+    parser.add_argument("--window-minutes", type=int, default=0,
+                        help="Only analyze entries from the last N minutes (0 = no time limit)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only process log bytes appended since the last run (state in --state-file)")
+    parser.add_argument("--state-file", default=DEFAULT_STATE_FILE,
+                        help="Incremental state file (log offsets + detector counters)")
+    parser.add_argument("--dedup-threshold", type=float, default=DEFAULT_DEDUP_THRESHOLD,
+                        help="Similarity at or above which a candidate updates an existing pattern")
+    parser.add_argument("--dedup-bands", type=int, default=DEFAULT_LSH_BANDS,
+                        help=f"LSH bands over the {MINHASH_PERMUTATIONS}-hash MinHash signature "
+                             "(more bands = higher recall, more candidates)")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Parse the logs in N worker processes (full mode; 1 = serial)")
+    parser.add_argument("--batch", nargs="+", metavar="ROOT",
+                        help="Batch mode: analyze the .orchestra/logs of these project roots (globs allowed) "
+                             "in --jobs worker processes and merge counts across projects into --patterns-dir")
+    parser.add_argument("--batch-state", default=None,
+                        help=f"Batch state file (per-project offsets + counters; default <patterns-dir>/{BATCH_STATE_FILE})")
+    parser.add_argument("--watch", action="store_true",
+                        help="Watch mode: follow the logs during the session and write candidates as they appear "
+                             "(shares --state-file with --incremental)")
+    parser.add_argument("--poll-interval", type=float, default=WATCH_POLL_SECONDS,
+                        help="Watch mode: seconds between polls of each log")
+    parser.add_argument("--debounce", type=float, default=WATCH_DEBOUNCE_SECONDS,
+                        help="Watch mode: seconds to wait after the last new candidate before writing")
+    parser.add_argument("--queue-size", type=int, default=WATCH_QUEUE_SIZE,
+                        help="Watch mode: max batches buffered between the log tailers and the detectors")
+    parser.add_argument("--idle-exit", type=float, default=WATCH_IDLE_EXIT_SECONDS,
+                        help="Watch mode: stop after N seconds without new entries (0 = never)")
+    parser.add_argument("--pid-file", default=DEFAULT_WATCH_PID_FILE,
+                        help="Watch mode: file holding the watcher PID while it runs")
+    parser.add_argument("--timeout", type=int, default=None,
+                        help=f"Abort after N seconds (0 = no limit; default {TIMEOUT_SECONDS}, batch/watch mode 0)")
+    parser.add_argument("--rebuild-dedup-index", action="store_true",
+                        help="Rebuild the pattern dedup index from the pattern files and exit")
+    parser.add_argument("--timings", action="store_true",
+                        help="Append per-stage wall/CPU time, item counts and peak RSS to --timings-file")
+    parser.add_argument("--timings-file", default=DEFAULT_TIMINGS_FILE,
+                        help="JSONL file that --timings records are appended to")
+    parser.add_argument("--memory", action="store_true",
+                        help="Trace Python heap allocations (tracemalloc) and add the peak heap per stage and "
+                             "overall to the --timings record (implies --timings; slows the analysis)")
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_PROFILE_FILE, default=None, metavar="PATH",
+                        help=f"Write a cProfile dump (pstats format) to PATH (default {DEFAULT_PROFILE_FILE}); "
+                             "implies --timings. With --jobs > 1 only the parent process is profiled")
     args = parser.parse_args()
+    if args.dedup_bands < 1 or MINHASH_PERMUTATIONS % args.dedup_bands:
+        parser.error(f"--dedup-bands must divide {MINHASH_PERMUTATIONS}")
+    if not args.watch:
+        # *.jsonl이 아직 없는 프로젝트는 레거시 텍스트 로그의 이력을 분석 (watch는 *.jsonl 생성을 기다림)
+        args.activity = resolve_legacy_log(args.activity)
+        args.tests = resolve_legacy_log(args.tests)
+
+    if args.rebuild_dedup_index:
+        index = load_pattern_index(args.patterns_dir, args.dedup_bands, rebuild=True)
+        save_pattern_index(index)
+        print(len(index["patterns"]))
+        return
+
+    timings = StageTimings()
+    profiler = cProfile.Profile() if args.profile else None
+    mode = "batch" if args.batch else "watch" if args.watch else "incremental" if args.incremental else "full"
+    outcome = {"mode": mode, "jobs": args.jobs,
+               "patterns": 0, "timedOut": False}
+
+    timeout = args.timeout if args.timeout is not None else (0 if args.batch or args.watch else TIMEOUT_SECONDS)
 
     # 타임아웃 설정 (SIGALRM - Unix only)
-    if hasattr(signal, 'SIGALRM'):
+    if hasattr(signal, 'SIGALRM') and timeout > 0:
         signal.signal(signal.SIGALRM, timeout_handler)
-        signal.alarm(TIMEOUT_SECONDS)
+        signal.alarm(timeout)
 
+    if args.memory:
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
     try:
-        # 모든 로그가 없으면 조기 종료
-        if not any([
-            os.path.isfile(args.activity),
-            os.path.isfile(args.tests),
-            os.path.isfile(args.tdd_guard),
-            os.path.isfile(args.changes)
-        ]):
-            print(0)
+        if args.batch:
+            # 여러 프로젝트: 변경된 프로젝트만 다시 스캔하고 카운터를 합산한 뒤 임계값 적용
+            batch_state_file = args.batch_state or os.path.join(args.patterns_dir, BATCH_STATE_FILE)
+            batch_state = load_batch_state(batch_state_file)
+            roots = expand_project_roots(args.batch)
+            triggers = load_triggers(args.config)
+            detectors, changes, rescanned = analyze_batch(
+                roots, batch_state, args.window_entries, triggers, args.jobs, timings)
+            os.makedirs(args.patterns_dir, exist_ok=True)
+            save_analyzer_state(batch_state_file, batch_state)
+            outcome["projects"] = len(roots)
+            outcome["rescanned"] = rescanned
+            if not rescanned:
+                print(0)
+                return
+            candidates = timings.run("build_patterns_from_state", build_patterns_from_state, detectors, changes,
+                                     triggers)
+            outcome["patterns"] = write_candidates(candidates, args, timings)
+            print(outcome["patterns"])
             return
 
-        # Parse logs
-        entries = parse_activity_log(args.activity)
-        test_entries = parse_test_log(args.tests)
-        tdd_guard_entries = parse_tdd_guard_log(args.tdd_guard)
-        changes = parse_changes_log(args.changes)
+        if args.watch:
+            # 실시간 모드: 로그가 아직 없어도 생길 때까지 대기
+            write_pid_file(args.pid_file)
+            try:
+                outcome["patterns"] = asyncio.run(watch_logs(args, load_triggers(args.config), timings))
+            finally:
+                remove_pid_file(args.pid_file)
+            print(outcome["patterns"])
+            return
 
-        if not entries and not test_entries and not tdd_guard_entries and not changes:
+        # 모든 로그가 없으면 조기 종료
+        if not any([
+            log_exists(args.activity),
+            log_exists(args.tests),
+            log_exists(args.tdd_guard),
+            log_exists(args.changes)
+        ]):
             print(0)
             return
 
-        # Load config triggers and existing patterns
         triggers = load_triggers(args.config)
-        existing = load_existing_patterns(args.patterns_dir)
-
-        # Detect patterns (pass changes for code example extraction)
-        candidates = []
-        candidates.extend(detect_errors(entries, test_entries, triggers, changes))
-        candidates.extend(detect_repeated_edits(entries, changes))
-        candidates.extend(detect_workarounds(entries, triggers))
-        candidates.extend(detect_tdd_issues(test_entries, tdd_guard_entries))
-
-        # Deduplicate & create/update
-        created_count = 0
-        updated_count = 0
-
-        for candidate in candidates:
-            if created_count + updated_count >= args.max_patterns:
-                break
 
-            kw = candidate.get("keywords", [])
-            dup_path = find_duplicate(kw, existing)
-
-            if dup_path:
-                update_pattern_file(dup_path)
-                updated_count += 1
-            else:
-                fpath = create_pattern_file(
-                    args.patterns_dir,
-                    candidate["category"],
-                    candidate["title"],
-                    candidate["problem"],
-                    candidate["solution"],
-                    candidate.get("code_example", ""),
-                    kw,
-                )
-                # Add to existing so subsequent candidates can dedup against it
-                existing.append({"path": fpath, "keywords": {k.lower() for k in kw}})
-                created_count += 1
-
-        total = created_count + updated_count
+        if args.incremental:
+            # 증분 모드: 마지막 실행 이후 추가된 바이트만 처리
+            state = load_analyzer_state(args.state_file)
+            new_entries = timings.run("read_logs_incremental", read_logs_incremental, state, incremental_logs(args),
+                                      items=lambda logs: sum(len(entries) for entries in logs.values()))
+            timings.run(
+                "update_detector_state",
+                update_detector_state,
+                state["detectors"],
+                new_entries["activity"],
+                new_entries["tests"],
+                new_entries["tddGuard"],
+                new_entries["changes"],
+                triggers,
+                items=None,
+            )
+            timings.run("save_analyzer_state", save_analyzer_state, args.state_file, state, items=None)
+
+            if not any(new_entries.values()):
+                print(0)
+                return
+
+            # Code examples come from the newest changes window
+            changes = timings.run("parse_changes_log", parse_changes_log, args.changes, args.window_entries)
+            candidates = timings.run("build_patterns_from_state", build_patterns_from_state,
+                                     state["detectors"], changes, triggers)
+        else:
+            # Parse logs (newest window only, read tail-first)
+            since = None
+            if args.window_minutes > 0:
+                since = datetime.now(timezone.utc).timestamp() - args.window_minutes * 60
+            # 네 로그는 서로 독립적이므로 --jobs > 1이면 동시에 파싱
+            entries, test_entries, tdd_guard_entries, changes = timings.run_parallel(args.jobs, [
+                ("parse_activity_log", parse_activity_log, (args.activity, args.window_entries, since)),
+                ("parse_test_log", parse_test_log, (args.tests, args.window_entries, since)),
+                ("parse_tdd_guard_log", parse_tdd_guard_log, (args.tdd_guard, args.window_entries, since)),
+                ("parse_changes_log", parse_changes_log, (args.changes, args.window_entries, since)),
+            ])
+
+            if not entries and not test_entries and not tdd_guard_entries and not changes:
+                print(0)
+                return
+
+            # 모든 detector를 한 번의 로그 순회로 실행 (changes는 코드 예시 추출에도 사용)
+            detectors = new_detector_state()
+            timings.run("update_detector_state", update_detector_state,
+                        detectors, entries, test_entries, tdd_guard_entries, changes, triggers, items=None)
+            candidates = timings.run("build_patterns_from_state", build_patterns_from_state,
+                                     detectors, changes, triggers)
+
+        total = write_candidates(candidates, args, timings)
+        outcome["patterns"] = total
         print(total)
 
     except TimeoutError:
-        sys.stderr.write(f"Analysis timed out after {TIMEOUT_SECONDS} seconds\n")
+        outcome["timedOut"] = True
+        outcome["interruptedStage"] = timings.current
+        sys.stderr.write(
+            f"Analysis timed out after {timeout} seconds in stage {timings.current or 'setup'}"
+            f" (completed: {timings.summary() or 'none'})\n"
+        )
         print(0)
     finally:
         # 타임아웃 해제
         if hasattr(signal, 'SIGALRM'):
             signal.alarm(0)
+        if profiler:
+            profiler.disable()
+            try:
+                os.makedirs(os.path.dirname(args.profile) or ".", exist_ok=True)
+                profiler.dump_stats(args.profile)
+            except OSError as e:
+                sys.stderr.write(f"Error writing profile: {e}\n")
+        if args.timings or args.profile or args.memory:
+            try:
+                append_timings(args.timings_file, timings.record(**outcome))
+            except OSError as e:
+                sys.stderr.write(f"Error writing timings: {e}\n")
 
 
 if __name__ == "__main__":
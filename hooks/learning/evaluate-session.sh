@@ -11,6 +11,8 @@ SCRIPT_DIR="${PLUGIN_ROOT}/hooks/learning"
 CONFIG_FILE="$SCRIPT_DIR/config.json"
 STATE_FILE=".orchestra/state.json"
 LOG_FILE=".orchestra/logs/learning.log"
+ANALYZER_STATE_FILE=".orchestra/logs/.analyzer-state.json"
+WATCH_PID_FILE=".orchestra/logs/.analyzer-watch.pid"
 
 # 패턴 저장 경로 (사용자 프로젝트 우선)
 if [ -d ".orchestra/learning" ]; then
@@ -73,16 +75,118 @@ load_config() {
     MIN_SESSION_LENGTH=$(jq -r '.minSessionLength // 10' "$CONFIG_FILE")
     AUTO_APPROVE=$(jq -r '.autoApprove // false' "$CONFIG_FILE")
     MAX_PATTERNS=$(jq -r '.extractionRules.maxPatternsPerSession // 5' "$CONFIG_FILE")
-    MAX_LOG_SIZE_MB=$(jq -r '.extractionRules.maxLogSizeMB // 10' "$CONFIG_FILE")
+    WINDOW_ENTRIES=$(jq -r '.extractionRules.windowEntries // 10000' "$CONFIG_FILE")
+    WINDOW_MINUTES=$(jq -r '.extractionRules.windowMinutes // 0' "$CONFIG_FILE")
+    INCREMENTAL=$(jq -r '.extractionRules.incremental // false' "$CONFIG_FILE")
+    DEDUP_THRESHOLD=$(jq -r '.extractionRules.dedupThreshold // 0.5' "$CONFIG_FILE")
+    DEDUP_BANDS=$(jq -r '.extractionRules.dedupBands // 16' "$CONFIG_FILE")
+    ANALYZER_JOBS=$(jq -r '.extractionRules.jobs // 1' "$CONFIG_FILE")
+    ANALYZER_TIMINGS=$(jq -r '.extractionRules.timings // false' "$CONFIG_FILE")
+    WATCH_ENABLED=$(jq -r '.watcher.enabled // false' "$CONFIG_FILE")
+    WATCH_POLL_SECONDS=$(jq -r '.watcher.pollSeconds // 1' "$CONFIG_FILE")
+    WATCH_DEBOUNCE_SECONDS=$(jq -r '.watcher.debounceSeconds // 5' "$CONFIG_FILE")
+    WATCH_QUEUE_SIZE=$(jq -r '.watcher.queueSize // 64' "$CONFIG_FILE")
+    WATCH_IDLE_EXIT_MINUTES=$(jq -r '.watcher.idleExitMinutes // 30' "$CONFIG_FILE")
+    # `// true`는 false도 기본값으로 바꾸므로 명시적으로 비교
+    ROTATE_ENABLED=$(jq -r 'if .logRotation.enabled == false then "false" else "true" end' "$CONFIG_FILE")
+    ROTATE_MAX_BYTES=$(jq -r '.logRotation.maxBytes // 5242880' "$CONFIG_FILE")
+    ROTATE_MAX_AGE_DAYS=$(jq -r '.logRotation.maxAgeDays // 7' "$CONFIG_FILE")
+    ROTATE_COMPRESSION=$(jq -r '.logRotation.compression // "gzip"' "$CONFIG_FILE")
+    ROTATE_MAX_SEGMENTS=$(jq -r '.logRotation.maxSegments // 20' "$CONFIG_FILE")
   else
     ENABLED="false"
     MIN_SESSION_LENGTH=10
     AUTO_APPROVE="false"
     MAX_PATTERNS=5
-    MAX_LOG_SIZE_MB=10
+    WINDOW_ENTRIES=10000
+    WINDOW_MINUTES=0
+    INCREMENTAL="false"
+    DEDUP_THRESHOLD=0.5
+    DEDUP_BANDS=16
+    ANALYZER_JOBS=1
+    ANALYZER_TIMINGS="false"
+    WATCH_ENABLED="false"
+    WATCH_POLL_SECONDS=1
+    WATCH_DEBOUNCE_SECONDS=5
+    WATCH_QUEUE_SIZE=64
+    WATCH_IDLE_EXIT_MINUTES=30
+    ROTATE_ENABLED="true"
+    ROTATE_MAX_BYTES=5242880
+    ROTATE_MAX_AGE_DAYS=7
+    ROTATE_COMPRESSION="gzip"
+    ROTATE_MAX_SEGMENTS=20
   fi
 }
 
+# 크기/기간 초과 로그를 .orchestra/logs/archive/ 압축 세그먼트로 rotate
+# (분석기는 live 로그와 아카이브를 하나의 스트림으로 읽음)
+rotate_logs() {
+  python3 "$SCRIPT_DIR/log-archive.py" rotate \
+    --log-dir ".orchestra/logs" \
+    --max-bytes "$ROTATE_MAX_BYTES" \
+    --max-age-days "$ROTATE_MAX_AGE_DAYS" \
+    --compression "$ROTATE_COMPRESSION" \
+    --max-segments "$ROTATE_MAX_SEGMENTS" 2>>"$LOG_FILE" || echo 0
+}
+
+# 실시간 watcher (analyze-session.py --watch): 실행 중이면 PID 출력
+watcher_pid() {
+  local pid
+  pid=$(cat "$WATCH_PID_FILE" 2>/dev/null) || return 1
+  [ -n "$pid" ] && kill -0 "$pid" 2>/dev/null && echo "$pid"
+}
+
+# watcher가 없으면 백그라운드로 시작, 있으면 대기 중인 후보를 flush (SIGUSR1)
+start_or_flush_watcher() {
+  local activity_log="$1"
+  local pid
+  if pid=$(watcher_pid); then
+    kill -USR1 "$pid" 2>/dev/null || true
+    echo "flushed $pid"
+    return 0
+  fi
+  start_watcher "$activity_log"
+}
+
+# 실행 중인 watcher 종료 (SIGTERM: 대기 중인 후보를 기록하고 상태 저장 후 종료)
+stop_watcher() {
+  local pid
+  if pid=$(watcher_pid); then
+    kill -TERM "$pid" 2>/dev/null || true
+    echo "$pid"
+    return 0
+  fi
+  return 1
+}
+
+# watcher를 백그라운드로 시작
+start_watcher() {
+  local activity_log="$1"
+  local analyzer_args=()
+  if [ "$ANALYZER_TIMINGS" = "true" ]; then
+    analyzer_args+=(--timings)
+  fi
+  nohup python3 "$SCRIPT_DIR/analyze-session.py" --watch \
+    --activity "$activity_log" \
+    --tests ".orchestra/logs/test-runs.jsonl" \
+    --tdd-guard ".orchestra/logs/tdd-guard.log" \
+    --changes ".orchestra/logs/changes.jsonl" \
+    --config "$CONFIG_FILE" \
+    --patterns-dir "$PATTERNS_DIR" \
+    --max-patterns "$MAX_PATTERNS" \
+    --window-entries "$WINDOW_ENTRIES" \
+    --dedup-threshold "$DEDUP_THRESHOLD" \
+    --dedup-bands "$DEDUP_BANDS" \
+    --state-file "$ANALYZER_STATE_FILE" \
+    --pid-file "$WATCH_PID_FILE" \
+    --poll-interval "$WATCH_POLL_SECONDS" \
+    --debounce "$WATCH_DEBOUNCE_SECONDS" \
+    --queue-size "$WATCH_QUEUE_SIZE" \
+    --idle-exit "$((WATCH_IDLE_EXIT_MINUTES * 60))" \
+    "${analyzer_args[@]}" >>"$LOG_FILE" 2>&1 &
+  echo "started $!"
+}
+
 # 패턴 ID 생성 (xxd 대신 od 사용)
 generate_pattern_id() {
   local category="$1"
@@ -129,47 +233,12 @@ $code_example
 
 ## Trigger Keywords
 $keywords
-
-## Usage Count
-1
-
-## Last Used
-$(date -u +%Y-%m-%dT%H:%M:%SZ)
 EOF
 
   echo "$pattern_id"
   log "Created pattern: $pattern_id - $title"
 }
 
-# 패턴 Usage Count 증가 및 Last Used 갱신
-update_pattern_usage() {
-  local pattern_file="$1"
-  if [ ! -f "$pattern_file" ]; then
-    return
-  fi
-  python3 -c "
-import re, sys
-from datetime import datetime, timezone
-
-path = sys.argv[1]
-with open(path, 'r', encoding='utf-8') as f:
-    content = f.read()
-
-# Update Usage Count
-m = re.search(r'(## Usage Count\n)(\d+)', content)
-if m:
-    old = int(m.group(2))
-    content = content[:m.start(2)] + str(old + 1) + content[m.end(2):]
-
-# Update Last Used
-now = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
-content = re.sub(r'(## Last Used\n).*', r'\g<1>' + now, content)
-
-with open(path, 'w', encoding='utf-8') as f:
-    f.write(content)
-" "$pattern_file"
-}
-
 # 상태 업데이트
 update_state() {
   local patterns_extracted="$1"
@@ -199,7 +268,16 @@ list_patterns() {
     if [ -f "$pattern_file" ]; then
       local title=$(grep "^# Pattern:" "$pattern_file" | sed 's/# Pattern: //')
       local category=$(grep "^## Category" -A 1 "$pattern_file" | tail -1)
-      local usage=$(grep "^## Usage Count" -A 1 "$pattern_file" | tail -1)
+      # Usage Count는 .pattern-meta.json 우선, 없으면 (이전 형식) 파일 섹션, 둘 다 없으면 1
+      local usage=""
+      if [ -f "$PATTERNS_DIR/.pattern-meta.json" ] && command -v jq &> /dev/null; then
+        usage=$(jq -r --arg f "$(basename "$pattern_file")" '.patterns[$f].usageCount // empty' \
+          "$PATTERNS_DIR/.pattern-meta.json" 2>/dev/null)
+      fi
+      if [ -z "$usage" ]; then
+        usage=$(grep "^## Usage Count" -A 1 "$pattern_file" | tail -1)
+      fi
+      usage="${usage:-1}"
       local id=$(basename "$pattern_file" .md)
 
       printf "  [%s] %s (usage: %s) (%s)\n" "$category" "$title" "$usage" "$id"
@@ -215,32 +293,6 @@ list_patterns() {
   fi
 }
 
-# 로그 크기 체크 (MB)
-check_log_size() {
-  local log_path="$1"
-  local max_mb="$2"
-
-  if [ ! -f "$log_path" ]; then
-    return 0  # 파일 없으면 OK
-  fi
-
-  # 크로스 플랫폼 파일 크기 확인
-  local size_bytes
-  if [[ "$OSTYPE" == "darwin"* ]]; then
-    size_bytes=$(stat -f %z "$log_path" 2>/dev/null || echo 0)
-  else
-    size_bytes=$(stat -c %s "$log_path" 2>/dev/null || echo 0)
-  fi
-
-  local size_mb=$((size_bytes / 1024 / 1024))
-
-  if [ "$size_mb" -gt "$max_mb" ]; then
-    log "Log too large (${size_mb}MB > ${max_mb}MB): $log_path"
-    return 1
-  fi
-  return 0
-}
-
 # 메인 로직
 main() {
   local command="${1:-evaluate}"
@@ -273,6 +325,24 @@ main() {
 
       local activity_log="${2:-.orchestra/logs/activity.log}"
 
+      # 실시간 모드: SessionStart(load-context.sh)에서 시작된 watcher가 세션 도중 이미 분석했으므로
+      # Stop 시점에는 종료만 요청 (남은 후보 기록 + 상태 저장). watcher가 없으면 (idle 종료 등)
+      # 같은 상태 파일로 증분 분석해 watcher가 읽지 못한 나머지를 처리
+      if [ "$WATCH_ENABLED" = "true" ]; then
+        local watcher
+        if watcher=$(stop_watcher); then
+          log "Watcher stopped: $watcher"
+          if [ "$ROTATE_ENABLED" = "true" ]; then
+            local rotated
+            rotated=$(rotate_logs)
+            [ "${rotated:-0}" != "0" ] && log "Rotated logs: $rotated"
+          fi
+          echo "0"
+          exit 0
+        fi
+        log "Watcher not running, analyzing incrementally"
+      fi
+
       # 로그 파일 존재 확인
       if [ ! -f "$activity_log" ]; then
         log "No activity log found: $activity_log"
@@ -280,12 +350,6 @@ main() {
         exit 0
       fi
 
-      # 로그 크기 체크
-      if ! check_log_size "$activity_log" "$MAX_LOG_SIZE_MB"; then
-        echo "0"
-        exit 0
-      fi
-
       # 최소 세션 길이 체크
       local line_count=$(wc -l < "$activity_log" 2>/dev/null | tr -d ' ' || echo 0)
       if [ "$line_count" -lt "$MIN_SESSION_LENGTH" ]; then
@@ -294,19 +358,42 @@ main() {
         exit 0
       fi
 
+      # 증분 모드: 이전 실행 이후 추가된 로그만 분석 (watcher와 같은 상태 파일)
+      local analyzer_args=()
+      if [ "$INCREMENTAL" = "true" ] || [ "$WATCH_ENABLED" = "true" ]; then
+        analyzer_args=(--incremental --state-file "$ANALYZER_STATE_FILE")
+      fi
+      # 단계별 소요 시간/메모리 기록 (.orchestra/logs/analyzer-timings.jsonl)
+      if [ "$ANALYZER_TIMINGS" = "true" ]; then
+        analyzer_args+=(--timings)
+      fi
+
       # Python 분석기 호출
       local count
       count=$(python3 "$SCRIPT_DIR/analyze-session.py" \
         --activity "$activity_log" \
-        --tests ".orchestra/logs/test-runs.log" \
+        --tests ".orchestra/logs/test-runs.jsonl" \
         --tdd-guard ".orchestra/logs/tdd-guard.log" \
         --changes ".orchestra/logs/changes.jsonl" \
         --config "$CONFIG_FILE" \
         --patterns-dir "$PATTERNS_DIR" \
-        --max-patterns "$MAX_PATTERNS" 2>>"$LOG_FILE") || count=0
+        --max-patterns "$MAX_PATTERNS" \
+        --window-entries "$WINDOW_ENTRIES" \
+        --window-minutes "$WINDOW_MINUTES" \
+        --dedup-threshold "$DEDUP_THRESHOLD" \
+        --dedup-bands "$DEDUP_BANDS" \
+        --jobs "$ANALYZER_JOBS" \
+        "${analyzer_args[@]}" 2>>"$LOG_FILE") || count=0
 
       update_state "${count:-0}"
 
+      # 분석이 끝난 뒤 rotate (다음 세션의 최소 길이 체크는 새 live 로그 기준)
+      if [ "$ROTATE_ENABLED" = "true" ]; then
+        local rotated
+        rotated=$(rotate_logs)
+        [ "${rotated:-0}" != "0" ] && log "Rotated logs: $rotated"
+      fi
+
       echo "${count:-0}"
       log "Session evaluation complete. Patterns: ${count:-0}"
       ;;
@@ -325,14 +412,73 @@ main() {
       echo "Pattern added"
       ;;
 
+    reindex)
+      local indexed
+      indexed=$(python3 "$SCRIPT_DIR/analyze-session.py" \
+        --patterns-dir "$PATTERNS_DIR" \
+        --dedup-bands "$DEDUP_BANDS" \
+        --rebuild-dedup-index 2>>"$LOG_FILE") || indexed=0
+      echo "Dedup index rebuilt: ${indexed:-0} patterns"
+      log "Dedup index rebuilt: ${indexed:-0} patterns"
+      indexed=$(python3 "$SCRIPT_DIR/pattern-search.py" reindex \
+        --patterns-dir "$PATTERNS_DIR" 2>>"$LOG_FILE") || indexed=0
+      echo "Search index rebuilt: ${indexed:-0} patterns"
+      log "Search index rebuilt: ${indexed:-0} patterns"
+      ;;
+
+    session-start)
+      # SessionStart 훅(load-context.sh): watcher.enabled이면 세션 동안 실시간 학습 watcher 실행
+      if [ "$ENABLED" != "true" ] || [ "$WATCH_ENABLED" != "true" ] || ! command -v python3 &> /dev/null; then
+        exit 0
+      fi
+      local pid
+      if pid=$(watcher_pid); then
+        log "Watcher already running: $pid"
+        exit 0
+      fi
+      log "Watcher $(start_watcher "${2:-.orchestra/logs/activity.log}")"
+      ;;
+
+    watch)
+      if ! command -v python3 &> /dev/null; then
+        echo "Python3 not available"
+        exit 1
+      fi
+      local watcher
+      watcher=$(start_or_flush_watcher "${2:-.orchestra/logs/activity.jsonl}")
+      echo "Watcher $watcher"
+      log "Watcher $watcher"
+      ;;
+
+    watch-stop)
+      local pid
+      if pid=$(watcher_pid); then
+        kill -TERM "$pid" 2>/dev/null || true
+        echo "Watcher stopped: $pid"
+        log "Watcher stopped: $pid"
+      else
+        echo "Watcher not running"
+      fi
+      ;;
+
+    rotate)
+      local rotated
+      rotated=$(rotate_logs)
+      echo "Rotated logs: ${rotated:-0}"
+      log "Rotated logs: ${rotated:-0}"
+      ;;
+
     clear)
       echo "Clearing all learned patterns..."
-      rm -f "$PATTERNS_DIR"/*.md
+      # 패턴 파일과 함께 파생 저장소도 삭제 (남으면 이전 카운터와 검색 결과가 살아남음)
+      rm -f "$PATTERNS_DIR"/*.md "$PATTERNS_DIR/.pattern-index.json" \
+        "$PATTERNS_DIR/.pattern-meta.json" "$PATTERNS_DIR/.pattern-meta.lock" \
+        "$PATTERNS_DIR/.pattern-search.db" "$PATTERNS_DIR/.pattern-search.db-journal"
       echo "All patterns cleared"
       ;;
 
     *)
-      echo "Usage: $0 {evaluate|list|add|clear}"
+      echo "Usage: $0 {evaluate|session-start|watch|watch-stop|list|add|reindex|rotate|clear}"
       exit 1
       ;;
   esac
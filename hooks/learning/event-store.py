@@ -0,0 +1,591 @@
+#!/usr/bin/env python3
+"""
+Compact append-only event store for activity/changes logs.
+
+A store is a directory of segment files (00000001.seg, 00000002.seg, ...).
+Only the newest segment is appended to; once it reaches the segment size it is
+sealed with a timestamp index and a new segment is started.
+
+Segment layout (little-endian):
+  header   "OES1" kind:u8 pad:3            kind 1 = activity, 2 = changes
+  records  length:u32 tag:u8 body[length]
+           tag 1 STRING  utf-8 text, gets the next string id of the segment
+           tag 2 EVENT   epoch:f64 present:u16 fields...
+                         interned field → string id:u32, text field → length:u32 + utf-8
+           tag 3 INDEX   events:u32 stride:u32 lastEpoch:f64 (epoch:f64 offset:u32)*
+  trailer  indexOffset:u32 "OESI"           sealed segments only
+
+Interned fields (type/phase/name, tool/file/language) are stored once per
+segment, so a segment is self-contained. Epochs are computed when an event is
+written, so readers filter by time without parsing timestamps; NaN marks an
+unparseable timestamp. Readers mmap the segments and decode only the events
+they return.
+
+Usage:
+  python3 event-store.py import {activity|changes} SRC STORE [--segment-bytes N]
+  python3 event-store.py export STORE [DST] [--format jsonl|text] [--since ISO] [--until ISO]
+  python3 event-store.py stats STORE
+
+import reads activity.jsonl / legacy activity.log / changes.jsonl and appends
+to STORE; export writes the events back as JSONL (or legacy activity text).
+The analyzer accepts a store directory wherever it takes --activity/--changes.
+"""
+
+import argparse
+import bisect
+import importlib.util
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+
+SEGMENT_MAGIC = b"OES1"
+TRAILER_MAGIC = b"OESI"
+SEGMENT_SUFFIX = ".seg"
+DEFAULT_SEGMENT_BYTES = 4 * 1024 * 1024
+INDEX_STRIDE = 64
+
+HEADER = struct.Struct("<4sB3x")
+RECORD = struct.Struct("<IB")
+EVENT_HEAD = struct.Struct("<dH")
+INDEX_HEAD = struct.Struct("<IId")
+INDEX_ENTRY = struct.Struct("<dI")
+TRAILER = struct.Struct("<I4s")
+U32 = struct.Struct("<I")
+
+TAG_STRING = 1
+TAG_EVENT = 2
+TAG_INDEX = 3
+
+# (kind id, timestamp field, [(field, interned)]) — 필드 순서가 곧 present 비트 순서
+SCHEMAS = {
+    "activity": (1, "ts", [
+        ("ts", False), ("type", True), ("phase", True), ("name", True), ("detail", False),
+    ]),
+    "changes": (2, "timestamp", [
+        ("timestamp", False), ("tool", True), ("file", True), ("language", True),
+        ("old_string", False), ("new_string", False), ("content_sample", False),
+    ]),
+}
+KIND_NAMES = {kind_id: name for name, (kind_id, _, _) in SCHEMAS.items()}
+SCHEMA_FIELDS = {kind: {field for field, _ in fields} for kind, (_, _, fields) in SCHEMAS.items()}
+# 스키마 밖의 키 (또는 문자열이 아닌 값)는 JSON 텍스트 하나로 보존
+EXTRA_BIT = 1 << 15
+
+
+def segment_name(number):
+    return f"{number:08d}{SEGMENT_SUFFIX}"
+
+
+def segment_paths(path):
+    """Sorted segment file paths of a store directory."""
+    try:
+        names = sorted(n for n in os.listdir(path) if n.endswith(SEGMENT_SUFFIX))
+    except OSError:
+        return []
+    return [os.path.join(path, n) for n in names]
+
+
+def is_store(path):
+    """True if `path` is an event store directory with at least one segment."""
+    return bool(path) and os.path.isdir(path) and bool(segment_paths(path))
+
+
+def epoch_or_nan(epoch):
+    return math.nan if epoch is None else float(epoch)
+
+
+# --- Reading ---
+
+class Segment:
+    """One memory-mapped segment file. Bodies are decoded straight from the mapping."""
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                raise ValueError(f"truncated segment header: {path}")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self._map)
+        magic, kind_id = HEADER.unpack_from(self.view, 0)
+        if magic != SEGMENT_MAGIC or kind_id not in KIND_NAMES:
+            self.close()
+            raise ValueError(f"not an event segment: {path}")
+        self.kind = KIND_NAMES[kind_id]
+        _, self.ts_field, self.fields = SCHEMAS[self.kind]
+        self.layout = [(1 << bit, field, interned) for bit, (field, interned) in enumerate(self.fields)]
+        self.size = size
+        self.index = self._read_index()
+
+    def close(self):
+        self.view.release()
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read_index(self):
+        """Return (events, stride, last_epoch, [epoch], [offset]) of a sealed segment, or None."""
+        if self.size < HEADER.size + TRAILER.size:
+            return None
+        index_offset, magic = TRAILER.unpack_from(self.view, self.size - TRAILER.size)
+        if magic != TRAILER_MAGIC or index_offset + RECORD.size > self.size:
+            return None
+        length, tag = RECORD.unpack_from(self.view, index_offset)
+        if tag != TAG_INDEX:
+            return None
+        pos = index_offset + RECORD.size
+        events, stride, last_epoch = INDEX_HEAD.unpack_from(self.view, pos)
+        pos += INDEX_HEAD.size
+        entries = list(INDEX_ENTRY.iter_unpack(self.view[pos:index_offset + RECORD.size + length]))
+        return events, stride, last_epoch, [e for e, _ in entries], [o for _, o in entries]
+
+    @property
+    def sealed(self):
+        return self.index is not None
+
+    def last_epoch(self):
+        return self.index[2] if self.index else math.nan
+
+    def scan(self, start=HEADER.size, strings=None, stop=None):
+        """Hop over complete records from `start` (up to `stop`).
+
+        Returns (strings, event_offsets, end): the string table (extended in
+        place when given), the offsets of EVENT records and the offset just
+        past the last complete record. Event bodies are not decoded.
+        """
+        strings = [] if strings is None else strings
+        events = []
+        view = self.view
+        pos = start
+        size = self.size if stop is None else min(stop, self.size)
+        while pos + RECORD.size <= size:
+            length, tag = RECORD.unpack_from(view, pos)
+            body = pos + RECORD.size
+            if body + length > size:
+                break
+            if tag == TAG_STRING:
+                strings.append(self._map[body:body + length].decode("utf-8"))
+            elif tag == TAG_EVENT:
+                events.append(pos)
+            elif tag == TAG_INDEX:
+                break
+            pos = body + length
+        return strings, events, pos
+
+    def event_epoch(self, offset):
+        return EVENT_HEAD.unpack_from(self.view, offset + RECORD.size)[0]
+
+    def decode(self, offset, strings):
+        """Decode the EVENT record at `offset` into an entry dict."""
+        data = self._map
+        unpack_u32 = U32.unpack_from
+        pos = offset + RECORD.size
+        _, present = EVENT_HEAD.unpack_from(data, pos)
+        pos += EVENT_HEAD.size
+        entry = {}
+        for bit, field, interned in self.layout:
+            if present & bit:
+                value, = unpack_u32(data, pos)
+                pos += 4
+                if interned:
+                    entry[field] = strings[value]
+                else:
+                    # struct 해석은 매핑 위에서 직접, 문자열만 필요한 바이트를 복사해 디코딩
+                    entry[field] = data[pos:pos + value].decode("utf-8")
+                    pos += value
+        if present & EXTRA_BIT:
+            length, = unpack_u32(data, pos)
+            pos += 4
+            entry.update(json.loads(data[pos:pos + length].decode("utf-8")))
+        return entry
+
+
+def open_segments(path):
+    """Map every segment of a store, oldest first. Unreadable segments are skipped."""
+    segments = []
+    for seg_path in segment_paths(path):
+        try:
+            segments.append(Segment(seg_path))
+        except (OSError, ValueError) as e:
+            sys.stderr.write(f"Skipping event segment {seg_path}: {e}\n")
+    return segments
+
+
+def close_segments(segments):
+    for segment in segments:
+        segment.close()
+
+
+def iter_window(path, max_entries, since=None):
+    """Yield the newest events of a store in chronological order.
+
+    Same contract as the analyzer's tail-first log window: stop after
+    `max_entries` events or at the first event (walking backwards) whose epoch
+    is older than `since`. A sealed segment whose last event is older than
+    `since` ends the scan without being decoded.
+    """
+    if max_entries <= 0:
+        return
+    segments = open_segments(path)
+    window = []
+    try:
+        for segment in reversed(segments):
+            last = segment.last_epoch()
+            if since is not None and not math.isnan(last) and last < since:
+                break
+            strings, offsets, _ = segment.scan()
+            done = False
+            for offset in reversed(offsets):
+                if since is not None:
+                    epoch = segment.event_epoch(offset)
+                    if epoch < since:
+                        done = True
+                        break
+                window.append(segment.decode(offset, strings))
+                if len(window) >= max_entries:
+                    done = True
+                    break
+            if done:
+                break
+    finally:
+        close_segments(segments)
+    yield from reversed(window)
+
+
+def iter_range(path, since=None, until=None):
+    """Yield events with since <= epoch < until in store order.
+
+    Uses the timestamp index of sealed segments to skip whole segments and to
+    start inside a segment near `since` (events are assumed to be appended in
+    time order, as the hooks write them). Events with an unparseable timestamp
+    have no place in time and are skipped when a bound is given.
+    """
+    segments = open_segments(path)
+    try:
+        for segment in segments:
+            index = segment.index
+            start = HEADER.size
+            if index is not None:
+                _, _, last, epochs, index_offsets = index
+                if until is not None and epochs and epochs[0] >= until:
+                    break
+                if since is not None:
+                    if not math.isnan(last) and last < since:
+                        continue
+                    k = bisect.bisect_left(epochs, since)
+                    if k > 1:
+                        start = index_offsets[k - 1]
+            if start == HEADER.size:
+                strings, offsets, _ = segment.scan()
+            else:
+                # 문자열 테이블은 세그먼트 앞부분부터 필요
+                strings, _, _ = segment.scan(HEADER.size)
+                _, offsets, _ = segment.scan(start, [])
+            for offset in offsets:
+                epoch = segment.event_epoch(offset)
+                if since is not None and not epoch >= since:
+                    continue
+                if until is not None and not epoch < until:
+                    continue
+                yield segment.decode(offset, strings)
+    finally:
+        close_segments(segments)
+
+
+# --- Incremental Positions ---
+
+def end_position(path):
+    """Position just past the last complete record of the store."""
+    paths = segment_paths(path)
+    if not paths:
+        return {"segment": "", "offset": 0}
+    with Segment(paths[-1]) as segment:
+        _, _, end = segment.scan()
+    return {"segment": os.path.basename(paths[-1]), "offset": end}
+
+
+def position_valid(path, position):
+    """True if the segment of `position` still exists and is at least that long."""
+    name = position.get("segment", "")
+    if not name:
+        return True
+    try:
+        return os.path.getsize(os.path.join(path, name)) >= position.get("offset", 0)
+    except OSError:
+        return False
+
+
+def read_appended(path, position):
+    """Decode events appended after `position`. Returns (entries, new_position)."""
+    entries = []
+    name, offset = position.get("segment", ""), position.get("offset", 0)
+    new_position = dict(position)
+    segments = [s for s in open_segments(path) if s.name >= name]
+    try:
+        for segment in segments:
+            start = offset if segment.name == name and offset > HEADER.size else HEADER.size
+            # 이어 읽을 때도 문자열 id는 세그먼트 처음부터 매겨짐
+            strings, _, _ = segment.scan(stop=start)
+            strings, offsets, end = segment.scan(start, strings)
+            entries.extend(segment.decode(o, strings) for o in offsets)
+            new_position = {"segment": segment.name, "offset": end}
+    finally:
+        close_segments(segments)
+    return entries, new_position
+
+
+# --- Writing ---
+
+class EventWriter:
+    """Append events to a store (single writer). Reopens the newest unsealed segment."""
+
+    def __init__(self, path, kind, segment_bytes=DEFAULT_SEGMENT_BYTES):
+        if kind not in SCHEMAS:
+            raise ValueError(f"unknown event kind: {kind}")
+        self.path = path
+        self.kind = kind
+        self.kind_id, self.ts_field, self.fields = SCHEMAS[kind]
+        self.segment_bytes = segment_bytes
+        os.makedirs(path, exist_ok=True)
+        self.file = None
+        paths = segment_paths(path)
+        if paths:
+            self._reopen(paths[-1], len(paths))
+        else:
+            self._start_segment(1)
+
+    def _reopen(self, seg_path, number):
+        with Segment(seg_path) as segment:
+            if segment.kind != self.kind:
+                raise ValueError(f"{self.path} stores {segment.kind} events, not {self.kind}")
+            if segment.sealed:
+                sealed = True
+            else:
+                sealed = False
+                strings, offsets, end = segment.scan()
+                epochs = [segment.event_epoch(o) for o in offsets]
+        if sealed:
+            self._start_segment(number + 1)
+            return
+        self.number = number
+        self.file = open(seg_path, "r+b")
+        # 쓰다 만 마지막 레코드는 버림
+        self.file.truncate(end)
+        self.file.seek(end)
+        self.size = end
+        self.strings = {s: i for i, s in enumerate(strings)}
+        self.events = 0
+        self.index = []
+        self.last_epoch = -math.inf
+        self.event_last_epoch = math.nan
+        for i, (offset, epoch) in enumerate(zip(offsets, epochs)):
+            self._note_event(i, offset, epoch)
+
+    def _start_segment(self, number):
+        if self.file:
+            self.file.close()
+        self.number = number
+        self.file = open(os.path.join(self.path, segment_name(number)), "wb")
+        self.file.write(HEADER.pack(SEGMENT_MAGIC, self.kind_id))
+        self.size = HEADER.size
+        self.strings = {}
+        self.events = 0
+        self.index = []
+        self.last_epoch = -math.inf
+        self.event_last_epoch = math.nan
+
+    def _note_event(self, i, offset, epoch):
+        # 인덱스 epoch은 마지막으로 파싱된 값을 이어 써서 bisect 가능하게 유지
+        if not math.isnan(epoch):
+            self.last_epoch = epoch
+        if i % INDEX_STRIDE == 0:
+            self.index.append((self.last_epoch, offset))
+        self.events = i + 1
+        self.event_last_epoch = epoch
+
+    def _write_record(self, tag, body):
+        self.file.write(RECORD.pack(len(body), tag))
+        self.file.write(body)
+        offset = self.size
+        self.size += RECORD.size + len(body)
+        return offset
+
+    def _intern(self, value):
+        sid = self.strings.get(value)
+        if sid is None:
+            sid = self.strings[value] = len(self.strings)
+            self._write_record(TAG_STRING, value.encode("utf-8"))
+        return sid
+
+    def append(self, entry, epoch=None):
+        """Append one entry dict. `epoch` is its timestamp in epoch seconds (None if unknown)."""
+        if self.size >= self.segment_bytes and self.events:
+            self.seal()
+            self._start_segment(self.number + 1)
+        epoch = epoch_or_nan(epoch)
+        present = 0
+        parts = []
+        extra = {}
+        for key, value in entry.items():
+            if key not in SCHEMA_FIELDS[self.kind] or not isinstance(value, str):
+                extra[key] = value
+        for bit, (field, interned) in enumerate(self.fields):
+            value = entry.get(field)
+            if not isinstance(value, str):
+                continue
+            present |= 1 << bit
+            if interned:
+                parts.append(U32.pack(self._intern(value)))
+            else:
+                data = value.encode("utf-8")
+                parts.append(U32.pack(len(data)))
+                parts.append(data)
+        if extra:
+            present |= EXTRA_BIT
+            data = json.dumps(extra, ensure_ascii=False).encode("utf-8")
+            parts.append(U32.pack(len(data)))
+            parts.append(data)
+        offset = self._write_record(TAG_EVENT, EVENT_HEAD.pack(epoch, present) + b"".join(parts))
+        self._note_event(self.events, offset, epoch)
+
+    def seal(self):
+        """Write the timestamp index and trailer; the segment becomes read-only."""
+        last = self.event_last_epoch if self.events else math.nan
+        body = INDEX_HEAD.pack(self.events, INDEX_STRIDE, last)
+        body += b"".join(INDEX_ENTRY.pack(e, o) for e, o in self.index)
+        index_offset = self._write_record(TAG_INDEX, body)
+        self.file.write(TRAILER.pack(index_offset, TRAILER_MAGIC))
+        self.size += TRAILER.size
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- Converters ---
+
+def load_analyzer():
+    """Import analyze-session.py for its line parsers and timestamp parsing."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "analyze-session.py")
+    spec = importlib.util.spec_from_file_location("analyze_session", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def import_log(src, store, kind, segment_bytes=DEFAULT_SEGMENT_BYTES):
+    """Append every entry of a JSONL/text log to a store. Returns the number of events written."""
+    analyzer = load_analyzer()
+    parse_line = analyzer.parse_activity_line if kind == "activity" else analyzer.parse_changes_line
+    ts_field = SCHEMAS[kind][1]
+    count = 0
+    with open(src, "r", encoding="utf-8", errors="replace") as f, \
+            EventWriter(store, kind, segment_bytes) as writer:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = parse_line(line)
+            if entry is None:
+                continue
+            ts = entry.get(ts_field, "")
+            writer.append(entry, analyzer.parse_timestamp(ts) if isinstance(ts, str) else None)
+            count += 1
+    return count
+
+
+def format_activity_text(entry):
+    line = f"[{entry.get('ts', '')}] {entry.get('type', '')} | {entry.get('phase', '-')} | {entry.get('name', '')}"
+    return f"{line} | {entry['detail']}" if entry.get("detail") else line
+
+
+def export_store(store, dst, fmt="jsonl", since=None, until=None):
+    """Write store events as JSONL (or legacy activity text) lines. Returns the count."""
+    count = 0
+    for entry in iter_range(store, since, until):
+        if fmt == "text":
+            dst.write(format_activity_text(entry) + "\n")
+        else:
+            dst.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+def store_stats(store):
+    segments = open_segments(store)
+    try:
+        stats = {"kind": segments[0].kind if segments else "", "segments": len(segments),
+                 "sealed": 0, "events": 0, "strings": 0, "bytes": 0}
+        for segment in segments:
+            strings, offsets, _ = segment.scan()
+            stats["sealed"] += segment.sealed
+            stats["events"] += len(offsets)
+            stats["strings"] += len(strings)
+            stats["bytes"] += segment.size
+    finally:
+        close_segments(segments)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert activity/changes logs to and from the event store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_import = sub.add_parser("import", help="Append a JSONL/text log to a store")
+    p_import.add_argument("kind", choices=sorted(SCHEMAS))
+    p_import.add_argument("src")
+    p_import.add_argument("store")
+    p_import.add_argument("--segment-bytes", type=int, default=DEFAULT_SEGMENT_BYTES,
+                          help="Seal a segment and start a new one past this size")
+    p_export = sub.add_parser("export", help="Write store events as JSONL or legacy text")
+    p_export.add_argument("store")
+    p_export.add_argument("dst", nargs="?", default="-")
+    p_export.add_argument("--format", choices=["jsonl", "text"], default="jsonl",
+                          help="text = legacy activity.log lines (activity stores only)")
+    p_export.add_argument("--since", help="Only events at or after this ISO timestamp")
+    p_export.add_argument("--until", help="Only events before this ISO timestamp")
+    p_stats = sub.add_parser("stats", help="Print segment/event counts as JSON")
+    p_stats.add_argument("store")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        print(import_log(args.src, args.store, args.kind, max(HEADER.size + 1, args.segment_bytes)))
+        return
+
+    if not is_store(args.store):
+        parser.error(f"not an event store: {args.store}")
+
+    if args.command == "stats":
+        print(json.dumps(store_stats(args.store)))
+        return
+
+    analyzer = load_analyzer()
+    bounds = []
+    for value in (args.since, args.until):
+        epoch = analyzer.parse_timestamp(value) if value else None
+        if value and epoch is None:
+            parser.error(f"invalid timestamp: {value}")
+        bounds.append(epoch)
+    if args.dst == "-":
+        export_store(args.store, sys.stdout, args.format, *bounds)
+    else:
+        with open(args.dst, "w", encoding="utf-8") as f:
+            export_store(args.store, f, args.format, *bounds)
+
+
+if __name__ == "__main__":
+    main()
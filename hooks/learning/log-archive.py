@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Log rotation into compressed archive segments for .orchestra/logs.
+
+A log is rotated when it reaches the size limit or when its first entry is
+older than the age limit. The live file is renamed into archive/, compressed
+into one segment and recorded in archive/manifest.json:
+
+  {"version": 1, "segments": [
+    {"log": "changes.jsonl", "file": "changes.jsonl.20260101T120000Z.gz",
+     "compression": "gzip", "entries": 1200, "bytes": 480000,
+     "firstTs": 1767268800.0, "lastTs": 1767272400.0,
+     "inode": 1234, "rotatedAt": "2026-01-01T12:00:00Z"}]}
+
+Hooks keep appending to the same live path, which starts a new file after a
+rotation. The analyzer reads the live file and the archived segments of the
+same log as one stream (see iter_log_window); a segment is only decompressed
+when the requested window reaches it. firstTs/lastTs are the epochs of the
+first/last entry the analyzer would parse (null if unparseable), and inode
+lets --incremental finish a log that was rotated after its last run.
+
+Writers (hooks) append without a lock, so one that opened the live file just
+before the rename can still append to the renamed file. Rotation therefore
+waits until the renamed files have stopped changing for a grace period before
+compressing, and compresses again if a file still grew in the meantime.
+
+Usage:
+  python3 log-archive.py rotate [--log-dir DIR] [--max-bytes N] [--max-age-days D]
+                                [--compression gzip|zstd] [--max-segments N] [--force]
+                                [--grace-seconds S]
+  python3 log-archive.py list [--log-dir DIR]
+
+zstd needs Python 3.14+ (compression.zstd) or the zstandard package; without
+either, rotation falls back to gzip.
+"""
+
+import argparse
+import gzip
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ARCHIVE_DIR = "archive"
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+DEFAULT_LOG_DIR = ".orchestra/logs"
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_MAX_AGE_DAYS = 7
+DEFAULT_MAX_SEGMENTS = 20
+DEFAULT_COMPRESSION = "gzip"
+DEFAULT_GRACE_SECONDS = 0.5
+MAX_GRACE_ROUNDS = 10
+
+# 로그 이름 → (analyze-session.py 파서, 타임스탬프 필드). 파서가 None이면 분석기 입력이 아닌 일반 JSONL
+ROTATED_LOGS = {
+    "activity.jsonl": ("parse_activity_line", "ts"),
+    "activity.log": ("parse_activity_line", "ts"),
+    "changes.jsonl": ("parse_changes_line", "timestamp"),
+    "test-runs.jsonl": ("parse_test_line", "ts"),
+    "test-runs.log": ("parse_test_line", "ts"),
+    "tdd-guard.log": ("parse_test_line", "ts"),
+    "analyzer-timings.jsonl": (None, "timestamp"),
+    "hook-metrics.jsonl": (None, "timestamp"),
+}
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+
+# --- Compression ---
+
+def zstd_module():
+    """Return a module with zstd open(), or None (compression.zstd or zstandard)."""
+    try:
+        from compression import zstd
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+def open_segment(path, compression, mode="rb"):
+    if compression == "gzip":
+        return gzip.open(path, mode)
+    if compression == "zstd":
+        zstd = zstd_module()
+        if zstd is None:
+            raise OSError("zstd segment needs Python 3.14+ or the zstandard package")
+        return zstd.open(path, mode)
+    raise ValueError(f"unknown compression: {compression}")
+
+
+def resolve_compression(compression):
+    if compression == "zstd" and zstd_module() is None:
+        sys.stderr.write("zstd unavailable, rotating with gzip\n")
+        return "gzip"
+    return compression
+
+
+# --- Manifest ---
+
+def archive_dir(log_path):
+    return os.path.join(os.path.dirname(log_path) or ".", ARCHIVE_DIR)
+
+
+def load_manifest(arch_dir):
+    """Load archive/manifest.json, or an empty manifest if missing/corrupt."""
+    try:
+        with open(os.path.join(arch_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION and isinstance(manifest.get("segments"), list):
+            return manifest
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {"version": MANIFEST_VERSION, "segments": []}
+
+
+def save_manifest(arch_dir, manifest):
+    fd, tmp_path = tempfile.mkstemp(dir=arch_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        os.rename(tmp_path, os.path.join(arch_dir, MANIFEST_FILE))
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def log_segments(log_path):
+    """Manifest entries archived from `log_path`, oldest first."""
+    arch_dir = archive_dir(log_path)
+    if not os.path.isfile(os.path.join(arch_dir, MANIFEST_FILE)):
+        return []
+    name = os.path.basename(log_path)
+    return [s for s in load_manifest(arch_dir)["segments"] if s.get("log") == name]
+
+
+def read_segment(log_path, segment):
+    """Decompress one archived segment and return its raw bytes."""
+    with open_segment(os.path.join(archive_dir(log_path), segment["file"]), segment["compression"]) as f:
+        return f.read()
+
+
+def find_rotated(log_path, inode):
+    """The archived segment that was the live file with `inode`, or None."""
+    for segment in reversed(log_segments(log_path)):
+        if segment.get("inode") == inode:
+            return segment
+    return None
+
+
+# --- Rotation ---
+
+def load_analyzer():
+    """Import analyze-session.py for its line parsers and timestamp parsing."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "analyze-session.py")
+    spec = importlib.util.spec_from_file_location("analyze_session", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def parse_json_line(line):
+    """One JSONL record as a dict, or None (for logs the analyzer does not read)."""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) else None
+
+
+def entry_epoch(analyzer, name, line):
+    """(parsed?, epoch) of one log line, using the analyzer's parser for `name`."""
+    parser_name, ts_field = ROTATED_LOGS[name]
+    entry = getattr(analyzer, parser_name)(line) if parser_name else parse_json_line(line)
+    if entry is None:
+        return False, None
+    return True, analyzer.parse_timestamp(entry.get(ts_field, ""))
+
+
+def first_entry_epoch(analyzer, path, name):
+    """Epoch of the first parseable entry of a live log (None if unknown)."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                parsed, epoch = entry_epoch(analyzer, name, line)
+                if parsed:
+                    return epoch
+    return None
+
+
+def compress_log(analyzer, src, dst, compression, name):
+    """Compress `src` into `dst`, returning (entries, bytes, firstTs, lastTs)."""
+    entries = 0
+    size = 0
+    first_ts = last_ts = None
+    seen_first = False
+    with open(src, "rb") as fin, open_segment(dst, compression, "wb") as fout:
+        for raw in fin:
+            fout.write(raw)
+            size += len(raw)
+            line = raw.decode("utf-8", errors="replace").strip()
+            if not line:
+                continue
+            parsed, epoch = entry_epoch(analyzer, name, line)
+            if not parsed:
+                continue
+            entries += 1
+            if not seen_first:
+                first_ts, seen_first = epoch, True
+            last_ts = epoch
+    return entries, size, first_ts, last_ts
+
+
+def archive_file(analyzer, arch_dir, manifest, pending, name, inode, compression):
+    """Compress a renamed live file into a new segment and record it in the manifest."""
+    rotated_at = datetime.now(timezone.utc)
+    stamp = rotated_at.strftime("%Y%m%dT%H%M%SZ")
+    file_name = f"{name}.{stamp}{SUFFIXES[compression]}"
+    seq = 1
+    while os.path.exists(os.path.join(arch_dir, file_name)):
+        seq += 1
+        file_name = f"{name}.{stamp}-{seq}{SUFFIXES[compression]}"
+    tmp_path = os.path.join(arch_dir, f".{file_name}.tmp")
+    while True:
+        entries, size, first_ts, last_ts = compress_log(analyzer, pending, tmp_path, compression, name)
+        # 유예 시간 뒤에도 늦게 append된 줄이 있으면 다시 압축 (append만 하므로 크기로 판단)
+        if os.path.getsize(pending) == size:
+            break
+    os.rename(tmp_path, os.path.join(arch_dir, file_name))
+    manifest["segments"].append({
+        "log": name,
+        "file": file_name,
+        "compression": compression,
+        "entries": entries,
+        "bytes": size,
+        "firstTs": first_ts,
+        "lastTs": last_ts,
+        "inode": inode,
+        "rotatedAt": rotated_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+    })
+    save_manifest(arch_dir, manifest)
+    os.unlink(pending)
+    return manifest["segments"][-1]
+
+
+def wait_for_writers(paths, grace_seconds):
+    """Wait until none of `paths` changed (size/mtime) during the last `grace_seconds`.
+
+    A hook that opened a log before it was renamed appends to the renamed
+    file, so compressing right after the rename could lose its lines. Gives up
+    after MAX_GRACE_ROUNDS rounds; archive_file still re-checks the size.
+    """
+    if grace_seconds <= 0 or not paths:
+        return
+    def snapshot():
+        return [(st.st_size, st.st_mtime_ns) for st in map(os.stat, paths)]
+    last = snapshot()
+    for _ in range(MAX_GRACE_ROUNDS):
+        time.sleep(grace_seconds)
+        current = snapshot()
+        if current == last:
+            return
+        last = current
+
+
+def prune_segments(arch_dir, manifest, name, max_segments):
+    """Delete the oldest segments of a log beyond `max_segments`. Returns the count removed."""
+    segments = [s for s in manifest["segments"] if s["log"] == name]
+    excess = segments[:max(0, len(segments) - max_segments)] if max_segments > 0 else []
+    if not excess:
+        return 0
+    drop = {id(s) for s in excess}
+    manifest["segments"] = [s for s in manifest["segments"] if id(s) not in drop]
+    save_manifest(arch_dir, manifest)
+    for segment in excess:
+        try:
+            os.unlink(os.path.join(arch_dir, segment["file"]))
+        except OSError:
+            pass
+    return len(excess)
+
+
+def needs_rotation(analyzer, path, name, max_bytes, max_age_days, now):
+    if max_bytes > 0 and os.path.getsize(path) >= max_bytes:
+        return True
+    if max_age_days > 0:
+        first = first_entry_epoch(analyzer, path, name)
+        return first is not None and now - first >= max_age_days * 86400
+    return False
+
+
+def rotate_logs(log_dir, max_bytes=DEFAULT_MAX_BYTES, max_age_days=DEFAULT_MAX_AGE_DAYS,
+                compression=DEFAULT_COMPRESSION, max_segments=DEFAULT_MAX_SEGMENTS, force=False,
+                grace_seconds=DEFAULT_GRACE_SECONDS):
+    """Rotate every known log in `log_dir` that is over the size or age limit.
+
+    All due logs are renamed first, then one grace period covers them all
+    before they are compressed. Returns the list of new manifest entries.
+    """
+    analyzer = load_analyzer()
+    compression = resolve_compression(compression)
+    arch_dir = os.path.join(log_dir, ARCHIVE_DIR)
+    now = datetime.now(timezone.utc).timestamp()
+    pending_logs = []
+    for name in ROTATED_LOGS:
+        path = os.path.join(log_dir, name)
+        pending = os.path.join(arch_dir, f".{name}.rotating")
+        has_pending = os.path.isfile(pending)
+        if not has_pending:
+            if not os.path.isfile(path) or os.path.getsize(path) == 0:
+                continue
+            if not force and not needs_rotation(analyzer, path, name, max_bytes, max_age_days, now):
+                continue
+        if has_pending:
+            # 이전 rotate가 압축 도중 중단된 파일부터 마무리
+            pending_logs.append((name, pending, os.stat(pending).st_ino))
+            continue
+        os.makedirs(arch_dir, exist_ok=True)
+        inode = os.stat(path).st_ino
+        # rename 이후에 파일을 여는 hook은 새 live 파일에 기록. rename 전에 연 hook은
+        # 옛 inode에 append할 수 있으므로 압축 전에 wait_for_writers로 기다림
+        os.rename(path, pending)
+        pending_logs.append((name, pending, inode))
+    if not pending_logs:
+        return []
+
+    wait_for_writers([pending for _, pending, _ in pending_logs], grace_seconds)
+    manifest = load_manifest(arch_dir)
+    rotated = []
+    for name, pending, inode in pending_logs:
+        rotated.append(archive_file(analyzer, arch_dir, manifest, pending, name, inode, compression))
+        prune_segments(arch_dir, manifest, name, max_segments)
+    return rotated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rotate .orchestra logs into compressed archive segments")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_rotate = sub.add_parser("rotate", help="Rotate logs over the size/age limit")
+    p_rotate.add_argument("--log-dir", default=DEFAULT_LOG_DIR)
+    p_rotate.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES,
+                          help="Rotate a log at this size (0 = no size limit)")
+    p_rotate.add_argument("--max-age-days", type=float, default=DEFAULT_MAX_AGE_DAYS,
+                          help="Rotate a log whose first entry is this old (0 = no age limit)")
+    p_rotate.add_argument("--compression", choices=sorted(SUFFIXES), default=DEFAULT_COMPRESSION)
+    p_rotate.add_argument("--max-segments", type=int, default=DEFAULT_MAX_SEGMENTS,
+                          help="Archived segments kept per log (0 = keep all)")
+    p_rotate.add_argument("--force", action="store_true", help="Rotate every non-empty log")
+    p_rotate.add_argument("--grace-seconds", type=float, default=DEFAULT_GRACE_SECONDS,
+                          help="Wait until renamed logs are unchanged this long before compressing")
+    p_list = sub.add_parser("list", help="Print the archive manifest")
+    p_list.add_argument("--log-dir", default=DEFAULT_LOG_DIR)
+    args = parser.parse_args()
+
+    if args.command == "list":
+        print(json.dumps(load_manifest(os.path.join(args.log_dir, ARCHIVE_DIR)), indent=2, ensure_ascii=False))
+        return
+
+    rotated = rotate_logs(args.log_dir, args.max_bytes, args.max_age_days,
+                          args.compression, args.max_segments, args.force, args.grace_seconds)
+    print(len(rotated))
+
+
+if __name__ == "__main__":
+    main()
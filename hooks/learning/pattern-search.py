@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Ranked retrieval of learned patterns for prompt/session-start injection.
+
+Keeps a persistent BM25 index (.pattern-search.db) over the title, problem,
+solution and trigger keywords of every pattern file in a patterns directory.
+Like the analyzer's dedup index it is validated by the directory mtime: when
+the directory changed, only new or modified .md files are re-read, and
+entries of deleted files are dropped. The analyzer refreshes it after each
+pattern commit, so prompt-time queries normally just load it and walk the
+postings of the query terms.
+
+Usage:
+  python3 pattern-search.py query [--patterns-dir DIR] [-k N] [--min-score S] [--format text|json] [TEXT...]
+  python3 pattern-search.py reindex [--patterns-dir DIR]
+
+query reads TEXT (or stdin) and prints the top-k matching patterns; nothing
+is printed when retrieval is disabled in config.json or nothing scores
+above --min-score. Kept free of analyzer imports so the hook path stays fast.
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+
+SEARCH_INDEX_FILE = ".pattern-search.db"
+SEARCH_INDEX_VERSION = 1
+DEFAULT_PATTERNS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "learned-patterns")
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+DEFAULT_TOP_K = 3
+DEFAULT_MIN_SCORE = 1.0
+SUMMARY_CHARS = 160
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# 제목/키워드는 본문보다 가중치를 높게 (term frequency에 곱함)
+FIELD_WEIGHTS = {"Title": 2, "Trigger Keywords": 2, "Problem": 1, "Solution": 1}
+
+TOKEN_RE = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or that the this to was were with "
+    "during times time see below review".split()
+)
+
+
+def tokenize(text):
+    """Lowercased word tokens without stopwords and single characters."""
+    return [t for t in TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def read_sections(fpath):
+    """Title and "## Section" bodies of a pattern file (the fields the index needs)."""
+    sections = {}
+    current = None
+    with open(fpath, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.startswith("# Pattern:"):
+                sections["Title"] = [line[len("# Pattern:"):]]
+                current = None
+            elif line.startswith("## "):
+                current = line[3:].strip()
+                sections[current] = []
+            elif current:
+                sections[current].append(line)
+    return {k: "\n".join(v).strip() for k, v in sections.items()}
+
+
+def read_document(fpath):
+    """Index entry of one pattern file: weighted term frequencies + display fields."""
+    mtime = os.stat(fpath).st_mtime_ns
+    sections = read_sections(fpath)
+    terms = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        text = sections.get(field, "")
+        if field == "Trigger Keywords":
+            text = text.split("\n", 1)[0].replace(",", " ")
+        for term in tokenize(text):
+            terms[term] = terms.get(term, 0) + weight
+    summary = " ".join(sections.get("Solution", "").split())
+    return {
+        "mtime": mtime,
+        "length": sum(terms.values()),
+        "title": sections.get("Title", ""),
+        "category": sections.get("Category", "").split("\n", 1)[0],
+        "summary": summary[:SUMMARY_CHARS],
+        "terms": terms,
+    }
+
+
+# --- Index ---
+#
+# SQLite (stdlib) so a query reads only the posting rows of its own terms
+# instead of parsing the whole index. The rollback journal is kept around
+# (journal_mode=PERSIST) so index writes stop touching the directory mtime.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER);
+CREATE TABLE IF NOT EXISTS docs (
+    file TEXT PRIMARY KEY, mtime INTEGER, length INTEGER, title TEXT, category TEXT, summary TEXT
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT, file TEXT, tf INTEGER, length INTEGER, PRIMARY KEY (term, file)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_file ON postings (file);
+"""
+
+
+def index_path(patterns_dir):
+    return os.path.join(patterns_dir, SEARCH_INDEX_FILE)
+
+
+def open_index(patterns_dir):
+    conn = sqlite3.connect(index_path(patterns_dir), timeout=2)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version != SEARCH_INDEX_VERSION:
+        conn.executescript("DROP TABLE IF EXISTS meta; DROP TABLE IF EXISTS docs; DROP TABLE IF EXISTS postings;")
+        conn.executescript(SCHEMA)
+        conn.execute(f"PRAGMA user_version = {SEARCH_INDEX_VERSION}")
+    conn.execute("PRAGMA journal_mode = PERSIST")
+    return conn
+
+
+def get_meta(conn, key):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def remove_document(conn, fname):
+    conn.execute("DELETE FROM docs WHERE file = ?", (fname,))
+    conn.execute("DELETE FROM postings WHERE file = ?", (fname,))
+
+
+def add_document(conn, fname, doc):
+    remove_document(conn, fname)
+    conn.execute(
+        "INSERT INTO docs VALUES (?, ?, ?, ?, ?, ?)",
+        (fname, doc["mtime"], doc["length"], doc["title"], doc["category"], doc["summary"]),
+    )
+    conn.executemany(
+        "INSERT INTO postings VALUES (?, ?, ?, ?)",
+        [(term, fname, tf, doc["length"]) for term, tf in doc["terms"].items()],
+    )
+
+
+def refresh(patterns_dir, rebuild=False):
+    """Open the search index of patterns_dir, re-reading only pattern files that changed.
+
+    Validated by the directory mtime like the analyzer's dedup index: when it
+    matches nothing is stat'ed; otherwise new/modified .md files are
+    re-indexed and deleted ones dropped. Returns the open connection.
+    """
+    conn = open_index(patterns_dir)
+    dir_mtime = os.stat(patterns_dir).st_mtime_ns
+    if not rebuild and get_meta(conn, "dirMtime") == dir_mtime:
+        return conn
+
+    with conn:
+        if rebuild:
+            conn.execute("DELETE FROM docs")
+            conn.execute("DELETE FROM postings")
+        indexed = dict(conn.execute("SELECT file, mtime FROM docs"))
+        # 디렉토리가 변경됨: 새/수정된 파일만 다시 읽고 삭제된 파일은 제거
+        try:
+            fnames = {f for f in os.listdir(patterns_dir) if f.endswith(".md")}
+        except OSError:
+            fnames = set()
+        for fname in indexed.keys() - fnames:
+            remove_document(conn, fname)
+        for fname in sorted(fnames):
+            fpath = os.path.join(patterns_dir, fname)
+            try:
+                if indexed.get(fname) != os.stat(fpath).st_mtime_ns:
+                    add_document(conn, fname, read_document(fpath))
+            except (IOError, OSError):
+                remove_document(conn, fname)
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs").fetchone()
+        # 스캔 전 mtime을 기록: 첫 생성(db/journal 파일)으로 바뀌었다면 다음에 한 번 더 검증된다
+        conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                         [("dirMtime", dir_mtime), ("docs", count), ("totalLength", total)])
+    return conn
+
+
+# --- Query ---
+
+def search(conn, text, k=DEFAULT_TOP_K, min_score=DEFAULT_MIN_SCORE):
+    """Top-k patterns for `text` by BM25 score: [{"file", "title", "category", "summary", "score"}]."""
+    n = get_meta(conn, "docs") or 0
+    if not n:
+        return []
+    avg_length = (get_meta(conn, "totalLength") or 0) / n or 1
+    scores = {}
+    for term in set(tokenize(text)):
+        posting = conn.execute("SELECT file, tf, length FROM postings WHERE term = ?", (term,)).fetchall()
+        if not posting:
+            continue
+        idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+        for fname, tf, length in posting:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+            scores[fname] = scores.get(fname, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+    best = heapq.nlargest(k, ((score, fname) for fname, score in scores.items() if score >= min_score))
+    results = []
+    for score, fname in best:
+        title, category, summary = conn.execute(
+            "SELECT title, category, summary FROM docs WHERE file = ?", (fname,)).fetchone()
+        results.append({"file": fname, "title": title, "category": category, "summary": summary,
+                        "score": round(score, 4)})
+    return results
+
+
+def format_results(results):
+    """Markdown block injected by load-context.sh / user-prompt-submit.sh."""
+    if not results:
+        return ""
+    lines = ["### 관련 학습 패턴"]
+    for r in results:
+        lines.append(f"- [{r['category']}] {r['title']} — {r['summary']} ({r['file']})")
+    return "\n".join(lines)
+
+
+def load_retrieval_config(config_path):
+    """retrieval section of config.json ({} if missing)."""
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("retrieval", {}) or {}
+    except (IOError, json.JSONDecodeError, AttributeError):
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ranked retrieval over learned patterns")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_query = sub.add_parser("query", help="Print the top-k patterns for TEXT (or stdin)")
+    p_query.add_argument("text", nargs="*")
+    p_query.add_argument("--patterns-dir", default=DEFAULT_PATTERNS_DIR)
+    p_query.add_argument("--config", default=DEFAULT_CONFIG)
+    p_query.add_argument("-k", "--top-k", type=int, default=None, help=f"Patterns to return (default {DEFAULT_TOP_K})")
+    p_query.add_argument("--min-score", type=float, default=None,
+                         help=f"Minimum BM25 score (default {DEFAULT_MIN_SCORE})")
+    p_query.add_argument("--format", choices=["text", "json"], default="text")
+    p_reindex = sub.add_parser("reindex", help="Rebuild the search index from the pattern files")
+    p_reindex.add_argument("--patterns-dir", default=DEFAULT_PATTERNS_DIR)
+    args = parser.parse_args()
+
+    if args.command == "reindex":
+        conn = refresh(args.patterns_dir, rebuild=True)
+        print(get_meta(conn, "docs"))
+        return
+
+    config = load_retrieval_config(args.config)
+    if config.get("enabled", True) is False:
+        return
+    top_k = args.top_k if args.top_k is not None else config.get("topK", DEFAULT_TOP_K)
+    min_score = args.min_score if args.min_score is not None else config.get("minScore", DEFAULT_MIN_SCORE)
+    text = " ".join(args.text) if args.text else sys.stdin.read()
+    if not text.strip() or not os.path.isdir(args.patterns_dir):
+        return
+    try:
+        results = search(refresh(args.patterns_dir), text, top_k, min_score)
+    except sqlite3.Error as e:
+        # 훅 경로: 인덱스 문제로 프롬프트를 막지 않는다
+        sys.stderr.write(f"Pattern search unavailable: {e}\n")
+        return
+    if args.format == "json":
+        print(json.dumps(results, ensure_ascii=False))
+    elif results:
+        print(format_results(results))
+
+
+if __name__ == "__main__":
+    main()
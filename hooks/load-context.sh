@@ -12,7 +12,12 @@ ensure_orchestra_dirs
 
 STATE_FILE="$ORCHESTRA_STATE_FILE"
 CONTEXT_DIR="$ORCHESTRA_DIR/contexts"
-PATTERNS_DIR="$SCRIPT_DIR/learning/learned-patterns"
+# 패턴 저장 경로 (사용자 프로젝트 우선, evaluate-session.sh와 동일)
+if [ -d "$ORCHESTRA_DIR/learning" ]; then
+  PATTERNS_DIR="$ORCHESTRA_DIR/learning/learned-patterns"
+else
+  PATTERNS_DIR="$SCRIPT_DIR/learning/learned-patterns"
+fi
 LOG_FILE="$ORCHESTRA_LOG_DIR/context.log"
 
 log() {
@@ -61,6 +66,36 @@ load_learned_patterns() {
   echo "$count"
 }
 
+# 진행 중인 계획/TODO와 관련된 학습 패턴 (BM25 인덱스 검색)
+show_relevant_patterns() {
+  if [ "$PLAN_NAME" = "null" ] || [ -z "$PLAN_NAME" ] || [ ! -d "$PATTERNS_DIR" ]; then
+    return
+  fi
+
+  local query="$PLAN_NAME"
+  if [ -f "$STATE_FILE" ] && command -v jq &> /dev/null; then
+    query="$query $(jq -r '[.todos[]? | select(.status != "completed") | .content] | join(" ")' "$STATE_FILE" 2>/dev/null)"
+  fi
+
+  local patterns
+  patterns=$(printf '%s' "$query" | python3 "$SCRIPT_DIR/learning/pattern-search.py" query \
+    --patterns-dir "$PATTERNS_DIR" 2>/dev/null || true)
+  if [ -n "$patterns" ]; then
+    echo "$patterns"
+    echo ""
+  fi
+}
+
+# 실시간 학습 watcher 시작 (learning config의 watcher.enabled일 때만, 종료는 Stop 훅의 evaluate)
+start_learning_watcher() {
+  local learning_script="$SCRIPT_DIR/learning/evaluate-session.sh"
+  if [ ! -x "$learning_script" ]; then
+    return 0
+  fi
+  # evaluate-session.sh는 프로젝트 루트 기준 상대 경로(.orchestra/...)를 사용
+  (cd "$ORCHESTRA_ROOT" && "$learning_script" session-start) >> "$ORCHESTRA_LOG_DIR/learning.log" 2>&1 || true
+}
+
 # 이전 세션 정보 표시
 show_session_info() {
   echo ""
@@ -155,8 +190,12 @@ main() {
   # 상태 로드
   load_state
 
+  # 실시간 학습 watcher 시작
+  start_learning_watcher
+
   # 컨텍스트 파일 로드
-  load_context_file "$CONTEXT"
+  # 컨텍스트 파일이 없으면 1을 반환하므로 set -e로 나머지 출력이 끊기지 않게 처리
+  load_context_file "$CONTEXT" || log "No context file for: $CONTEXT"
 
   # 세션 정보 표시
   show_session_info
@@ -167,6 +206,9 @@ main() {
   # 미완료 작업 표시
   show_pending_work
 
+  # 관련 학습 패턴 표시
+  show_relevant_patterns
+
   # 빠른 명령어 안내
   show_quick_commands
 
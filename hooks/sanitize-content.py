@@ -2,40 +2,293 @@
 """
 Sanitize content by redacting sensitive information.
 Usage: echo "content" | python3 sanitize-content.py
+       python3 sanitize-content.py --stream [--chunk-size CHARS] < large-file
+
+hook-runtime.py's change-log handler calls append_record() in-process to
+copy mapped tool_input fields into a record, sanitize them and append the
+record to changes.jsonl as one JSONL line.
 """
 
-import sys
+import argparse
+import functools
+import itertools
+import json
 import re
+import sys
 
+DEFAULT_CHUNK_SIZE = 64 * 1024
+MAX_CARRY_CHARS = 256 * 1024
 
-def sanitize(content: str) -> str:
-    """Remove or mask sensitive information from content."""
-
-    patterns = [
-        # OpenAI/Anthropic API 키
-        (r"sk-[a-zA-Z0-9]{20,}", "[REDACTED-API-KEY]"),
-        # GitHub 토큰
-        (r"ghp_[a-zA-Z0-9]{36}", "[REDACTED-GITHUB-TOKEN]"),
-        (r"gho_[a-zA-Z0-9]{36}", "[REDACTED-GITHUB-TOKEN]"),
-        (r"github_pat_[a-zA-Z0-9_]{22,}", "[REDACTED-GITHUB-TOKEN]"),
-        # AWS 키
-        (r"AKIA[0-9A-Z]{16}", "[REDACTED-AWS-KEY]"),
-        # Bearer 토큰
-        (r"Bearer\s+[a-zA-Z0-9._-]+", "Bearer [REDACTED]"),
-        # Private Key 블록
-        (r"-----BEGIN[^-]*PRIVATE KEY-----[\s\S]*?-----END[^-]*PRIVATE KEY-----", "[REDACTED-PRIVATE-KEY]"),
-        # 비밀번호, 시크릿, API 키 (= 또는 : 뒤의 값)
-        (r"(password|passwd|pwd|secret|api_key|api-key|auth_token|access_token)\s*[:=]\s*[\"']?[^\"'\s]{4,}", r"\1=[REDACTED]"),
-        # 일반적인 시크릿 패턴 (따옴표 안의 긴 base64 문자열)
-        (r"[\"'][a-zA-Z0-9+/]{32,}[=]?[\"']", "[REDACTED-SECRET]"),
+
+# --- Redaction Rules ---
+
+# (name, pattern, replacement) — 적용 순서가 곧 우선순위 (IGNORECASE)
+REDACTION_RULES = [
+    # OpenAI/Anthropic API 키
+    ("api_key", r"sk-[a-zA-Z0-9]{20,}", "[REDACTED-API-KEY]"),
+    # GitHub 토큰
+    ("github_token", r"ghp_[a-zA-Z0-9]{36}", "[REDACTED-GITHUB-TOKEN]"),
+    ("github_oauth", r"gho_[a-zA-Z0-9]{36}", "[REDACTED-GITHUB-TOKEN]"),
+    ("github_pat", r"github_pat_[a-zA-Z0-9_]{22,}", "[REDACTED-GITHUB-TOKEN]"),
+    # AWS 키
+    ("aws_key", r"AKIA[0-9A-Z]{16}", "[REDACTED-AWS-KEY]"),
+    # Bearer 토큰
+    ("bearer", r"Bearer\s+[a-zA-Z0-9._-]+", "Bearer [REDACTED]"),
+    # Private Key 블록
+    ("private_key", r"-----BEGIN[^-]*PRIVATE KEY-----[\s\S]*?-----END[^-]*PRIVATE KEY-----", "[REDACTED-PRIVATE-KEY]"),
+    # 비밀번호, 시크릿, API 키 (= 또는 : 뒤의 값)
+    ("assignment", r"(?P<kw>password|passwd|pwd|secret|api_key|api-key|auth_token|access_token)\s*[:=]\s*[\"']?[^\"'\s]{4,}", r"\g<kw>=[REDACTED]"),
+    # 일반적인 시크릿 패턴 (따옴표 안의 긴 base64 문자열)
+    ("quoted_secret", r"[\"'][a-zA-Z0-9+/]{32,}[=]?[\"']", "[REDACTED-SECRET]"),
+]
+
+# 규칙이 매칭되려면 반드시 포함되어야 하는 리터럴 (소문자; 튜플 하나가 any-of, 모든 튜플 필요)
+RULE_LITERALS = {
+    "api_key": (("sk-",),),
+    "github_token": (("ghp_",),),
+    "github_oauth": (("gho_",),),
+    "github_pat": (("github_pat_",),),
+    "aws_key": (("akia",),),
+    "bearer": (("bearer",),),
+    "private_key": (("-----begin",),),
+    "assignment": (
+        ("password", "passwd", "pwd", "secret", "api_key", "api-key", "auth_token", "access_token"),
+        (":", "="),
+    ),
+    "quoted_secret": (("\"", "'"),),
+}
+
+# 리터럴만으로는 거의 항상 통과하는 규칙의 추가 조건 (folded content에 search). 따옴표는
+# 거의 모든 코드/JSON에 있으므로 quoted_secret은 따옴표 뒤에 base64 32자가 이어질 때만 후보
+RULE_SIGNALS = {
+    "quoted_secret": re.compile(r"[\"'][a-z0-9+/]{32}"),
+}
+
+# re.IGNORECASE에서 ASCII 문자와 같게 취급되는 비 ASCII 문자 → ASCII 소문자 (길이 보존).
+# casefold()는 İ를 "i" + 결합 점 두 글자로 바꿔 "AKİA" 같은 입력의 리터럴 검사를 놓친다.
+_FOLD_TABLE = str.maketrans({"\u0130": "i", "\u0131": "i", "\u017f": "s", "\u212a": "k"})
+
+# 매칭 구간이 서로 겹칠 수 있는 규칙 쌍. 둘 다 존재하면 단일 패스 결과가
+# 순차 적용과 달라질 수 있으므로 순차 경로로 처리한다.
+# 토큰 규칙끼리는 한 토큰 끝에 다른 토큰 접두어가 이어질 수 있고
+# (예: "github_pat_...sk-..."), Private Key 블록은 무엇이든 포함할 수 있다.
+_TOKEN_RULES = ("api_key", "github_token", "github_oauth", "github_pat", "aws_key", "bearer", "private_key")
+OVERLAPPING_RULES = [frozenset(pair) for pair in itertools.combinations(_TOKEN_RULES, 2)] + [
+    frozenset(pair) for pair in [
+        ("private_key", "assignment"), ("bearer", "assignment"),
+        ("aws_key", "quoted_secret"), ("assignment", "quoted_secret"),
     ]
+]
+
+_RULE_RES = [(re.compile(pattern, re.IGNORECASE), replacement) for _, pattern, replacement in REDACTION_RULES]
+
+
+@functools.lru_cache(maxsize=None)
+def combined_regex(names):
+    """Compile one alternation (named group per rule, rule order kept) over the given rule names."""
+    return re.compile(
+        "|".join(f"(?P<{name}>{pattern})" for name, pattern, _ in REDACTION_RULES if name in names),
+        re.IGNORECASE,
+    )
+
 
-    for pattern, replacement in patterns:
-        content = re.sub(pattern, replacement, content, flags=re.IGNORECASE)
+def _make_replacer(replacement):
+    if "\\" in replacement:
+        return lambda m: m.expand(replacement)
+    return lambda m: replacement
 
+
+_REPLACERS = {name: _make_replacer(replacement) for name, _, replacement in REDACTION_RULES}
+
+
+def _dispatch(m):
+    return _REPLACERS[m.lastgroup](m)
+
+
+def _fold(content):
+    """Lowercase for literal prefiltering, covering every character IGNORECASE treats as equal."""
+    if content.isascii():
+        return content.lower()
+    return content.translate(_FOLD_TABLE).lower()
+
+
+def candidate_rules(content):
+    """Return the names of rules whose required literals (and signal, if any) occur in content."""
+    folded = _fold(content)
+    return {
+        name for name, groups in RULE_LITERALS.items()
+        if all(any(lit in folded for lit in group) for group in groups)
+        and (name not in RULE_SIGNALS or RULE_SIGNALS[name].search(folded))
+    }
+
+
+def sanitize_sequential(content: str) -> str:
+    """Apply every rule in order, one full scan each (reference semantics)."""
+    for rule_re, replacement in _RULE_RES:
+        content = rule_re.sub(replacement, content)
     return content
 
 
-if __name__ == "__main__":
+def sanitize(content: str) -> str:
+    """Remove or mask sensitive information from content.
+
+    Clean content is returned after a literal prefilter without any regex work.
+    Otherwise the rules whose literals are present run as one combined
+    alternation in a single pass, unless two rules whose matches can overlap are
+    both present, in which case the rules are applied sequentially to keep
+    results identical to sanitize_sequential().
+    """
+    present = candidate_rules(content)
+    if not present:
+        return content
+    if any(pair <= present for pair in OVERLAPPING_RULES):
+        return sanitize_sequential(content)
+    return combined_regex(frozenset(present)).sub(_dispatch, content)
+
+
+# --- Streaming ---
+
+# 공백을 넘어 매칭이 이어질 수 있는 규칙의 앞부분 (Bearer\s+, keyword\s*[:=]\s*)
+_SPAN_PREFIXES = ("bearer", ":", "=") + RULE_LITERALS["assignment"][0]
+_SPAN_WINDOW = max(len(prefix) for prefix in _SPAN_PREFIXES)
+_KEY_BEGIN_RE = re.compile(r"-----BEGIN", re.IGNORECASE)
+_KEY_HEADER_RE = re.compile(r"-----BEGIN[^-]*PRIVATE KEY-----", re.IGNORECASE)
+_KEY_FOOTER_RE = re.compile(r"-----END[^-]*PRIVATE KEY-----", re.IGNORECASE)
+# Private Key 규칙보다 먼저 적용되는 규칙 (Bearer가 "-----BEGIN"을 먹을 수 있음)
+_PRE_KEY_RULES = _RULE_RES[:[name for name, _, _ in REDACTION_RULES].index("private_key")]
+
+
+def has_open_key_block(text):
+    """True if a PRIVATE KEY block starts in text but its END marker is not in text yet."""
+    if not _KEY_BEGIN_RE.search(text):
+        return False
+    for rule_re, replacement in _PRE_KEY_RULES:
+        text = rule_re.sub(replacement, text)
+    pos = 0
+    while True:
+        begin = _KEY_BEGIN_RE.search(text, pos)
+        if begin is None:
+            return False
+        header = _KEY_HEADER_RE.match(text, begin.start())
+        if header is None:
+            # [^-]*는 다음 '-'에서 멈추므로 '-'가 아직 없으면 헤더가 완성될 수 있다
+            if text.find("-", begin.end()) < 0:
+                return True
+            pos = begin.end()
+            continue
+        footer = _KEY_FOOTER_RE.search(text, header.end())
+        if footer is None:
+            return True
+        pos = footer.end()
+
+
+def find_safe_cut(buf):
+    """Return the largest index P where buf can be split without changing redaction, or 0.
+
+    Only rules with \\s in their pattern can match across whitespace, so P is
+    placed right after a whitespace run that does not follow "Bearer", an
+    assignment keyword, ":" or "=", and outside any unterminated PRIVATE KEY block.
+    """
+    check_keys = _KEY_BEGIN_RE.search(buf) is not None
+    i = len(buf) - 1
+    while i >= 0:
+        while i >= 0 and not buf[i].isspace():
+            i -= 1
+        if i < 0:
+            return 0
+        cut = i + 1
+        while i >= 0 and buf[i].isspace():
+            i -= 1
+        if _fold(buf[max(0, i + 1 - _SPAN_WINDOW):i + 1]).endswith(_SPAN_PREFIXES):
+            continue
+        if check_keys and has_open_key_block(buf[:cut]):
+            # 열린 블록 시작 이전으로 후퇴
+            last_begin = None
+            for last_begin in _KEY_BEGIN_RE.finditer(buf, 0, cut):
+                pass
+            i = last_begin.start() - 1
+            continue
+        return cut
+    return 0
+
+
+def sanitize_stream(src, dst, chunk_size=DEFAULT_CHUNK_SIZE, max_carry=MAX_CARRY_CHARS):
+    """Sanitize a text stream chunk by chunk in bounded memory.
+
+    Each buffer (carry + chunk) is redacted up to the last safe cut and the
+    remainder is carried into the next chunk, so a secret split across a chunk
+    boundary (including a multi-line PRIVATE KEY block) is still redacted.
+    Output equals sanitize(src.read()) unless a run with no safe cut grows past
+    max_carry characters, which is then flushed as-is to keep memory bounded.
+    """
+    carry = ""
+    while True:
+        chunk = src.read(chunk_size)
+        if not chunk:
+            break
+        buf = carry + chunk
+        cut = find_safe_cut(buf)
+        if cut == 0 and len(buf) > max_carry:
+            cut = len(buf)
+        if cut:
+            dst.write(sanitize(buf[:cut]))
+        carry = buf[cut:]
+    if carry:
+        dst.write(sanitize(carry))
+
+
+# --- Records ---
+
+def append_record(req):
+    """Build a JSONL record from mapped input fields, sanitize them and append it.
+
+    Returns True if a line was written, False if the record was filtered out.
+    """
+    path = req["path"]
+    if not path.endswith(".jsonl"):
+        raise ValueError(f"refusing to append to non-JSONL path: {path}")
+
+    record = dict(req.get("record", {}))
+    source = req.get("input") or {}
+    max_chars = req.get("maxChars")
+    min_chars = req.get("minChars", 0)
+
+    raw = {}
+    for key, input_key in req.get("fields", {}).items():
+        value = source.get(input_key, "")
+        raw[key] = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+    # 최소 변경 크기 필터 (모든 필드가 minChars 미만이면 기록하지 않음)
+    if raw and all(len(v) < min_chars for v in raw.values()):
+        return False
+
+    for key, value in raw.items():
+        if max_chars:
+            value = value[:max_chars]
+        # 셸 $(...) 치환과 동일하게 trailing newline 제거
+        record[key] = sanitize(value.rstrip("\n"))
+
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Redact sensitive information from content")
+    parser.add_argument("--stream", action="store_true",
+                        help="Sanitize stdin chunk by chunk in bounded memory (for whole files and tool outputs)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Characters read per chunk in --stream mode")
+    args = parser.parse_args()
+
+    if args.stream:
+        sanitize_stream(sys.stdin, sys.stdout, max(1, args.chunk_size))
+        return
+
     content = sys.stdin.read()
     print(sanitize(content), end="")
+
+
+if __name__ == "__main__":
+    main()
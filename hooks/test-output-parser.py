@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Single-pass parser for jest / vitest / mocha / pytest output.
+
+Reads test runner output line by line and extracts, in one pass, the
+pass/fail/skip counts, the IDs of failing tests, error codes (TS2322,
+TypeError, ...) and line coverage. hook-runtime.py's test-log handler
+appends the result to .orchestra/logs/test-runs.jsonl, which the learning
+analyzer reads as structured records.
+
+Usage:
+  npm test 2>&1 | python3 test-output-parser.py [--command CMD] [--append test-runs.jsonl]
+
+Without --append the record is printed as one JSON line.
+
+Record:
+  {"ts": "...", "command": "npx jest", "framework": "jest", "status": "RED",
+   "passed": 2, "failed": 1, "skipped": 0, "total": 3, "coverage": 72.5,
+   "failures": ["math › adds"], "errorCodes": ["TypeError"]}
+"""
+
+import argparse
+import io
+import json
+import os
+import re
+import sys
+from datetime import datetime, timezone
+
+MAX_FAILURES = 50
+MAX_ERROR_CODES = 20
+MAX_MOCHA_TITLE_LINES = 5
+
+FRAMEWORKS = ("vitest", "jest", "mocha", "pytest")
+
+ANSI_RE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+COUNT_RE = re.compile(r"(\d+) (passed|failed|skipped|todo|errors?|pending|passing|failing)")
+TOTAL_RE = re.compile(r"(\d+) total|\((\d+)\)")
+# 분석기의 ERROR_CODE_RE와 동일 (훅 경로에서 분석기를 import하지 않기 위해 복제)
+ERROR_CODE_RE = re.compile(r"(TS\d{4}|[A-Z]\w*Error)")
+
+# jest: "Tests:       1 failed, 2 passed, 3 total" / vitest: "      Tests  1 failed | 2 passed (3)"
+JEST_SUMMARY_RE = re.compile(r"^Tests:\s+(.*)$")
+VITEST_SUMMARY_RE = re.compile(r"^Tests\s+(.*)$")
+# jest: "  ● suite › test" / vitest: " FAIL  src/a.test.ts > suite > test"
+JEST_FAILURE_RE = re.compile(r"^●\s+(.+?)\s*$")
+JEST_NON_TEST_BLOCKS = frozenset(["Console", "Test suite failed to run"])
+VITEST_FAILURE_RE = re.compile(r"^FAIL\s+(\S.* > .+?)(?:\s+\[.*\])?\s*$")
+# mocha: "  2 passing (10ms)" / "  1 failing" / "  1) suite" + deeper-indented title lines ending in ":"
+MOCHA_SUMMARY_RE = re.compile(r"^(\d+) (passing|failing|pending)\b")
+MOCHA_FAILURE_RE = re.compile(r"^\d+\) (.+)$")
+# pytest: "==== 1 failed, 2 passed in 0.12s ====" (-q: 같은 내용, '=' 없이)
+PYTEST_SUMMARY_RE = re.compile(r"^=*\s*((?:\d+ \w+,? ?)+) in [\d.]+s\b")
+PYTEST_FAILURE_RE = re.compile(r"^(?:FAILED|ERROR) (\S+)")
+# jest/vitest (istanbul): "All files | 72.5 | ..." / pytest-cov: "TOTAL  120  10  92%"
+JEST_COVERAGE_RE = re.compile(r"^All files\s*\|\s*([0-9]+(?:\.[0-9]+)?)")
+PYTEST_COVERAGE_RE = re.compile(r"^TOTAL\s.*?([0-9]+(?:\.[0-9]+)?)%\s*$")
+
+
+def detect_framework(command):
+    """Framework named in the test command ("" if none, e.g. "npm test")."""
+    for name in FRAMEWORKS:
+        if name in command:
+            return name
+    return ""
+
+
+def number(text):
+    return float(text) if "." in text else int(text)
+
+
+class TestOutputParser:
+    """Feed output lines one at a time; result() returns the parsed record."""
+
+    def __init__(self, command=""):
+        self.command = command
+        self.framework = detect_framework(command)
+        self.counts = {"passed": 0, "failed": 0, "skipped": 0}
+        self.total = None
+        self.summary_seen = False
+        self.coverage = None
+        self.failures = []
+        self.error_codes = {}
+        self.fail_token = False
+        self.pass_token = False
+        self.mocha_failing = False
+        self.mocha_title = None
+
+    def feed(self, line):
+        if "\x1b" in line:
+            line = ANSI_RE.sub("", line)
+        line = line.strip()
+        if not line:
+            return
+        if not self.fail_token and ("FAIL" in line or "failed" in line):
+            self.fail_token = True
+        if not self.pass_token and ("PASS" in line or "passed" in line):
+            self.pass_token = True
+        if "Error" in line or "TS" in line:
+            for code in ERROR_CODE_RE.findall(line):
+                if len(self.error_codes) < MAX_ERROR_CODES:
+                    self.error_codes.setdefault(code, None)
+
+        if self.mocha_title is not None:
+            # mocha 실패 제목: ":"로 끝나는 줄까지 이어 붙임
+            self.mocha_title.append(line.rstrip(":"))
+            if line.endswith(":") or len(self.mocha_title) >= MAX_MOCHA_TITLE_LINES:
+                self.add_failure(" ".join(self.mocha_title))
+                self.mocha_title = None
+            return
+
+        first = line[0]
+        if first == "T":
+            m = JEST_SUMMARY_RE.match(line)
+            if m:
+                self.read_counts(m.group(1), "jest")
+                return
+            m = VITEST_SUMMARY_RE.match(line)
+            if m:
+                self.read_counts(m.group(1), "vitest")
+                return
+            m = PYTEST_COVERAGE_RE.match(line)
+            if m:
+                self.coverage = number(m.group(1))
+                return
+        elif first == "●":
+            m = JEST_FAILURE_RE.match(line)
+            if m and m.group(1) not in JEST_NON_TEST_BLOCKS:
+                self.add_failure(m.group(1))
+            return
+        elif first == "F" or first == "E":
+            m = VITEST_FAILURE_RE.match(line)
+            if m:
+                self.add_failure(m.group(1))
+                return
+            m = PYTEST_FAILURE_RE.match(line)
+            if m:
+                self.add_failure(m.group(1))
+                return
+        elif first == "A":
+            m = JEST_COVERAGE_RE.match(line)
+            if m:
+                self.coverage = number(m.group(1))
+            return
+        elif first.isdigit():
+            m = MOCHA_SUMMARY_RE.match(line)
+            if m:
+                self.read_counts(line, "mocha")
+                self.mocha_failing = self.mocha_failing or m.group(2) == "failing"
+                return
+            if self.mocha_failing:
+                m = MOCHA_FAILURE_RE.match(line)
+                if m:
+                    self.mocha_title = [m.group(1).rstrip(":")]
+                    if m.group(1).endswith(":"):
+                        self.add_failure(self.mocha_title[0])
+                        self.mocha_title = None
+                    return
+        if first == "=" or first.isdigit():
+            m = PYTEST_SUMMARY_RE.match(line)
+            if m:
+                self.read_counts(m.group(1), "pytest")
+
+    def read_counts(self, text, framework):
+        """Read "N label" pairs of a summary line into the counts."""
+        if not self.framework:
+            self.framework = framework
+        if framework != "mocha":
+            # jest/vitest/pytest 요약 줄은 실행당 한 번: 이전 값(watch 재실행 등)을 대체
+            self.counts = {"passed": 0, "failed": 0, "skipped": 0}
+        self.summary_seen = True
+        for count, label in COUNT_RE.findall(text):
+            count = int(count)
+            if label in ("passed", "passing"):
+                self.counts["passed"] += count
+            elif label in ("failed", "failing", "error", "errors"):
+                self.counts["failed"] += count
+            else:
+                self.counts["skipped"] += count
+        m = TOTAL_RE.search(text)
+        self.total = int(m.group(1) or m.group(2)) if m else None
+
+    def add_failure(self, test_id):
+        if len(self.failures) < MAX_FAILURES and test_id not in self.failures:
+            self.failures.append(test_id)
+
+    def status(self):
+        """RED/GREEN from the summary counts, else from FAIL/PASS tokens ("" if neither)."""
+        if self.summary_seen:
+            if self.counts["failed"]:
+                return "RED"
+            if self.counts["passed"]:
+                return "GREEN"
+        if self.fail_token or self.failures:
+            return "RED"
+        return "GREEN" if self.pass_token else ""
+
+    def result(self):
+        if self.mocha_title:
+            self.add_failure(" ".join(self.mocha_title))
+            self.mocha_title = None
+        counts = self.counts
+        return {
+            "ts": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "command": self.command,
+            "framework": self.framework,
+            "status": self.status(),
+            "passed": counts["passed"],
+            "failed": counts["failed"],
+            "skipped": counts["skipped"],
+            "total": self.total if self.total is not None else sum(counts.values()),
+            "coverage": self.coverage,
+            "failures": self.failures,
+            "errorCodes": list(self.error_codes),
+        }
+
+
+def parse_stream(lines, command=""):
+    """Parse an iterable of output lines into a test run record."""
+    parser = TestOutputParser(command)
+    for line in lines:
+        parser.feed(line)
+    return parser.result()
+
+
+def parse_output(text, command=""):
+    """Parse captured output (str) without splitting it into a list first."""
+    return parse_stream(io.StringIO(text), command)
+
+
+def append_record(path, record):
+    """Append one record as a JSONL line."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse test runner output into a test-runs.jsonl record")
+    parser.add_argument("--command", default="", help="Test command (selects the framework if named)")
+    parser.add_argument("--append", metavar="PATH", help="Append the record to this JSONL file instead of printing")
+    args = parser.parse_args()
+
+    stdin = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", errors="replace")
+    record = parse_stream(stdin, args.command)
+    if args.append:
+        append_record(args.append, record)
+    else:
+        print(json.dumps(record, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
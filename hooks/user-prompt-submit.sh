@@ -107,6 +107,18 @@ except:
 " "$STATE_FILE" 2>/dev/null || echo "")
 fi
 
+# 프롬프트와 관련된 학습 패턴 (BM25 인덱스 상위 k개만 주입, 패턴이 없거나 관련 없으면 빈 값)
+LEARNED_PATTERNS=""
+if [ -d "$ORCHESTRA_DIR/learning" ]; then
+  PATTERNS_DIR="$ORCHESTRA_DIR/learning/learned-patterns"
+else
+  PATTERNS_DIR="$SCRIPT_DIR/learning/learned-patterns"
+fi
+if [ -n "$USER_PROMPT" ] && [ -d "$PATTERNS_DIR" ]; then
+  LEARNED_PATTERNS=$(printf '%s' "$USER_PROMPT" | python3 "$SCRIPT_DIR/learning/pattern-search.py" query \
+    --patterns-dir "$PATTERNS_DIR" 2>/dev/null || true)
+fi
+
 # Journal 차단 리마인더 (journalRequired=true && journalWritten=false)
 if [ "$JOURNAL_REQUIRED" = "true" ] && [ "$JOURNAL_WRITTEN" = "false" ]; then
   cat <<'JOURNAL_BLOCK'
@@ -169,6 +181,8 @@ if [ "$MODE" = "EXECUTE" ]; then
   - 선택지: "계속 진행" / "/compact 실행하여 정리"
 ${PLAN_INFO:+$PLAN_INFO
 }${TODO_INFO:+$TODO_INFO
+}${LEARNED_PATTERNS:+
+$LEARNED_PATTERNS
 }</user-prompt-submit-hook>
 EOF
 else
@@ -231,6 +245,8 @@ Task(subagent_type="general-purpose",
 상세 규칙: \`.claude/rules/maestro-protocol.md\`
 ${PLAN_INFO:+$PLAN_INFO
 }${TODO_INFO:+$TODO_INFO
+}${LEARNED_PATTERNS:+
+$LEARNED_PATTERNS
 }$(if [ "$PLAN_MODE_HINT" = "NEED_INTERVIEW" ]; then
 cat <<'HINT'
 
@@ -20,12 +20,25 @@ ERRORS=0
 WARNINGS=0
 OUTPUT=""
 
+# 검사 대상: 기본은 전체, verification-loop.sh 캐시가 좁힌 실행이면 바뀐 파일 중 해당 확장자만
+lint_targets() {
+  if [ -n "${VERIFY_CHANGED_FILES:-}" ] && [ -f "$VERIFY_CHANGED_FILES" ]; then
+    grep -E "\.($1)\$" "$VERIFY_CHANGED_FILES" | tr '\n' ' ' || true
+  else
+    echo "."
+  fi
+}
+
 # ESLint 확인
 if [ -f ".eslintrc.js" ] || [ -f ".eslintrc.json" ] || [ -f ".eslintrc.yml" ] || [ -f "eslint.config.js" ] || [ -f "eslint.config.mjs" ]; then
   echo "🔍 Running ESLint..."
+  TARGETS=$(lint_targets "js|jsx|ts|tsx|mjs|cjs|vue|svelte")
 
   # ESLint 실행 (JSON 출력)
-  LINT_OUTPUT=$(npx eslint . --format json 2>/dev/null) || true
+  LINT_OUTPUT=""
+  if [ -n "$TARGETS" ]; then
+    LINT_OUTPUT=$(npx eslint $TARGETS --format json 2>/dev/null) || true
+  fi
 
   # 에러/경고 카운트
   if command -v jq &> /dev/null && [ -n "$LINT_OUTPUT" ]; then
@@ -33,18 +46,21 @@ if [ -f ".eslintrc.js" ] || [ -f ".eslintrc.json" ] || [ -f ".eslintrc.yml" ] ||
     WARNINGS=$(echo "$LINT_OUTPUT" | jq '[.[].warningCount] | add // 0')
   else
     # jq 없으면 텍스트 출력으로 카운트
-    TEXT_OUTPUT=$(npx eslint . 2>&1) || true
+    TEXT_OUTPUT=""
+    if [ -n "$TARGETS" ]; then
+      TEXT_OUTPUT=$(npx eslint $TARGETS 2>&1) || true
+    fi
     ERRORS=$(echo "$TEXT_OUTPUT" | grep -c "error" || echo "0")
     WARNINGS=$(echo "$TEXT_OUTPUT" | grep -c "warning" || echo "0")
   fi
 
   if [ "$ERRORS" -gt 0 ]; then
     STATUS="fail"
-    OUTPUT=$(npx eslint . 2>&1 | head -50) || true
+    OUTPUT=$(npx eslint $TARGETS 2>&1 | head -50) || true
     echo "❌ Lint check failed: $ERRORS errors, $WARNINGS warnings"
   elif [ "$WARNINGS" -gt 0 ]; then
     STATUS="warn"
-    OUTPUT=$(npx eslint . 2>&1 | head -30) || true
+    OUTPUT=$(npx eslint $TARGETS 2>&1 | head -30) || true
     echo "⚠️ Lint check passed with $WARNINGS warnings"
   else
     echo "✅ Lint check passed"
@@ -54,7 +70,11 @@ if [ -f ".eslintrc.js" ] || [ -f ".eslintrc.json" ] || [ -f ".eslintrc.yml" ] ||
 elif [ -f "biome.json" ]; then
   echo "🔍 Running Biome..."
 
-  OUTPUT=$(npx biome lint . 2>&1) || true
+  TARGETS=$(lint_targets "js|jsx|ts|tsx|mjs|cjs|json")
+  OUTPUT=""
+  if [ -n "$TARGETS" ]; then
+    OUTPUT=$(npx biome lint $TARGETS 2>&1) || true
+  fi
   ERRORS=$(echo "$OUTPUT" | grep -c "error" || echo "0")
   WARNINGS=$(echo "$OUTPUT" | grep -c "warning" || echo "0")
 
@@ -70,12 +90,20 @@ elif [ -f "biome.json" ]; then
 elif [ -f "pyproject.toml" ] || [ -f "setup.py" ]; then
   if command -v ruff &> /dev/null; then
     echo "🔍 Running Ruff..."
-    OUTPUT=$(ruff check . 2>&1) || true
+    TARGETS=$(lint_targets "py")
+    OUTPUT=""
+    if [ -n "$TARGETS" ]; then
+      OUTPUT=$(ruff check $TARGETS 2>&1) || true
+    fi
     ERRORS=$(echo "$OUTPUT" | grep -cE "^[^ ]" || echo "0")
   elif command -v flake8 &> /dev/null; then
     echo "🔍 Running Flake8..."
-    OUTPUT=$(flake8 . 2>&1) || true
-    ERRORS=$(echo "$OUTPUT" | wc -l)
+    TARGETS=$(lint_targets "py")
+    OUTPUT=""
+    if [ -n "$TARGETS" ]; then
+      OUTPUT=$(flake8 $TARGETS 2>&1) || true
+    fi
+    ERRORS=$(printf '%s' "$OUTPUT" | grep -c . || true)
   else
     STATUS="skip"
     echo "⏭️ No Python linter found"
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Secret scanner for the verification loop's security phase.
+
+Secrets are matched with the sanitizer's rule table (REDACTION_RULES in
+hooks/sanitize-content.py), so what the hooks redact from logs is also
+reported when it is committed to source, except for the redaction-only rules
+(quoted_secret, bearer) that cannot be told apart from hashes and prose. The
+tree is listed once (tracked + untracked-but-not-ignored files under git) and
+files are spread across a process pool. Each file is read through mmap; the
+sanitizer's literal prefilter (RULE_LITERALS, checked over lowercased windows
+of the mapping) picks the rules that can match, and those run as one combined
+regex in a single pass. Binary files are skipped.
+
+Hardcoded passwords/secrets come from the sanitizer's `assignment` rule, which
+needs a value of 4+ characters: quoted passwords shorter than that (the old
+grep check reported any non-empty one) are no longer reported.
+
+Usage:
+  python3 secret-scan.py [--output FILE] [--jobs N] [PATH ...]
+      scan PATH (default: src lib app, or . if none exist)
+  python3 secret-scan.py --changed-only [REF] [--output FILE]
+      scan only files changed since REF (default HEAD) per `git diff`, plus untracked files
+  python3 secret-scan.py --files-from LIST [--output FILE]
+      scan the files listed in LIST (verification-loop.sh narrowed run)
+
+Writes the verification-security.json result and exits 1 on critical issues.
+"""
+
+import argparse
+import fnmatch
+import functools
+import importlib.util
+import json
+import mmap
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+HOOKS_DIR = os.path.dirname(SCRIPT_DIR)
+
+DEFAULT_OUTPUT = ".orchestra/logs/verification-security.json"
+DEFAULT_SCAN_DIRS = ("src", "lib", "app")
+SCAN_EXTENSIONS = (".ts", ".tsx", ".js", ".jsx", ".py", ".go", ".rs")
+DEBUG_EXTENSIONS = (".ts", ".tsx", ".js", ".jsx")
+KEY_FILE_NAMES = ("*.pem", "*.key", "*_rsa")
+# 순회에서 제외할 디렉토리 (git이 없을 때)
+SKIP_DIRS = {".git", ".orchestra", "node_modules", "dist", "build", "coverage", "target", "__pycache__", ".venv"}
+TEST_PATH_RE = re.compile(r"test|spec|mock")
+SENSITIVE_STAGED_RE = re.compile(r"\.env|credentials|secret")
+BINARY_SNIFF_BYTES = 8192
+# 리터럴 prefilter가 한 번에 소문자로 바꾸는 구간 크기 (파일 전체를 복사하지 않음)
+PREFILTER_WINDOW_BYTES = 1024 * 1024
+FILES_PER_TASK = 32
+
+
+def _load_sanitizer():
+    """Import hooks/sanitize-content.py (hyphenated file name) for its rule table."""
+    spec = importlib.util.spec_from_file_location("sanitize_content", os.path.join(HOOKS_DIR, "sanitize-content.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+sanitizer = _load_sanitizer()
+
+
+# --- Scan Rules ---
+
+# sanitizer 규칙 → (issue type, severity). quoted_secret은 해시/fixture 문자열과, bearer는
+# "the Bearer token" 같은 주석/문서와 구분되지 않아 redaction 전용
+SANITIZER_ISSUES = {
+    "api_key": ("ai_service_key", "critical"),
+    "github_token": ("github_token", "critical"),
+    "github_oauth": ("github_token", "critical"),
+    "github_pat": ("github_token", "critical"),
+    "aws_key": ("aws_access_key", "critical"),
+    "private_key": ("private_key", "critical"),
+    "assignment": ("hardcoded_secret", "critical"),
+}
+
+# 스캐너 전용 규칙 (name, pattern, issue type, severity): sanitizer가 다루지 않는 이름/코드 패턴
+SCAN_ONLY_RULES = [
+    ("api_key_assignment", r"(?:API_KEY|apiKey|API_SECRET)\s*[=:]\s*[\"'][^\"']{10,}[\"']",
+     "hardcoded_api_key", "critical"),
+    ("ai_key", r"anthropic-[A-Za-z0-9]{20,}", "ai_service_key", "critical"),
+    ("debug", r"console\.(?:log|debug)\(|debugger;", "debug_statement", "low"),
+]
+SCAN_ONLY_LITERALS = {
+    "api_key_assignment": (("api_key", "apikey", "api_secret"),),
+    "ai_key": (("anthropic-",),),
+    "debug": (("console.", "debugger;"),),
+}
+
+SCAN_RULES = [
+    (name, pattern) + SANITIZER_ISSUES[name]
+    for name, pattern, _ in sanitizer.REDACTION_RULES if name in SANITIZER_ISSUES
+] + SCAN_ONLY_RULES
+RULE_ISSUES = {name: (issue_type, severity) for name, _, issue_type, severity in SCAN_RULES}
+# 규칙이 매칭되려면 반드시 포함되어야 하는 소문자 리터럴 (sanitizer의 prefilter 테이블 공유)
+RULE_LITERALS = {
+    name: tuple(tuple(literal.encode() for literal in group) for group in groups)
+    for name, groups in {**sanitizer.RULE_LITERALS, **SCAN_ONLY_LITERALS}.items() if name in RULE_ISSUES
+}
+# 구간 경계에 걸친 리터럴도 찾도록 이어지는 구간과 겹치는 바이트 수
+LITERAL_OVERLAP = max(len(literal) for groups in RULE_LITERALS.values() for group in groups for literal in group) - 1
+# 테스트 파일에서는 보고하지 않는 규칙 (fixture 비밀번호, 디버그 출력)
+TEST_EXEMPT_RULES = frozenset(["assignment", "debug"])
+PASSWORD_KEYWORDS = frozenset([b"password", b"passwd", b"pwd"])
+API_KEY_KEYWORDS = frozenset([b"api_key", b"api-key"])
+QUOTED_VALUE_RE = re.compile(rb"[:=]\s*[\"']")
+
+
+@functools.lru_cache(maxsize=None)
+def combined_regex(names):
+    """One bytes alternation over the given scan rules (named group per rule, table order kept)."""
+    return re.compile(
+        b"|".join(f"(?P<{name}>{pattern})".encode() for name, pattern, _, _ in SCAN_RULES if name in names),
+        re.IGNORECASE,
+    )
+
+
+def rules_for(path):
+    """Names of the scan rules that apply to a file."""
+    names = set(RULE_ISSUES)
+    if not path.endswith(DEBUG_EXTENSIONS):
+        names.discard("debug")
+    if TEST_PATH_RE.search(path):
+        names -= TEST_EXEMPT_RULES
+    return frozenset(names)
+
+
+def candidate_rules(mm, names):
+    """The rules among names whose required literals all occur in the file (ASCII case-insensitive).
+
+    The mapping is lowercased one PREFILTER_WINDOW_BYTES window at a time, so
+    only a window, not the whole file, is copied; the scan stops as soon as
+    every rule's literals have been seen.
+    """
+    remaining = {literal for name in names for group in RULE_LITERALS[name] for literal in group}
+    found = set()
+
+    def matches(name):
+        return all(any(literal in found for literal in group) for group in RULE_LITERALS[name])
+
+    for start in range(0, len(mm), PREFILTER_WINDOW_BYTES):
+        window = mm[start:start + PREFILTER_WINDOW_BYTES + LITERAL_OVERLAP].lower()
+        hits = {literal for literal in remaining if literal in window}
+        if hits:
+            found |= hits
+            remaining -= hits
+            if not remaining or all(matches(name) for name in names):
+                break
+    return frozenset(name for name in names if matches(name))
+
+
+def finding(name, m):
+    """(issue type, severity) for a match, or None if it is not reportable."""
+    issue_type, severity = RULE_ISSUES[name]
+    if name == "assignment":
+        # sanitizer는 따옴표 없는 값도 가리지만, 코드에서는 `password: string` 같은 식별자라 리터럴만 보고
+        if not QUOTED_VALUE_RE.search(m.group(0)):
+            return None
+        # 키워드별 issue type은 이전 grep 스캐너와 같게 (api_key는 api_key_assignment보다 먼저 매칭됨)
+        keyword = m.group("kw").lower()
+        if keyword in PASSWORD_KEYWORDS:
+            issue_type = "hardcoded_password"
+        elif keyword in API_KEY_KEYWORDS:
+            issue_type = "hardcoded_api_key"
+    return issue_type, severity
+
+
+# --- File Scan ---
+
+def scan_file(path):
+    """[(issue type, severity, line), ...] for one file; binary and unreadable files yield nothing."""
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm.find(b"\0", 0, BINARY_SNIFF_BYTES) >= 0:
+                    return []
+                # 깨끗한 파일(대부분)은 리터럴 검사만으로 끝나고, 나머지는 해당 규칙만 한 번에 매칭
+                names = candidate_rules(mm, rules_for(path))
+                if not names:
+                    return []
+                results = []
+                line = 1
+                pos = 0
+                for m in combined_regex(names).finditer(mm):
+                    found = finding(m.lastgroup, m)
+                    if found is None:
+                        continue
+                    line += mm[pos:m.start()].count(b"\n")
+                    pos = m.start()
+                    results.append(found + (line,))
+                return results
+    except (OSError, ValueError):
+        return []
+
+
+def scan_files(paths):
+    """{path: findings} for a batch of files (one process pool task)."""
+    return {path: found for path in paths for found in [scan_file(path)] if found}
+
+
+def scan(paths, jobs):
+    """{path: findings} for all files, in `jobs` worker processes."""
+    batches = [paths[i:i + FILES_PER_TASK] for i in range(0, len(paths), FILES_PER_TASK)]
+    if jobs <= 1 or len(batches) <= 1:
+        return scan_files(paths)
+    results = {}
+    with multiprocessing.Pool(min(jobs, len(batches))) as pool:
+        for batch in pool.imap_unordered(scan_files, batches):
+            results.update(batch)
+    return results
+
+
+# --- File Selection ---
+
+def git_lines(*args):
+    """Output lines of a git command, or None outside a git work tree."""
+    try:
+        result = subprocess.run(["git", *args], capture_output=True, text=True)
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    return [line for line in result.stdout.split("\0" if "-z" in args else "\n") if line]
+
+
+def list_files(roots):
+    """Files under roots: tracked + untracked-but-not-ignored under git, else a directory walk."""
+    files = git_lines("ls-files", "-z", "--cached", "--others", "--exclude-standard", "--", *roots)
+    if files is not None:
+        return [f for f in files if not f.startswith(".orchestra/")]
+    files = []
+    for root in roots:
+        if os.path.isfile(root):
+            files.append(root)
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+            for name in filenames:
+                files.append(os.path.relpath(os.path.join(dirpath, name)))
+    return files
+
+
+def changed_files(ref):
+    """Files changed since ref (git diff, deletions excluded) plus untracked files."""
+    changed = git_lines("diff", "-z", "--name-only", "--relative", "--diff-filter=d", ref)
+    if changed is None:
+        sys.exit(f"--changed-only: not a git work tree or unknown ref {ref!r}")
+    untracked = git_lines("ls-files", "-z", "--others", "--exclude-standard") or []
+    return sorted(set(changed) | set(untracked))
+
+
+def read_file_list(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+
+def is_key_file(path):
+    base = os.path.basename(path)
+    return any(fnmatch.fnmatch(base, pattern) for pattern in KEY_FILE_NAMES)
+
+
+# --- Result ---
+
+def build_result(findings, key_files, staged, duration_ms, files_scanned):
+    """verification-security.json record (same shape as the former grep-based scan)."""
+    issues = []
+    debug_count = 0
+    for path in sorted(findings):
+        for issue_type, severity, line in findings[path]:
+            if issue_type == "debug_statement":
+                debug_count += 1
+            else:
+                issues.append({"type": issue_type, "location": f"{path}:{line}", "severity": severity})
+    issue_count = len(issues)
+    # 디버그 문은 개수만 보고하고 issueCount에는 넣지 않음 (기존 동작)
+    if debug_count:
+        issues.append({"type": "debug_statement", "count": debug_count, "severity": "low"})
+    if staged:
+        issues.append({"type": "sensitive_file_staged", "severity": "critical"})
+        issue_count += 1
+    for path in key_files:
+        issues.append({"type": "private_key_file", "file": path, "severity": "high"})
+        issue_count += 1
+    critical_count = sum(1 for issue in issues if issue["severity"] == "critical")
+    status = "fail" if critical_count else "warn" if issue_count else "pass"
+    return {
+        "phase": "security",
+        "status": status,
+        "duration": duration_ms,
+        "issueCount": issue_count,
+        "criticalCount": critical_count,
+        "issues": issues,
+        "filesScanned": files_scanned,
+        "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+
+
+def save_result(path, result):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan source files for secrets (verification security phase)")
+    parser.add_argument("paths", nargs="*", help="Files/directories to scan (default: src lib app, or .)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Result JSON file")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (1 = serial; default: CPU count)")
+    parser.add_argument("--changed-only", nargs="?", const="HEAD", default=None, metavar="REF",
+                        help="Only scan files changed since REF (default HEAD) and untracked files")
+    parser.add_argument("--files-from", metavar="LIST", help="Only scan the files listed in LIST (one per line)")
+    parser.add_argument("--started-ms", type=int, default=None,
+                        help="Epoch milliseconds the phase started at (duration is measured from it)")
+    args = parser.parse_args()
+
+    started_ms = args.started_ms if args.started_ms is not None else int(time.time() * 1000)
+    print("🔒 Running security scan...")
+    if args.files_from:
+        candidates = [path for path in read_file_list(args.files_from) if os.path.isfile(path)]
+    elif args.changed_only:
+        candidates = [path for path in changed_files(args.changed_only) if os.path.isfile(path)]
+    else:
+        roots = args.paths or [d for d in DEFAULT_SCAN_DIRS if os.path.isdir(d)] or ["."]
+        candidates = list_files(roots)
+
+    paths = sorted(path for path in candidates if path.endswith(SCAN_EXTENSIONS))
+    key_files = sorted(path for path in candidates if is_key_file(path))
+    findings = scan(paths, args.jobs)
+    staged = any(SENSITIVE_STAGED_RE.search(path) for path in git_lines("diff", "--cached", "--name-only") or [])
+
+    result = build_result(findings, key_files, staged, int(time.time() * 1000) - started_ms, len(paths))
+    save_result(args.output, result)
+    for issue in result["issues"]:
+        where = issue.get("location") or issue.get("file") or issue.get("count", "")
+        print(f"   ⚠️ {issue['type']} ({issue['severity']}): {where}")
+    if result["status"] == "fail":
+        print(f"❌ Security scan failed: {result['criticalCount']} critical issues")
+        sys.exit(1)
+    if result["status"] == "warn":
+        print(f"⚠️ Security scan completed with {result['issueCount']} warnings")
+    else:
+        print(f"✅ Security scan passed ({len(paths)} files)")
+
+
+if __name__ == "__main__":
+    main()
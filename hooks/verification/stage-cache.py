@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Content-hash result cache for the verification loop stages.
+
+A stage's key is built from the content hashes of the files it depends on,
+its tool config files, the stage script itself and its arguments. Whole-tree
+stages (build, types, tests) depend on every non-ignored project file, since
+styles, fixtures, schemas or env files can change their outcome; per-file
+stages only on the file types they check. When a
+stage last passed with the same key, verification-loop.sh restores the saved
+result instead of running it. Per-file stages (lint, security) whose config
+is unchanged and whose last run was clean are narrowed to the changed files.
+
+File hashes are kept in <cache-dir>/file-hashes.json with the size and
+mtime they were computed at, so only files whose stat changed are re-read.
+
+Usage:
+  python3 stage-cache.py [--cache-dir DIR] check STAGE --script PATH --result FILE [--changed-list FILE] [-- ARGS...]
+      prints "hit" (result file restored), "narrow" (changed files written to
+      --changed-list) or "miss"; the computed key is kept for `store`
+  python3 stage-cache.py [--cache-dir DIR] store STAGE --script PATH --result FILE [-- ARGS...]
+      saves the result of a successful run under the key from `check`
+  python3 stage-cache.py [--cache-dir DIR] clear
+
+Stage results live in <cache-dir>/verification/<stage>.json (default .orchestra/cache).
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+DEFAULT_CACHE_DIR = os.path.join(".orchestra", "cache")
+STAGE_SUBDIR = "verification"
+FILE_HASHES_FILE = "file-hashes.json"
+CACHE_VERSION = 1
+READ_BLOCK_SIZE = 1024 * 1024
+
+CODE_EXTENSIONS = (
+    ".ts", ".tsx", ".mts", ".cts", ".js", ".jsx", ".mjs", ".cjs", ".vue", ".svelte",
+    ".py", ".go", ".rs", ".json",
+)
+COMMON_CONFIGS = (
+    "package.json", "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "bun.lockb", "tsconfig.json",
+    "pyproject.toml", "setup.py", "setup.cfg", "requirements.txt", "Cargo.toml", "Cargo.lock", "go.mod", "go.sum",
+)
+# 순회에서 제외할 디렉토리 (git이 없을 때)
+SKIP_DIRS = {".git", ".orchestra", "node_modules", "dist", "build", "coverage", "target", "__pycache__", ".venv"}
+
+# stage → 의존 파일 (확장자/이름 패턴, 없으면 프로젝트 전체), 도구 설정 파일, 파일 단위 검사 여부
+STAGES = {
+    "build": {"configs": COMMON_CONFIGS},
+    "types": {"configs": COMMON_CONFIGS + ("mypy.ini",)},
+    "lint": {
+        "extensions": CODE_EXTENSIONS,
+        "configs": COMMON_CONFIGS + (
+            ".eslintrc.js", ".eslintrc.json", ".eslintrc.yml", "eslint.config.js", "eslint.config.mjs",
+            ".eslintignore", "biome.json", "ruff.toml", ".ruff.toml", ".flake8", ".golangci.yml",
+        ),
+        "perFile": True,
+    },
+    "tests": {
+        "configs": COMMON_CONFIGS + (
+            "jest.config.js", "jest.config.ts", "vitest.config.ts", "vitest.config.js", "pytest.ini",
+            ".coveragerc", ".nycrc",
+        ),
+    },
+    "security": {
+        "extensions": (".ts", ".tsx", ".js", ".jsx", ".py", ".go", ".rs"),
+        "names": ("*.pem", "*.key", "*_rsa"),
+        "configs": (),
+        "perFile": True,
+        # 스테이징된 민감 파일 검사는 작업 트리 내용과 무관하므로 키에 포함
+        "staged": True,
+        # stage 스크립트가 실행하는 스캐너와 공유 규칙 테이블 (스크립트 디렉토리 기준)
+        "helpers": ("secret-scan.py", "../sanitize-content.py"),
+    },
+}
+
+
+def now_utc_iso():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def load_json(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (IOError, json.JSONDecodeError):
+        return default
+
+
+def save_json(path, obj):
+    """Write a JSON file atomically."""
+    dir_path = os.path.dirname(path) or "."
+    os.makedirs(dir_path, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dir_path, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False)
+        os.rename(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def git_lines(*args):
+    """Output lines of a git command, or None outside a git work tree."""
+    try:
+        result = subprocess.run(["git", *args], capture_output=True, text=True)
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    return [line for line in result.stdout.split("\0" if "-z" in args else "\n") if line]
+
+
+def list_files():
+    """Project files: tracked + untracked-but-not-ignored under git, else a directory walk."""
+    files = git_lines("ls-files", "-z", "--cached", "--others", "--exclude-standard")
+    if files is not None:
+        return [f for f in files if not f.startswith(".orchestra/")]
+    files = []
+    for dirpath, dirnames, filenames in os.walk("."):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for name in filenames:
+            files.append(os.path.relpath(os.path.join(dirpath, name)))
+    return files
+
+
+def stage_files(spec, files):
+    """The files a stage depends on (sorted): every project file unless the stage lists extensions."""
+    extensions = spec.get("extensions")
+    if extensions is None:
+        return sorted(files)
+    names = spec.get("names", ())
+    configs = set(spec["configs"])
+    selected = []
+    for path in files:
+        base = os.path.basename(path)
+        if path.endswith(extensions) or base in configs or any(fnmatch.fnmatch(base, n) for n in names):
+            selected.append(path)
+    return sorted(selected)
+
+
+class FileHashes:
+    """sha256 digests of files, recomputed only when size or mtime changed."""
+
+    def __init__(self, cache_dir):
+        self.path = os.path.join(cache_dir, FILE_HASHES_FILE)
+        saved = load_json(self.path, {})
+        self.entries = saved.get("files", {}) if saved.get("version") == CACHE_VERSION else {}
+        self.dirty = False
+
+    def digest(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        cached = self.entries.get(path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        h = hashlib.sha256()
+        try:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(READ_BLOCK_SIZE), b""):
+                    h.update(block)
+        except OSError:
+            return None
+        digest = h.hexdigest()
+        self.entries[path] = [st.st_size, st.st_mtime_ns, digest]
+        self.dirty = True
+        return digest
+
+    def retain(self, paths):
+        """Forget files that are no longer part of the project."""
+        stale = self.entries.keys() - paths
+        for path in stale:
+            del self.entries[path]
+        self.dirty = self.dirty or bool(stale)
+
+    def save(self):
+        if self.dirty:
+            save_json(self.path, {"version": CACHE_VERSION, "files": self.entries})
+
+
+def hash_items(items):
+    h = hashlib.sha256()
+    for item in items:
+        h.update(item.encode("utf-8", errors="replace"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def compute_key(stage, script, args, hashes):
+    """(configKey, key, {file: digest}) for a stage in the current tree."""
+    spec = STAGES[stage]
+    project_files = list_files()
+    helpers = [os.path.normpath(os.path.join(os.path.dirname(script), helper)) for helper in spec.get("helpers", ())]
+    hashes.retain(set(project_files) | {script, *helpers})
+    files = {}
+    for path in stage_files(spec, project_files):
+        digest = hashes.digest(path)
+        if digest is not None:
+            files[path] = digest
+    config_items = [f"v{CACHE_VERSION}", stage, hashes.digest(script) or "", *args]
+    config_items += [hashes.digest(helper) or "" for helper in helpers]
+    config_items += [f"{name}={files.get(name, '')}" for name in spec["configs"]]
+    if spec.get("staged"):
+        config_items += ["staged:"] + (git_lines("diff", "--cached", "--name-only") or [])
+    config_key = hash_items(config_items)
+    key = hash_items([config_key] + [f"{path}={digest}" for path, digest in sorted(files.items())])
+    return config_key, key, files
+
+
+def stage_path(cache_dir, stage, suffix=".json"):
+    return os.path.join(cache_dir, STAGE_SUBDIR, stage + suffix)
+
+
+def restore_result(entry, result_file):
+    """Write the cached result back to the stage result file, marked as cached."""
+    result = dict(entry["result"])
+    result["cached"] = True
+    result["cachedDuration"] = result.get("duration", 0)
+    result["duration"] = 0
+    result["cachedAt"] = entry["timestamp"]
+    result.pop("narrowedTo", None)
+    save_json(result_file, result)
+
+
+def check(cache_dir, stage, script, result_file, args, changed_list=None):
+    """Decide hit / narrow / miss and remember the key for `store`."""
+    if stage not in STAGES:
+        return "miss"
+    hashes = FileHashes(cache_dir)
+    config_key, key, files = compute_key(stage, script, args, hashes)
+    hashes.save()
+    entry = load_json(stage_path(cache_dir, stage), {})
+    if entry.get("version") == CACHE_VERSION and entry.get("key") == key:
+        restore_result(entry, result_file)
+        return "hit"
+
+    decision = "miss"
+    changed = []
+    # 파일 단위 검사: 설정이 같고 지난 결과가 깨끗했다면 바뀐 파일만 검사해도 결과가 같다
+    if (STAGES[stage].get("perFile") and changed_list and entry.get("version") == CACHE_VERSION
+            and entry.get("configKey") == config_key and entry.get("result", {}).get("status") == "pass"):
+        previous = entry.get("files", {})
+        changed = [path for path, digest in files.items() if previous.get(path) != digest]
+        os.makedirs(os.path.dirname(changed_list) or ".", exist_ok=True)
+        with open(changed_list, "w", encoding="utf-8") as f:
+            f.write("".join(path + "\n" for path in changed))
+        decision = "narrow"
+    save_json(stage_path(cache_dir, stage, ".pending.json"), {
+        "version": CACHE_VERSION, "key": key, "configKey": config_key, "files": files,
+        "narrowedTo": len(changed) if decision == "narrow" else None,
+    })
+    return decision
+
+
+def store(cache_dir, stage, result_file):
+    """Save the result of a successful run under the key computed by `check`."""
+    pending_path = stage_path(cache_dir, stage, ".pending.json")
+    pending = load_json(pending_path, None)
+    result = load_json(result_file, None)
+    if not pending or not isinstance(result, dict) or result.get("status") == "fail":
+        return False
+    if pending.get("narrowedTo") is not None:
+        result["narrowedTo"] = pending["narrowedTo"]
+        save_json(result_file, result)
+    save_json(stage_path(cache_dir, stage), {
+        "version": CACHE_VERSION,
+        "key": pending["key"],
+        "configKey": pending["configKey"],
+        "files": pending["files"],
+        "result": result,
+        "timestamp": now_utc_iso(),
+    })
+    os.unlink(pending_path)
+    return True
+
+
+def clear(cache_dir):
+    """Remove the file hashes and every stored stage result. Returns the number of files removed."""
+    stage_dir = os.path.join(cache_dir, STAGE_SUBDIR)
+    removed = 0
+    for path in [os.path.join(cache_dir, FILE_HASHES_FILE)] + (
+            [os.path.join(stage_dir, f) for f in os.listdir(stage_dir)] if os.path.isdir(stage_dir) else []):
+        try:
+            os.unlink(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-hash cache for verification loop stages")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("check", "store"):
+        p = sub.add_parser(name)
+        p.add_argument("stage")
+        p.add_argument("--script", required=True, help="Stage script (its content is part of the key)")
+        p.add_argument("--result", required=True, help="Stage result JSON file")
+        if name == "check":
+            p.add_argument("--changed-list", help="Where to write the changed files of a narrowed per-file stage")
+    sub.add_parser("clear")
+    # "--" 뒤는 stage 인자 (키의 일부): 옵션 뒤에 오므로 argparse 밖에서 분리
+    argv = sys.argv[1:]
+    stage_args = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, stage_args = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+
+    if args.command == "check":
+        print(check(args.cache_dir, args.stage, args.script, args.result, stage_args, args.changed_list))
+    elif args.command == "store":
+        print("stored" if store(args.cache_dir, args.stage, args.result) else "skipped")
+    else:
+        print(clear(args.cache_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -59,6 +59,17 @@ DIFF_DURATION=0
 BLOCKERS=()
 PR_READY=true
 
+# 결과 캐시 (.orchestra/cache/): 의존 파일/설정/스크립트 해시가 지난 통과 실행과 같으면 stage 생략
+# ORCHESTRA_VERIFY_CACHE=off 로 비활성화
+CACHE_SCRIPT="$SCRIPT_DIR/stage-cache.py"
+stage_cache() {
+  if [ "${ORCHESTRA_VERIFY_CACHE:-on}" = "off" ] || [ ! -f "$CACHE_SCRIPT" ]; then
+    echo "miss"
+    return 0
+  fi
+  python3 "$CACHE_SCRIPT" --cache-dir "$ORCHESTRA_DIR/cache" "$@" 2>/dev/null || echo "miss"
+}
+
 # Phase 실행 함수
 run_phase() {
   local phase_name="$1"
@@ -72,7 +83,28 @@ run_phase() {
   echo "────────────────────────────────────────────────────────────────"
 
   if [ -x "$script" ]; then
-    if "$script" "$result_file" "${args[@]}"; then
+    # verification-<stage>.json → stage 이름
+    local stage
+    stage=$(basename "$result_file" .json)
+    stage="${stage#verification-}"
+    local changed_list="$ORCHESTRA_DIR/cache/verification/$stage.changed"
+    local decision
+    decision=$(stage_cache check "$stage" --script "$script" --result "$result_file" \
+      --changed-list "$changed_list" -- "${args[@]}")
+    local changed_files=""
+    case "$decision" in
+      hit)
+        echo "♻️ Cached: no relevant changes since the last passing run"
+        return 0
+        ;;
+      narrow)
+        changed_files="$changed_list"
+        echo "♻️ Narrowed to $(wc -l < "$changed_list" | tr -d ' ') changed files"
+        ;;
+    esac
+
+    if VERIFY_CHANGED_FILES="$changed_files" "$script" "$result_file" "${args[@]}"; then
+      stage_cache store "$stage" --script "$script" --result "$result_file" -- "${args[@]}" > /dev/null
       return 0
     else
       return 1
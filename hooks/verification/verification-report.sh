@@ -76,6 +76,32 @@ if command -v jq &> /dev/null; then
   fi
 fi
 
+# 결과 캐시 적중/축소된 stage (verification-loop.sh → stage-cache.py)
+# 이번에 실행되지 않은(skip) stage의 이전 결과 파일은 제외
+CACHE_HITS=()
+CACHE_NARROWED=()
+if command -v jq &> /dev/null; then
+  for phase in build:$BUILD_STATUS types:$TYPE_STATUS lint:$LINT_STATUS tests:$TEST_STATUS security:$SECURITY_STATUS; do
+    name="${phase%%:*}"
+    [ "${phase#*:}" = "skip" ] && continue
+    [ -f "$LOG_DIR/verification-$name.json" ] || continue
+    case "$(jq -r 'if .cached then "hit" elif .narrowedTo != null then "narrow" else "" end' \
+      "$LOG_DIR/verification-$name.json" 2>/dev/null)" in
+      hit) CACHE_HITS+=("$name") ;;
+      narrow) CACHE_NARROWED+=("$name") ;;
+    esac
+  done
+fi
+
+# bash 배열 → JSON 문자열 배열
+json_array() {
+  if [ "$#" -eq 0 ]; then
+    echo "[]"
+  else
+    printf '%s\n' "$@" | jq -R . | jq -sc .
+  fi
+}
+
 # 리포트 출력
 echo ""
 echo "╔═══════════════════════════════════════════════════════════════╗"
@@ -135,6 +161,14 @@ fi
 
 echo "╠═══════════════════════════════════════════════════════════════╣"
 
+# Cache
+if [ "${#CACHE_HITS[@]}" -gt 0 ] || [ "${#CACHE_NARROWED[@]}" -gt 0 ]; then
+  CACHE_TEXT="${#CACHE_HITS[@]} cached"
+  [ "${#CACHE_HITS[@]}" -gt 0 ] && CACHE_TEXT="$CACHE_TEXT ($(IFS=,; echo "${CACHE_HITS[*]}"))"
+  [ "${#CACHE_NARROWED[@]}" -gt 0 ] && CACHE_TEXT="$CACHE_TEXT, ${#CACHE_NARROWED[@]} narrowed ($(IFS=,; echo "${CACHE_NARROWED[*]}"))"
+  printf "║  Cache: %-53s ║\n" "$CACHE_TEXT"
+fi
+
 # Total Duration
 TOTAL_SECONDS=$(format_duration "$TOTAL_DURATION")
 printf "║  Total Duration: %-10s                                    ║\n" "$TOTAL_SECONDS"
@@ -173,6 +207,10 @@ if command -v jq &> /dev/null; then
     "securityIssues": $SECURITY_ISSUES,
     "filesChanged": $FILES_CHANGED
   },
+  "cache": {
+    "hits": $(json_array "${CACHE_HITS[@]}"),
+    "narrowed": $(json_array "${CACHE_NARROWED[@]}")
+  },
   "prReady": $( [ "$PR_READY" = "true" ] && echo "true" || echo "false" )
 }
 EOF